@@ -27,6 +27,10 @@ DEBUG = True
 
 ALLOWED_HOSTS = ["*"]
 
+# Public root of the site, used where links are built outside a request or
+# must not follow the Host header (the sitemap, cache warm-up)
+SITE_URL = 'https://royalaluminiumupvcqatar.com/'
+
 CSRF_TRUSTED_ORIGINS = [
     "https://royalaluminiumupvcqatar.com",
     "https://www.royalaluminiumupvcqatar.com",
@@ -48,14 +52,20 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
-    'django.contrib.sessions.middleware.SessionMiddleware',
+    'millwork_site.middleware.PrecompressedStaticMiddleware',
+    'django.middleware.locale.LocaleMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
-    'django.contrib.messages.middleware.MessageMiddleware',
+    # Sessions, auth and messages, skipped for anonymous GETs of public pages
+    'millwork_site.middleware.AnonymousFastPathMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'millwork_site.middleware.ReplicaReadsMiddleware',
 ]
 
+# AnonymousFastPathMiddleware wraps the session, auth and messages
+# middleware the admin checks look for
+SILENCED_SYSTEM_CHECKS = ['admin.E408', 'admin.E409', 'admin.E410']
+
 ROOT_URLCONF = 'core.urls'
 
 TEMPLATES = [
@@ -66,6 +76,7 @@ TEMPLATES = [
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.request',
+                'django.template.context_processors.i18n',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
                 'millwork_site.context_processors.company_info',  # Custom context processor
@@ -80,13 +91,53 @@ WSGI_APPLICATION = 'core.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# Run on every new connection. WAL lets page reads carry on while a contact
+# form is being written; synchronous=NORMAL is durable in WAL except for the
+# last commits on power loss. mmap and a 20 MB page cache keep the hot pages
+# in memory, and writers wait up to 5 s for a lock instead of failing.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'mmap_size': 128 * 1024 * 1024,
+    'cache_size': -20000,
+    'temp_store': 'MEMORY',
+}
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
-    }
+        # Reuse connections (and their warm page cache) across requests
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'init_command': ';'.join(f'PRAGMA {name}={value}' for name, value in SQLITE_PRAGMAS.items()),
+            # Take the write lock at BEGIN, so busy_timeout applies instead of
+            # a read transaction failing outright when it tries to write
+            'transaction_mode': 'IMMEDIATE',
+        },
+    },
+    # Read-only connection for the public views (millwork_site.routers). Here
+    # the same file opened mode=ro; point NAME at a replica (or a copy opened
+    # with ?immutable=1) to move public reads off the primary.
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': f"file:{BASE_DIR / 'db.sqlite3'}?mode=ro",
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            # journal_mode is a write and stays with the primary
+            'init_command': ';'.join(
+                f'PRAGMA {name}={value}' for name, value in SQLITE_PRAGMAS.items() if name != 'journal_mode'
+            ),
+        },
+        'TEST': {'MIRROR': 'default'},
+    },
 }
 
+DATABASE_ROUTERS = ['millwork_site.routers.PrimaryReplicaRouter']
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -110,7 +161,13 @@ AUTH_PASSWORD_VALIDATORS = [
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
 
-LANGUAGE_CODE = 'en-us'
+LANGUAGE_CODE = 'en'
+
+# English pages live at /, Arabic ones under /ar/
+LANGUAGES = [
+    ('en', 'English'),
+    ('ar', 'Arabic'),
+]
 
 TIME_ZONE = 'UTC'
 
@@ -128,6 +185,18 @@ STATICFILES_DIRS = [
 ]
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 
+# collectstatic writes content-hashed names plus .gz/.br copies (compressed
+# across STATIC_COMPRESS_WORKERS processes, default: one per CPU)
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'millwork_site.storage.CompressedManifestStaticFilesStorage',
+    },
+}
+STATIC_COMPRESS_WORKERS = None
+
 # Media files (Uploaded files)
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
@@ -143,14 +212,106 @@ SECURE_HSTS_SECONDS = 31536000 if SECURE_SSL_REDIRECT else 0
 SECURE_HSTS_INCLUDE_SUBDOMAINS = True
 SECURE_HSTS_PRELOAD = True
 
-# Cache settings for better performance
+# One SQLite cache file shared by every worker process, so hit rates do not
+# drop as workers are added and invalidations reach all of them
+# (millwork_site.cache_backends). Culled past MAX_ENTRIES or MAX_BYTES.
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-        'LOCATION': 'unique-snowflake',
-    }
+        'BACKEND': 'millwork_site.cache_backends.SQLiteCache',
+        'LOCATION': BASE_DIR / 'var' / 'cache.sqlite3',
+        'OPTIONS': {
+            'MAX_ENTRIES': 20000,
+            'MAX_BYTES': 128 * 1024 * 1024,
+        },
+    },
+    # Admin sessions, in their own file so page churn never culls a login
+    'sessions': {
+        'BACKEND': 'millwork_site.cache_backends.SQLiteCache',
+        'LOCATION': BASE_DIR / 'var' / 'sessions.sqlite3',
+        'OPTIONS': {
+            'MAX_ENTRIES': 100000,
+        },
+    },
 }
 
+# No database I/O for sessions or flash messages: the contact form's
+# "thank you" message travels in a signed cookie, and the admin's sessions
+# live in the sessions cache. Old django_session rows can be removed with
+# `manage.py clear_db_sessions`.
+SESSION_ENGINE = 'django.contrib.sessions.backends.cache'
+SESSION_CACHE_ALIAS = 'sessions'
+MESSAGE_STORAGE = 'django.contrib.messages.storage.cookie.CookieStorage'
+
+# Gives the test run its own throwaway cache file
+TEST_RUNNER = 'millwork_site.test_runner.SiteTestRunner'
+
+# Singleton rows (CompanyInfo, CompanyStatistics, PageContent) are memoised
+# per process for up to SINGLETON_LOCAL_TTL seconds on top of the shared cache,
+# and dropped as soon as the content generation moves
+SINGLETON_LOCAL_TTL = 10
+SINGLETON_CACHE_TIMEOUT = 300
+
+# Anonymous GETs of the public pages are cached for PAGE_CACHE_TIMEOUT
+# seconds (or until any site content is saved)
+PAGE_CACHE_TIMEOUT = 600
+
+# Home-page sections cached by {% cachefragment %}; keyed on model versions
+FRAGMENT_CACHE_TIMEOUT = 3600
+
+# Hit/miss counters (manage.py cache_stats) are summed in each worker and
+# written to the cache every CACHE_STATS_FLUSH_INTERVAL seconds
+CACHE_STATS_FLUSH_INTERVAL = 10
+
+# Querysets marked .cached() keep their results for QUERYSET_CACHE_TIMEOUT
+# seconds (or until a table they read is written)
+QUERYSET_CACHE_TIMEOUT = 3600
+
+# `manage.py warm_caches` renders every public URL as WARM_CACHES_BASE_URL
+# so the entries match real traffic. With WARM_CACHES_ON_STARTUP each
+# server process (core/wsgi.py, core/asgi.py) warms the caches in the
+# background after WARM_CACHES_DELAY seconds (once per content generation
+# across workers).
+WARM_CACHES_BASE_URL = SITE_URL
+WARM_CACHES_ON_STARTUP = False
+WARM_CACHES_DELAY = 5
+
+# A miss is rebuilt by one request at a time (the lock expires after
+# REGENERATION_LOCK_TIMEOUT seconds); the others serve the last good copy,
+# kept for STALE_CACHE_TIMEOUT seconds, or wait up to REGENERATION_WAIT
+# seconds when there is none yet
+REGENERATION_LOCK_TIMEOUT = 30
+REGENERATION_WAIT = 5
+STALE_CACHE_TIMEOUT = 86400
+
+# 'keyset' pages the portfolio with cursors (?after=/?before=), 'offset' uses ?page=N
+PORTFOLIO_PAGINATION = 'keyset'
+
+# Pre-generated sitemaps; split into an index + shards past SITEMAP_SHARD_SIZE URLs
+SITEMAP_ROOT = BASE_DIR / 'var' / 'sitemaps'
+SITEMAP_SHARD_SIZE = 50000
+
+# Widths of the JPEG/WebP copies generated for every uploaded image
+IMAGE_DERIVATIVE_WIDTHS = (320, 640, 1024)
+# Build the copies and previews of new uploads on a background thread once
+# the admin save commits, rather than in the committing thread
+IMAGE_PROCESSING_IN_BACKGROUND = True
+
+# On-demand resizes (/media/r/<w>x<h>/<path>, signed) are cached on disk and
+# trimmed back to RESIZE_CACHE_MAX_BYTES, least recently served first. A
+# front-end server that serves /media/ itself must pass /media/r/ to Django.
+RESIZE_CACHE_ROOT = BASE_DIR / 'var' / 'resized'
+RESIZE_CACHE_MAX_BYTES = 256 * 1024 * 1024
+# Seconds between trimming passes, shared by all workers
+RESIZE_EVICT_INTERVAL = 60
+RESIZE_MAX_DIMENSION = 3000
+
+# Per-page critical CSS inlined by {% page_stylesheets %}; rebuilt when a
+# template or stylesheet changes (`manage.py build_critical_css` to prebuild)
+CRITICAL_CSS_ROOT = BASE_DIR / 'var' / 'critical'
+
+# Downloaded font sources and Alpine.js used by `manage.py build_vendor_assets`
+VENDOR_SOURCE_ROOT = BASE_DIR / 'var' / 'vendor'
+
 # Compression settings
 USE_COMPRESSOR = False  # Install django-compressor for better performance
 
@@ -17,13 +17,26 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
+from django.conf.urls.i18n import i18n_patterns
 from django.conf.urls.static import static
+from millwork_site import views as site_views
 
 urlpatterns = [
     path('admin/', admin.site.urls),
-    path('', include('millwork_site.urls')),
+    # Ahead of the DEBUG media route, which would otherwise claim /media/r/
+    path('media/r/<int:width>x<int:height>/<path:path>', site_views.resized_media, name='resized_media'),
+    # One per site, not per language
+    path('sitemap.xml', site_views.sitemap_xml, name='sitemap'),
+    path('sitemap-<int:section>.xml', site_views.sitemap_xml, name='sitemap_section'),
+    path('robots.txt', site_views.robots_txt, name='robots'),
 ]
 
+# Public pages: English at /, Arabic under /ar/
+urlpatterns += i18n_patterns(
+    path('', include('millwork_site.urls')),
+    prefix_default_language=False,
+)
+
 # Serve media files during development
 if settings.DEBUG:
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
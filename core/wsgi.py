@@ -14,3 +14,9 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
 
 application = get_wsgi_application()
+
+# Only server processes load this module, so management commands and tests
+# never start the cache warm-up
+from millwork_site import warmup  # noqa: E402
+
+warmup.warm_on_startup()
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class MillworkSiteConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'millwork_site'
+
+    def ready(self):
+        # Connect the cache invalidation signal handlers and register the checks
+        from . import checks, signals  # noqa: F401
@@ -0,0 +1,229 @@
+"""
+A cache backend shared by every worker process on the node.
+
+Entries live in one SQLite file in WAL mode, so any number of processes
+read concurrently and see each other's writes and invalidations, which
+per-process LocMemCache cannot do. Integers are stored as SQLite integers,
+which makes incr() a single atomic UPDATE, so the content generation and
+table version counters stay exact across workers. Everything else is
+pickled.
+
+Size is bounded by MAX_ENTRIES and MAX_BYTES (OPTIONS). Triggers keep a
+running count and total size; when a set goes over either limit, expired
+entries are dropped first, then the least recently read 1/CULL_FREQUENCY
+of the rest. Read times are only written back once they are
+ACCESS_RESOLUTION seconds stale, so reads rarely write.
+
+    CACHES = {'default': {
+        'BACKEND': 'millwork_site.cache_backends.SQLiteCache',
+        'LOCATION': '/path/to/cache.sqlite3',
+        'OPTIONS': {'MAX_ENTRIES': 20000, 'MAX_BYTES': 64 * 1024 * 1024},
+    }}
+"""
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+ACCESS_RESOLUTION = 60
+INT64 = (-2 ** 63, 2 ** 63 - 1)
+
+SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS cache_entries ('
+    ' key TEXT PRIMARY KEY, value BLOB, expires REAL, accessed REAL NOT NULL, size INTEGER NOT NULL'
+    ') WITHOUT ROWID',
+    'CREATE INDEX IF NOT EXISTS cache_entries_accessed ON cache_entries (accessed)',
+    'CREATE INDEX IF NOT EXISTS cache_entries_expires ON cache_entries (expires) WHERE expires IS NOT NULL',
+    'CREATE TABLE IF NOT EXISTS cache_totals ('
+    ' id INTEGER PRIMARY KEY CHECK (id = 0), entries INTEGER NOT NULL, bytes INTEGER NOT NULL)',
+    'INSERT OR IGNORE INTO cache_totals VALUES (0, 0, 0)',
+    'CREATE TRIGGER IF NOT EXISTS cache_entries_insert AFTER INSERT ON cache_entries BEGIN'
+    ' UPDATE cache_totals SET entries = entries + 1, bytes = bytes + NEW.size; END',
+    'CREATE TRIGGER IF NOT EXISTS cache_entries_delete AFTER DELETE ON cache_entries BEGIN'
+    ' UPDATE cache_totals SET entries = entries - 1, bytes = bytes - OLD.size; END',
+    'CREATE TRIGGER IF NOT EXISTS cache_entries_resize AFTER UPDATE OF size ON cache_entries BEGIN'
+    ' UPDATE cache_totals SET bytes = bytes + NEW.size - OLD.size; END',
+)
+PRAGMAS = (
+    'PRAGMA journal_mode=WAL',
+    # A lost cache write after a power cut costs a miss, nothing more
+    'PRAGMA synchronous=NORMAL',
+    'PRAGMA mmap_size=67108864',
+)
+
+
+def _encode(value):
+    if type(value) is int and INT64[0] <= value <= INT64[1]:
+        return value
+    return pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+
+
+def _decode(stored):
+    return stored if isinstance(stored, int) else pickle.loads(stored)
+
+
+class SQLiteCache(BaseCache):
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self._path = Path(location)
+        self._max_bytes = int(options.get('MAX_BYTES', 64 * 1024 * 1024))
+        self._busy_timeout = float(options.get('BUSY_TIMEOUT', 5))
+        self._local = threading.local()
+
+    def _connection(self):
+        # One connection per thread, reopened in forked workers
+        local = self._local
+        if getattr(local, 'pid', None) != os.getpid():
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(
+                self._path, timeout=self._busy_timeout, isolation_level=None, check_same_thread=False
+            )
+            for pragma in PRAGMAS:
+                connection.execute(pragma)
+            connection.execute('BEGIN IMMEDIATE')
+            for statement in SCHEMA:
+                connection.execute(statement)
+            connection.execute('COMMIT')
+            local.connection, local.pid = connection, os.getpid()
+        return local.connection
+
+    def get(self, key, default=None, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        connection = self._connection()
+        row = connection.execute(
+            'SELECT value, expires, accessed FROM cache_entries WHERE key = ?', (key,)
+        ).fetchone()
+        if row is None:
+            return default
+        value, expires, accessed = row
+        now = time.time()
+        if expires is not None and expires <= now:
+            connection.execute('DELETE FROM cache_entries WHERE key = ? AND expires <= ?', (key, now))
+            return default
+        if accessed < now - ACCESS_RESOLUTION:
+            connection.execute('UPDATE cache_entries SET accessed = ? WHERE key = ?', (now, key))
+        return _decode(value)
+
+    def get_many(self, keys, version=None):
+        keys = {self.make_and_validate_key(key, version=version): key for key in keys}
+        if not keys:
+            return {}
+        now = time.time()
+        connection = self._connection()
+        rows = connection.execute(
+            f'SELECT key, value, accessed FROM cache_entries WHERE key IN ({", ".join("?" * len(keys))})'
+            ' AND (expires IS NULL OR expires > ?)',
+            (*keys, now),
+        ).fetchall()
+        # Like get(), so culling doesn't take entries only read in bulk for unused
+        stale = [key for key, _, accessed in rows if accessed < now - ACCESS_RESOLUTION]
+        if stale:
+            connection.execute(
+                f'UPDATE cache_entries SET accessed = ? WHERE key IN ({", ".join("?" * len(stale))})', (now, *stale)
+            )
+        return {keys[key]: _decode(value) for key, value, _ in rows}
+
+    def _store(self, key, value, timeout, only_if_missing):
+        stored = _encode(value)
+        size = len(key) + (8 if isinstance(stored, int) else len(stored))
+        now = time.time()
+        statement = (
+            'INSERT INTO cache_entries (key, value, expires, accessed, size) VALUES (?, ?, ?, ?, ?)'
+            ' ON CONFLICT (key) DO UPDATE SET value = excluded.value, expires = excluded.expires,'
+            ' accessed = excluded.accessed, size = excluded.size'
+        )
+        if only_if_missing:
+            statement += ' WHERE cache_entries.expires IS NOT NULL AND cache_entries.expires <= ?'
+        params = (key, stored, self.get_backend_timeout(timeout), now, size) + ((now,) if only_if_missing else ())
+
+        connection = self._connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            written = connection.execute(statement, params).rowcount == 1
+            if written:
+                self._cull(connection, now)
+            connection.execute('COMMIT')
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        return written
+
+    def _cull(self, connection, now):
+        entries, total = connection.execute('SELECT entries, bytes FROM cache_totals').fetchone()
+        if entries <= self._max_entries and total <= self._max_bytes:
+            return
+        connection.execute('DELETE FROM cache_entries WHERE expires IS NOT NULL AND expires <= ?', (now,))
+        entries, total = connection.execute('SELECT entries, bytes FROM cache_totals').fetchone()
+        if entries > self._max_entries or total > self._max_bytes:
+            connection.execute(
+                'DELETE FROM cache_entries WHERE key IN'
+                ' (SELECT key FROM cache_entries ORDER BY accessed LIMIT ?)',
+                # CULL_FREQUENCY 0 means empty the cache, as in Django's backends
+                (max(entries // self._cull_frequency, 1) if self._cull_frequency else entries,),
+            )
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        self._store(key, value, timeout, only_if_missing=False)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return self._store(key, value, timeout, only_if_missing=True)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        cursor = self._connection().execute(
+            'UPDATE cache_entries SET expires = ? WHERE key = ? AND (expires IS NULL OR expires > ?)',
+            (self.get_backend_timeout(timeout), key, time.time()),
+        )
+        return cursor.rowcount == 1
+
+    def incr(self, key, delta=1, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        connection = self._connection()
+        # In one transaction, so a counter another worker creates between the
+        # UPDATE and the existence check isn't taken for a non-integer
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            row = connection.execute(
+                "UPDATE cache_entries SET value = value + ? WHERE key = ? AND typeof(value) = 'integer'"
+                ' AND (expires IS NULL OR expires > ?) RETURNING value',
+                (delta, key, time.time()),
+            ).fetchone()
+            exists = row is not None or self._exists(key)
+            connection.execute('COMMIT')
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        if row is None:
+            if exists:
+                raise TypeError(f'Key {key!r} does not hold an integer')
+            raise ValueError(f"Key '{key}' not found")
+        return row[0]
+
+    def _exists(self, key):
+        return self._connection().execute(
+            'SELECT 1 FROM cache_entries WHERE key = ? AND (expires IS NULL OR expires > ?)', (key, time.time())
+        ).fetchone() is not None
+
+    def has_key(self, key, version=None):
+        return self._exists(self.make_and_validate_key(key, version=version))
+
+    def delete(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return self._connection().execute('DELETE FROM cache_entries WHERE key = ?', (key,)).rowcount == 1
+
+    def delete_many(self, keys, version=None):
+        keys = [self.make_and_validate_key(key, version=version) for key in keys]
+        if keys:
+            self._connection().execute(
+                f'DELETE FROM cache_entries WHERE key IN ({", ".join("?" * len(keys))})', keys
+            )
+
+    def clear(self):
+        self._connection().execute('DELETE FROM cache_entries')
@@ -0,0 +1,28 @@
+from django.core.checks import Tags, Warning, register
+
+from . import storage, vendor
+
+
+@register(Tags.staticfiles, deploy=True)
+def vendor_assets_check(app_configs, **kwargs):
+    """`check --deploy` warns until build_vendor_assets has written static/vendor.json"""
+    if vendor.manifest():
+        return []
+    return [Warning(
+        'The self-hosted fonts and Alpine.js have not been built, so pages load them from Google Fonts and unpkg.',
+        hint='pip install -r requirements-build.txt, then run `manage.py build_vendor_assets` and commit '
+             'static/vendor.json with the files it writes.',
+        id='millwork_site.W001',
+    )]
+
+
+@register(Tags.staticfiles, deploy=True)
+def brotli_check(app_configs, **kwargs):
+    """`check --deploy` warns when collectstatic can't write the .br copies"""
+    if storage.brotli is not None:
+        return []
+    return [Warning(
+        'The brotli package is not installed, so collectstatic writes no .br copies of the static files.',
+        hint='pip install -r requirements.txt',
+        id='millwork_site.W002',
+    )]
@@ -1,15 +1,16 @@
 """
 Context processors to make data available to all templates
 """
-from .models import CompanyInfo
+from .singletons import get_company_info
 
 
 def company_info(request):
     """
     Add company information to all template contexts
     This makes company_info available in every template automatically
+    (served from the singleton cache, so it costs no query per request)
     """
     return {
-        'company_info': CompanyInfo.objects.first()
+        'company_info': get_company_info()
     }
 
@@ -0,0 +1,246 @@
+"""
+Critical CSS per page template.
+
+For each page, the markup a visitor sees first (base.html up to the content
+block, plus the page's first <section>) is scanned for tags, ids and class
+names, and every rule in the site stylesheets whose selectors only need
+those is kept. Interaction states (:hover, :focus, ...) are left out since
+nothing is hovered before first paint. base.html inlines the result and
+loads the full stylesheets without blocking rendering.
+
+Results are memoised per template and stored under CRITICAL_CSS_ROOT, keyed
+on the template and stylesheet contents, so they are only rebuilt after one
+of those changes.
+"""
+import hashlib
+import os
+import re
+import tempfile
+from functools import lru_cache
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.template.loader import get_template
+
+from . import tailwind
+
+BASE_STYLESHEETS = ('css/globals.css', 'css/animations.css')
+ALWAYS_PRESENT_TAGS = {'html', 'body', 'head'}
+# `(?<!\\)` skips escaped colons inside class names such as .md\:flex
+INTERACTION_PSEUDO = re.compile(r'(?<!\\):(hover|focus|focus-within|focus-visible|active|disabled|checked|visited)\b')
+
+_memo = {}
+
+
+def stylesheets():
+    """Static names of the site stylesheets, in the order base.html links them"""
+    return (tailwind.stylesheet_name(),) + BASE_STYLESHEETS
+
+
+def critical_root():
+    return Path(getattr(settings, 'CRITICAL_CSS_ROOT', Path(settings.BASE_DIR) / 'var' / 'critical'))
+
+
+# Parsing ------------------------------------------------------------------
+
+def _strip_comments(css):
+    return re.sub(r'/\*.*?\*/', '', css, flags=re.S)
+
+
+def parse(css):
+    """
+    Split `css` into a list of (prelude, body) blocks. Bodies of grouping
+    at-rules (@media, @supports) are parsed recursively into lists.
+    """
+    css = _strip_comments(css)
+    blocks = []
+    position = 0
+    while True:
+        start = css.find('{', position)
+        if start == -1:
+            break
+        prelude = css[position:start].strip()
+        depth, end = 1, start + 1
+        while depth and end < len(css):
+            if css[end] == '{':
+                depth += 1
+            elif css[end] == '}':
+                depth -= 1
+            end += 1
+        body = css[start + 1:end - 1]
+        # Statements such as @import end with ';' before the next block
+        prelude = prelude.rsplit(';', 1)[-1].strip()
+        if prelude.startswith(('@media', '@supports')):
+            blocks.append((prelude, parse(body)))
+        else:
+            blocks.append((prelude, body.strip()))
+        position = end
+    return blocks
+
+
+def _split_selectors(prelude):
+    selectors, depth, current = [], 0, ''
+    for char in prelude:
+        if char in '([':
+            depth += 1
+        elif char in ')]':
+            depth -= 1
+        if char == ',' and depth == 0:
+            selectors.append(current.strip())
+            current = ''
+        else:
+            current += char
+    selectors.append(current.strip())
+    return selectors
+
+
+def _requirements(selector):
+    """Return (classes, ids, tags) an element tree needs for `selector` to match"""
+    # Drop :not(...)/:where(...) arguments, attribute selectors and pseudo parts
+    simplified = re.sub(r'(?<!\\):(?:not|where|is|has)\((?:[^()]|\([^()]*\))*\)', '', selector)
+    simplified = re.sub(r'(?<!\\)\[[^\]]*\]', '', simplified)
+    simplified = re.sub(r'(?<!\\)::?[\w-]+(?:\([^)]*\))?', '', simplified)
+    classes = {
+        re.sub(r'\\(.)', r'\1', name)
+        for name in re.findall(r'\.((?:\\.|[\w-])+)', simplified)
+    }
+    ids = set(re.findall(r'#([\w-]+)', simplified))
+    tags = {tag.lower() for tag in re.findall(r'(?:^|[\s>+~])([a-zA-Z][\w-]*)', simplified)}
+    return classes, ids, tags
+
+
+def _matches(selector, used):
+    if INTERACTION_PSEUDO.search(selector):
+        return False
+    classes, ids, tags = _requirements(selector)
+    return classes <= used['classes'] and ids <= used['ids'] and tags <= used['tags']
+
+
+def _select(blocks, used, keyframes):
+    kept = []
+    for prelude, body in blocks:
+        if isinstance(body, list):
+            inner = _select(body, used, keyframes)
+            if inner:
+                kept.append(f'{prelude}{{{inner}}}')
+        elif prelude.startswith('@font-face'):
+            kept.append(f'{prelude}{{{body}}}')
+        elif prelude.startswith('@keyframes'):
+            keyframes[prelude.split()[1]] = f'{prelude}{{{body}}}'
+        elif prelude.startswith('@'):
+            continue
+        else:
+            selectors = [s for s in _split_selectors(prelude) if _matches(s, used)]
+            if selectors:
+                kept.append(f'{",".join(selectors)}{{{body}}}')
+    return ''.join(kept)
+
+
+def _minify(css):
+    return re.sub(r'\s*([{}])\s*', r'\1', re.sub(r'\s+', ' ', css))
+
+
+# Markup -------------------------------------------------------------------
+
+def above_the_fold(template_name):
+    """Template source of what a visitor sees first on `template_name`"""
+    page = get_template(template_name).template.source
+    base_match = re.search(r'{%\s*extends\s+[\'"](.+?)[\'"]\s*%}', page)
+    if not base_match:
+        return page
+    base = get_template(base_match[1]).template.source
+    shell = base.split('{% block content %}')[0]
+    content = page.split('{% block content %}', 1)[-1]
+    first_section = re.search(r'<section.*?</section>', content, re.S)
+    return shell + (first_section[0] if first_section else content)
+
+
+def used_selectors(markup):
+    return {
+        'classes': tailwind.classes_in_template(markup),
+        'ids': set(re.findall(r'\bid="([\w-]+)"', markup)),
+        'tags': {tag.lower() for tag in re.findall(r'<([a-zA-Z][\w-]*)', markup)} | ALWAYS_PRESENT_TAGS,
+    }
+
+
+def extract(markup, css):
+    """Return the minified rules of `css` needed by `markup`"""
+    keyframes = {}
+    selected = _select(parse(css), used_selectors(markup), keyframes)
+    # Keep the keyframes the selected rules animate with
+    referenced = ''.join(body for name, body in keyframes.items() if re.search(rf'\b{re.escape(name)}\b', selected))
+    return _minify(selected + referenced)
+
+
+# Storage ------------------------------------------------------------------
+
+@lru_cache(maxsize=None)
+def _template_paths(template_name):
+    template = get_template(template_name)
+    paths = [Path(template.origin.name)]
+    base_match = re.search(r'{%\s*extends\s+[\'"](.+?)[\'"]\s*%}', template.template.source)
+    if base_match:
+        paths.append(Path(get_template(base_match[1]).origin.name))
+    return tuple(paths)
+
+
+def _sources(template_name):
+    return _template_paths(template_name) + tuple(Path(finders.find(name)) for name in stylesheets())
+
+
+def _fingerprint(paths):
+    digest = hashlib.md5()
+    for path in paths:
+        stat = path.stat()
+        digest.update(f'{path}:{stat.st_mtime_ns}:{stat.st_size};'.encode())
+    return digest.hexdigest()[:16]
+
+
+def _stem(template_name):
+    return template_name.replace('/', '_').removesuffix('.html')
+
+
+def build(template_name):
+    """Extract and store the critical CSS of `template_name`; returns the CSS"""
+    css = ''.join(Path(finders.find(name)).read_text(encoding='utf-8') for name in stylesheets())
+    critical = extract(above_the_fold(template_name), css)
+    fingerprint = _fingerprint(_sources(template_name))
+    root = critical_root()
+    root.mkdir(parents=True, exist_ok=True)
+    target = root / f'{_stem(template_name)}.{fingerprint}.css'
+    # Readers in other processes must see either no file or a complete one
+    with tempfile.NamedTemporaryFile('w', encoding='utf-8', dir=root, prefix='.', suffix='.tmp', delete=False) as temp:
+        temp.write(critical)
+    try:
+        os.replace(temp.name, target)
+    except OSError:
+        os.unlink(temp.name)
+        raise
+    for old in root.glob(f'{_stem(template_name)}.*.css'):
+        if old != target:
+            # A concurrent build may have removed it already
+            old.unlink(missing_ok=True)
+    _memo[template_name] = (fingerprint, critical)
+    return critical
+
+
+def get(template_name):
+    """Critical CSS for `template_name`, rebuilt only when its sources changed"""
+    fingerprint = _fingerprint(_sources(template_name))
+    memo = _memo.get(template_name)
+    if memo and memo[0] == fingerprint:
+        return memo[1]
+    stored = critical_root() / f'{_stem(template_name)}.{fingerprint}.css'
+    if not stored.exists():
+        return build(template_name)
+    critical = stored.read_text(encoding='utf-8')
+    _memo[template_name] = (fingerprint, critical)
+    return critical
+
+
+def page_templates():
+    """Templates that extend base.html"""
+    for path in tailwind.template_files():
+        if re.search(r'{%\s*extends\s', path.read_text(encoding='utf-8')):
+            yield path.name
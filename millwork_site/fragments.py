@@ -0,0 +1,101 @@
+"""
+Template fragment cache for the heavy home-page sections.
+
+Each fragment is registered with the models it renders. Its cache key holds
+the active language, the table versions of exactly those models and the
+templates' modification time, so editing a testimonial retires the
+testimonials fragment and nothing else, and a deploy with new markup
+retires them all.
+Hits, misses and the render time saved by hits are counted per fragment.
+Misses go through millwork_site.regeneration, so only one request renders a
+fragment while the others reuse its last good copy.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import translation
+
+from . import stats
+from .freshness import templates_modified
+from .models import (
+    Service, Project, ProjectImage, Testimonial, CompanyStatistics,
+    WhyChooseUsItem, Certification, FAQ
+)
+from .versions import model_versions
+
+FRAGMENTS = {
+    'statistics': (CompanyStatistics,),
+    'services': (Service,),
+    'why_choose_us': (WhyChooseUsItem,),
+    'categories': (Project, ProjectImage),
+    'certifications': (Certification,),
+    'testimonials': (Testimonial,),
+    'faqs': (FAQ,),
+    'faq_schema': (FAQ,),
+}
+
+STATS_KEY_PREFIX = 'fragment_cache:stats:'
+
+
+def _templates_version():
+    return int(templates_modified().timestamp())
+
+
+def fragment_key(name):
+    versions = model_versions(FRAGMENTS[name])
+    fingerprint = hashlib.md5(repr(sorted(versions.items())).encode()).hexdigest()
+    return f'fragment:{name}:{translation.get_language()}:{_templates_version()}:{fingerprint}'
+
+
+def stale_fragment_key(name):
+    # Never fall back to a copy rendered from the previous templates
+    return f'fragment:{name}:{translation.get_language()}:{_templates_version()}:last'
+
+
+def fragment_timeout():
+    return getattr(settings, 'FRAGMENT_CACHE_TIMEOUT', 3600)
+
+
+def get_fragment(key):
+    """Return (html, render_seconds) stored under `key`, or None on a miss"""
+    return cache.get(key)
+
+
+def record_hit(name, render_seconds):
+    stats.increment(f'{STATS_KEY_PREFIX}{name}:hits')
+    stats.increment(f'{STATS_KEY_PREFIX}{name}:saved_us', int(render_seconds * 1_000_000))
+
+
+def record_miss(name):
+    stats.increment(f'{STATS_KEY_PREFIX}{name}:misses')
+
+
+def record_stale(name):
+    stats.increment(f'{STATS_KEY_PREFIX}{name}:stale')
+
+
+def _stat_keys():
+    return [
+        f'{STATS_KEY_PREFIX}{name}:{stat}'
+        for name in FRAGMENTS
+        for stat in ('hits', 'misses', 'stale', 'saved_us')
+    ]
+
+
+def fragment_stats():
+    """Return {fragment: {'hits', 'misses', 'stale', 'saved_ms'}} since the last reset"""
+    values = stats.read(_stat_keys())
+    return {
+        name: {
+            'hits': values[f'{STATS_KEY_PREFIX}{name}:hits'],
+            'misses': values[f'{STATS_KEY_PREFIX}{name}:misses'],
+            'stale': values[f'{STATS_KEY_PREFIX}{name}:stale'],
+            'saved_ms': values[f'{STATS_KEY_PREFIX}{name}:saved_us'] / 1000,
+        }
+        for name in FRAGMENTS
+    }
+
+
+def reset_fragment_stats():
+    stats.reset(_stat_keys())
@@ -0,0 +1,135 @@
+"""
+Conditional GET support (ETag / 304) for the public pages.
+
+Each page declares the models it renders. Before the view runs, one UNION
+query fetches MAX(updated_at) and COUNT(*) for those tables (the counts make
+deletions visible too); the result is cached until the next content change.
+That state, the newest template mtime and the active language form the
+ETag, so a returning visitor whose copy is still current gets a 304 without
+any template rendering.
+
+No Last-Modified is sent: deleting a row leaves MAX(updated_at) where it
+was, so If-Modified-Since would keep answering 304 with the deleted row
+still on the page.
+"""
+import hashlib
+from datetime import datetime, timezone as dt_timezone
+from functools import lru_cache, wraps
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError, connections, router
+from django.utils import translation
+from django.utils.cache import patch_cache_control
+from django.utils.dateparse import parse_datetime
+from django.views.decorators.http import condition
+
+from .models import (
+    Service, Project, ProjectImage, TeamMember, CompanyInfo,
+    Testimonial, PageContent, CompanyStatistics, WhyChooseUsItem,
+    Certification, FAQ
+)
+from .page_cache import content_generation, is_anonymous_request, served_stale
+
+# CompanyInfo is rendered by base.html on every page
+PAGE_DEPENDENCIES = {
+    'home': (
+        Service, Project, ProjectImage, Testimonial, PageContent, CompanyStatistics,
+        WhyChooseUsItem, Certification, FAQ, CompanyInfo,
+    ),
+    'about': (TeamMember, Testimonial, PageContent, CompanyInfo),
+    'services': (Service, PageContent, CompanyInfo),
+    'portfolio': (Project, ProjectImage, PageContent, CompanyInfo),
+    'contact': (PageContent, CompanyInfo),
+}
+
+
+@lru_cache(maxsize=None)
+def templates_modified():
+    """Newest template mtime, so a deploy with new markup changes the validators"""
+    newest = 0
+    for directory in settings.TEMPLATES[0]['DIRS']:
+        for path in Path(directory).rglob('*.html'):
+            newest = max(newest, path.stat().st_mtime)
+    return datetime.fromtimestamp(newest, tz=dt_timezone.utc)
+
+
+def _as_datetime(value):
+    if value is None or isinstance(value, datetime):
+        return value
+    parsed = parse_datetime(value)
+    if parsed is not None and parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=dt_timezone.utc)
+    return parsed
+
+
+def table_state(models):
+    """Return [(max updated_at, row count), ...] for `models` in one query"""
+    connection = connections[router.db_for_read(models[0])]
+    quote = connection.ops.quote_name
+    sql = ' UNION ALL '.join(
+        f'SELECT {position}, MAX({quote("updated_at")}), COUNT(*) FROM {quote(model._meta.db_table)}'
+        for position, model in enumerate(models)
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql)
+        rows = sorted(cursor.fetchall())
+    return [(_as_datetime(updated), count) for _, updated, count in rows]
+
+
+def page_state(request, page):
+    """
+    Return the ETag of `page`, computed at most once per request. It is None
+    when the database can't be read, so the page cache can still serve its
+    last good copy.
+    """
+    cached = getattr(request, '_page_freshness', None)
+    if cached is None:
+        # The table state only moves when content is saved, which also bumps
+        # the content generation, so it can be shared until then
+        key = f'freshness:{content_generation()}:{page}'
+        state = cache.get(key)
+        if state is None:
+            try:
+                state = table_state(PAGE_DEPENDENCIES[page])
+            except DatabaseError:
+                request._page_freshness = ''
+                return None
+            cache.set(key, state, getattr(settings, 'PAGE_CACHE_TIMEOUT', 600))
+        fingerprint = repr((state, templates_modified(), translation.get_language()))
+        cached = hashlib.md5(fingerprint.encode()).hexdigest()
+        request._page_freshness = cached
+    return cached or None
+
+
+def _applies(request):
+    return request.method in ('GET', 'HEAD') and is_anonymous_request(request)
+
+
+def conditional_page(page):
+    """
+    Decorate a public view so GET/HEAD requests are answered with 304 Not
+    Modified when the visitor's copy of `page` is still current.
+    """
+    def etag(request, *args, **kwargs):
+        return page_state(request, page) if _applies(request) else None
+
+    def decorator(view_func):
+        conditional_view = condition(etag_func=etag)(view_func)
+
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            response = conditional_view(request, *args, **kwargs)
+            if _applies(request):
+                if served_stale(request):
+                    # The body predates the ETag condition() just added; a
+                    # browser keeping it would get 304s until the next edit
+                    response.headers.pop('ETag', None)
+                    patch_cache_control(response, no_store=True)
+                else:
+                    # Let browsers keep the page but revalidate it on every visit
+                    patch_cache_control(response, no_cache=True)
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,277 @@
+"""
+Responsive derivatives for uploaded images.
+
+Every ImageField upload gets downscaled JPEG and WebP copies at the widths in
+IMAGE_DERIVATIVE_WIDTHS, stored next to the media under derivatives/, and
+templates pick them up through the {% responsive_image %} tag so a card
+downloads a card-sized file instead of the original upload.
+
+Project, Service and ProjectImage rows also store a tiny base64 preview and
+the dominant colour of their image, so pages can paint a placeholder before
+the real file arrives.
+
+Both are produced after the owning row's transaction commits (see
+signals.py), on a single background thread so the admin request that
+uploaded the file doesn't wait for Pillow; with
+IMAGE_PROCESSING_IN_BACKGROUND = False they are produced in the committing
+thread instead. The build_image_derivatives and backfill_image_placeholders
+commands do the same in bulk.
+"""
+import base64
+import logging
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
+from io import BytesIO
+from pathlib import PurePosixPath
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connections, models
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from . import versions
+
+logger = logging.getLogger(__name__)
+
+DERIVATIVE_ROOT = 'derivatives'
+FORMATS = {
+    'jpeg': {'ext': 'jpg', 'options': {'quality': 80, 'optimize': True, 'progressive': True}},
+    'webp': {'ext': 'webp', 'options': {'quality': 75, 'method': 4}},
+}
+CACHE_KEY_PREFIX = 'image_derivatives:'
+# Cached for images found to have no derivatives on disk, as opposed to ()
+# for images whose derivatives were generated and none applied
+NOT_GENERATED = 'not-generated'
+PREVIEW_WIDTH = 16
+
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def derivative_widths_setting():
+    return tuple(sorted(getattr(settings, 'IMAGE_DERIVATIVE_WIDTHS', (320, 640, 1024))))
+
+
+def derivative_name(name, width, image_format):
+    """Storage name of the `width`px `image_format` copy of `name`"""
+    path = PurePosixPath(name)
+    return str(PurePosixPath(DERIVATIVE_ROOT, path.parent, f'{path.stem}-{width}w.{FORMATS[image_format]["ext"]}'))
+
+
+@lru_cache(maxsize=None)
+def image_fields():
+    """(model, field name) for every ImageField in millwork_site"""
+    return tuple(
+        (model, field.name)
+        for model in apps.get_app_config('millwork_site').get_models()
+        for field in model._meta.get_fields()
+        if isinstance(field, models.ImageField)
+    )
+
+
+def generate_derivatives(name):
+    """
+    Write the JPEG and WebP derivatives of the stored image `name` and return
+    the widths produced. Widths at or above the original's are skipped, so
+    small logos and avatars are never upscaled.
+    """
+    with default_storage.open(name, 'rb') as source:
+        original = ImageOps.exif_transpose(Image.open(source))
+        original = original.convert('RGBA' if original.mode in ('RGBA', 'LA', 'P') else 'RGB')
+
+    widths = [width for width in derivative_widths_setting() if width < original.width]
+    for width in widths:
+        height = max(1, round(original.height * width / original.width))
+        resized = original.resize((width, height), Image.Resampling.LANCZOS)
+        for image_format, spec in FORMATS.items():
+            # JPEG has no alpha channel
+            image = resized.convert('RGB') if image_format == 'jpeg' else resized
+            buffer = BytesIO()
+            image.save(buffer, format=image_format.upper(), **spec['options'])
+            target = derivative_name(name, width, image_format)
+            if default_storage.exists(target):
+                default_storage.delete(target)
+            default_storage.save(target, ContentFile(buffer.getvalue()))
+    return widths
+
+
+def _remember(name, widths):
+    cache.set(CACHE_KEY_PREFIX + name, tuple(widths), None)
+
+
+def _stored_widths(name):
+    """The cached widths of `name`, or NOT_GENERATED; checked on disk once"""
+    key = CACHE_KEY_PREFIX + name
+    widths = cache.get(key)
+    if widths is None:
+        widths = tuple(
+            width for width in derivative_widths_setting()
+            if default_storage.exists(derivative_name(name, width, 'webp'))
+        ) or NOT_GENERATED
+        cache.set(key, widths, None)
+    return widths
+
+
+def available_widths(name):
+    """Widths with stored derivatives for `name`"""
+    widths = _stored_widths(name)
+    return () if widths == NOT_GENERATED else widths
+
+
+def ensure_derivatives(name):
+    """
+    Generate derivatives for `name` unless that was already done, and return
+    whether any were written
+    """
+    if _stored_widths(name) != NOT_GENERATED or not default_storage.exists(name):
+        return False
+    try:
+        widths = generate_derivatives(name)
+    except OSError:
+        # A missing or unreadable upload (PIL.UnidentifiedImageError is an
+        # OSError) still renders as the original
+        logger.warning('Could not generate derivatives for %s', name, exc_info=True)
+        return False
+    _remember(name, widths)
+    return bool(widths)
+
+
+def _generate_quietly(name):
+    try:
+        return name, generate_derivatives(name), None
+    except OSError as exc:
+        return name, [], str(exc)
+
+
+def regenerate_all(workers=None):
+    """
+    Regenerate the derivatives of every stored image across a process pool
+    and yield (name, widths, error) as each one finishes.
+    """
+    names = set()
+    for model, field_name in image_fields():
+        names.update(
+            model.objects.exclude(**{field_name: ''}).exclude(**{f'{field_name}__isnull': True})
+            .values_list(field_name, flat=True)
+        )
+    # Forked workers must not share the parent's database connections
+    connections.close_all()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for name, widths, error in pool.map(_generate_quietly, sorted(names)):
+            if error is None:
+                _remember(name, widths)
+            yield name, widths, error
+
+
+def preview(source):
+    """
+    Return (data URI of a PREVIEW_WIDTH px WebP preview, '#rrggbb' dominant
+    colour) for the image file `source`.
+    """
+    image = Image.open(source)
+    # Let the JPEG decoder downscale while decoding instead of after
+    image.draft('RGB', (PREVIEW_WIDTH * 8, PREVIEW_WIDTH * 8))
+    image = ImageOps.exif_transpose(image).convert('RGB')
+
+    # Median-cut quantisation runs over the whole pixel buffer in C; the
+    # dominant colour is the palette entry covering the most pixels
+    sample = image.copy()
+    sample.thumbnail((64, 64))
+    quantized = sample.quantize(colors=5, method=Image.Quantize.MEDIANCUT)
+    _, index = max(quantized.getcolors())
+    red, green, blue = quantized.getpalette()[index * 3:index * 3 + 3]
+
+    image.thumbnail((PREVIEW_WIDTH, PREVIEW_WIDTH * 4))
+    buffer = BytesIO()
+    image.save(buffer, format='WEBP', quality=40)
+    data_uri = 'data:image/webp;base64,' + base64.b64encode(buffer.getvalue()).decode('ascii')
+    return data_uri, f'#{red:02x}{green:02x}{blue:02x}'
+
+
+def _stored_preview(name):
+    try:
+        with default_storage.open(name, 'rb') as source:
+            return preview(source)
+    except OSError:
+        return '', ''
+
+
+def placeholder_models():
+    """Models that store an image preview alongside their `image` field"""
+    return tuple(model for model, field_name in image_fields() if hasattr(model, 'image_placeholder'))
+
+
+def process_saved_image(model, pk, name, store_preview=False):
+    """
+    Generate the derivatives of `name`, an image of the `model` row `pk`, and
+    with `store_preview` its preview, unless the row has moved on to another
+    image meanwhile
+    """
+    if ensure_derivatives(name):
+        # Pages cached before the copies existed carry no srcset
+        versions.content_changed(model)
+    if store_preview:
+        data_uri, color = _stored_preview(name)
+        if data_uri:
+            # update() on the CachedQuerySet retires the cached pages
+            model.objects.filter(pk=pk, image=name, image_placeholder='').update(
+                image_placeholder=data_uri, image_color=color, updated_at=timezone.now()
+            )
+
+
+def _process_quietly(*args):
+    try:
+        process_saved_image(*args)
+    except Exception:
+        # Nothing would report an exception left in the worker's future
+        logger.exception('Could not process the image %s', args[2])
+    finally:
+        connections.close_all()
+
+
+def process_in_background(model, pk, name, store_preview=False):
+    """Queue process_saved_image() on the image worker thread"""
+    global _worker
+    if not getattr(settings, 'IMAGE_PROCESSING_IN_BACKGROUND', True):
+        process_saved_image(model, pk, name, store_preview)
+        return
+    with _worker_lock:
+        if _worker is None:
+            _worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix='image-processing')
+    _worker.submit(_process_quietly, model, pk, name, store_preview)
+
+
+def backfill_placeholders(force=False, workers=None):
+    """
+    Compute previews for every placeholder model row that lacks one (or all
+    rows with `force`) across a process pool. Rows are written through a
+    plain QuerySet, so the cached pages are retired once per model at the end
+    rather than once per row, and the number of rows updated per model is
+    returned.
+    """
+    jobs = []
+    for model in placeholder_models():
+        rows = model.objects.exclude(image='').exclude(image__isnull=True)
+        if not force:
+            rows = rows.filter(image_placeholder='')
+        jobs.extend((model, pk, name) for pk, name in rows.values_list('pk', 'image'))
+
+    connections.close_all()
+    updated = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = pool.map(_stored_preview, [name for _, _, name in jobs])
+        for (model, pk, _), (data_uri, color) in zip(jobs, results):
+            if data_uri:
+                models.QuerySet(model).filter(pk=pk).update(
+                    image_placeholder=data_uri, image_color=color, updated_at=timezone.now()
+                )
+                updated[model] = updated.get(model, 0) + 1
+    for model in updated:
+        versions.content_changed(model)
+    return updated
+
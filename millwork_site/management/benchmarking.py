@@ -0,0 +1,47 @@
+"""
+Shared helpers for the benchmark_* management commands
+"""
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+@contextmanager
+def scratch_database(verbosity=0, on_disk=False):
+    """
+    Run the block against a freshly migrated throwaway database so benchmarks
+    never touch the real data. The database is destroyed afterwards. With
+    `on_disk` it is a file in a temporary directory rather than in memory,
+    for benchmarks that depend on journaling and locking.
+    """
+    old_name = connection.settings_dict['NAME']
+    test_settings = connection.settings_dict['TEST']
+    old_test_name = test_settings['NAME']
+    with tempfile.TemporaryDirectory() as directory:
+        if on_disk:
+            test_settings['NAME'] = os.path.join(directory, 'benchmark.sqlite3')
+        connection.creation.create_test_db(verbosity=verbosity, autoclobber=True, serialize=False)
+        try:
+            yield
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=verbosity)
+            test_settings['NAME'] = old_test_name
+
+
+def measure(func, repeat=20):
+    """
+    Call `func` `repeat` times and return (queries per call, mean ms per call)
+    """
+    with CaptureQueriesContext(connection) as ctx:
+        func()
+    queries = len(ctx.captured_queries)
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    elapsed = (time.perf_counter() - start) / repeat
+    return queries, elapsed * 1000
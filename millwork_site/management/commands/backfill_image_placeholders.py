@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from millwork_site import images
+
+
+class Command(BaseCommand):
+    help = 'Compute the base64 preview and dominant colour of existing project and service images'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Recompute rows that already have a preview')
+        parser.add_argument('--workers', type=int, default=None,
+                            help='Worker processes (defaults to the number of CPUs)')
+
+    def handle(self, *args, **options):
+        updated = images.backfill_placeholders(force=options['force'], workers=options['workers'])
+
+        self.stdout.write(self.style.SUCCESS(f'✓ Placeholders stored for {sum(updated.values())} images'))
+        for model, count in updated.items():
+            self.stdout.write(f'  • {model._meta.verbose_name_plural}: {count}')
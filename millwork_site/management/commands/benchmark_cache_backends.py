@@ -0,0 +1,100 @@
+import multiprocessing
+import random
+import tempfile
+import time
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.utils.module_loading import import_string
+from millwork_site.management.benchmarking import scratch_database
+
+CACHE_TABLE = 'benchmark_cache'
+
+
+def backend_configs(directory):
+    return {
+        'locmem': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'benchmark'},
+        'file': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': f'{directory}/files'},
+        'db': {'BACKEND': 'django.core.cache.backends.db.DatabaseCache', 'LOCATION': CACHE_TABLE},
+        'sqlite': {'BACKEND': 'millwork_site.cache_backends.SQLiteCache', 'LOCATION': f'{directory}/cache.sqlite3'},
+    }
+
+
+def make_backend(config, max_entries):
+    params = {**config, 'OPTIONS': {'MAX_ENTRIES': max_entries}}
+    return import_string(config['BACKEND'])(config['LOCATION'], params)
+
+
+def run_worker(config, options, seed, results):
+    """
+    Cache-aside page loads: get a key, set it on a miss, and bump a shared
+    counter now and then. Reports (operations, hits, reads, increments).
+    """
+    backend = make_backend(config, options['keys'] * 2)
+    rng = random.Random(seed)
+    value = 'x' * options['value_size']
+    operations = hits = reads = increments = 0
+    deadline = time.perf_counter() + options['seconds']
+    while time.perf_counter() < deadline:
+        key = f'page:{rng.randrange(options["keys"])}'
+        reads += 1
+        if backend.get(key) is None:
+            backend.set(key, value, 300)
+            operations += 1
+        else:
+            hits += 1
+        operations += 1
+        if rng.random() < options['incr_ratio']:
+            backend.incr('generation')
+            increments += 1
+            operations += 1
+    results.put((operations, hits, reads, increments))
+
+
+class Command(BaseCommand):
+    help = 'Compare LocMemCache, the file and database caches and SQLiteCache under concurrent worker processes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, nargs='+', default=[1, 4, 8], help='Worker process counts')
+        parser.add_argument('--seconds', type=float, default=3, help='Duration of each run')
+        parser.add_argument('--keys', type=int, default=2000, help='Distinct cache keys')
+        parser.add_argument('--value-size', type=int, default=20000, help='Bytes per cached value')
+        parser.add_argument('--incr-ratio', type=float, default=0.05, help='Share of loads that bump the counter')
+        parser.add_argument('--backends', nargs='+', default=['locmem', 'file', 'db', 'sqlite'])
+
+    def handle(self, *args, **options):
+        header = f'{"backend":>8} {"workers":>8} {"ops/s":>9} {"hit rate":>9} {"counter":>9} {"expected":>9}'
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+        context = multiprocessing.get_context('fork')
+
+        with tempfile.TemporaryDirectory() as directory, scratch_database(on_disk=True):
+            call_command('createcachetable', CACHE_TABLE, verbosity=0)
+            configs = backend_configs(directory)
+            for name in options['backends']:
+                for workers in options['workers']:
+                    backend = make_backend(configs[name], options['keys'] * 2)
+                    backend.clear()
+                    backend.set('generation', 0, None)
+                    # Forked workers must not share the parent's database connection
+                    connections.close_all()
+
+                    results = context.Queue()
+                    processes = [
+                        context.Process(target=run_worker, args=(configs[name], options, seed, results))
+                        for seed in range(workers)
+                    ]
+                    for process in processes:
+                        process.start()
+                    totals = [sum(column) for column in zip(*(results.get() for _ in processes))]
+                    for process in processes:
+                        process.join()
+
+                    operations, hits, reads, increments = totals
+                    # A per-process cache never sees the workers' increments
+                    counter = backend.get('generation')
+                    self.stdout.write(
+                        f'{name:>8} {workers:>8} {operations / options["seconds"]:>9.0f} '
+                        f'{hits / max(reads, 1):>8.1%} {counter:>9} {increments:>9}'
+                    )
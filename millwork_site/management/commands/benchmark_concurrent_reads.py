@@ -0,0 +1,117 @@
+import statistics
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, close_old_connections, connection, connections
+from millwork_site.management.benchmarking import scratch_database
+from millwork_site.models import ContactMessage, Project, Service
+
+# Django's SQLite defaults: rollback journal, full sync, a connection per request
+PROFILES = {
+    'default': {
+        'CONN_MAX_AGE': 0,
+        'OPTIONS': {'init_command': 'PRAGMA journal_mode=DELETE;PRAGMA synchronous=FULL'},
+    },
+    'tuned': {
+        'CONN_MAX_AGE': settings.DATABASES['default'].get('CONN_MAX_AGE', 0),
+        'OPTIONS': settings.DATABASES['default'].get('OPTIONS', {}),
+    },
+}
+
+
+def read_page():
+    """The queries of a services + portfolio page render"""
+    list(Service.objects.filter(is_active=True))
+    list(Project.objects.filter(is_active=True)[:9])
+
+
+def submit_contact_form(n):
+    ContactMessage.objects.create(
+        first_name='Benchmark', last_name=str(n), email='benchmark@example.com', message='Benchmark message'
+    )
+
+
+def run_worker(work, stop, latencies, errors):
+    """Call `work` in a request-like cycle until `stop` is set"""
+    n = 0
+    try:
+        while not stop.is_set():
+            start = time.perf_counter()
+            try:
+                work(n)
+            except OperationalError:
+                errors.append(n)
+            else:
+                latencies.append(time.perf_counter() - start)
+            # What request_finished does: drop the connection unless CONN_MAX_AGE keeps it
+            close_old_connections()
+            n += 1
+    finally:
+        connection.close()
+
+
+class Command(BaseCommand):
+    help = 'Measure page read throughput while contact form submissions are written, per SQLite profile'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=4, help='Concurrent reader threads')
+        parser.add_argument('--writers', type=int, default=1, help='Concurrent contact form writers')
+        parser.add_argument('--seconds', type=float, default=5, help='Duration of each run')
+        parser.add_argument('--profiles', nargs='+', choices=sorted(PROFILES), default=['default', 'tuned'])
+
+    def handle(self, *args, **options):
+        header = (f'{"profile":>8} {"reads/s":>9} {"read p50":>9} {"read p95":>9} {"read max":>9} '
+                  f'{"writes/s":>9} {"write p95":>10} {"errors":>7}')
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+
+        settings_dict = connection.settings_dict
+        original = {key: settings_dict.get(key) for key in ('CONN_MAX_AGE', 'OPTIONS')}
+        with scratch_database(on_disk=True):
+            Service.objects.bulk_create(
+                Service(name=f'Service {n}', description='Benchmark service', order=n) for n in range(20)
+            )
+            Project.objects.bulk_create(
+                Project(title=f'Project {n}', description='Benchmark project', image='projects/benchmark.jpg',
+                        category='aluminium_kitchen', order=n % 5)
+                for n in range(500)
+            )
+            try:
+                for name in options['profiles']:
+                    self.stdout.write(self.format_run(*self.run(name, options)))
+            finally:
+                connections.close_all()
+                settings_dict.update(original)
+
+    def run(self, name, options):
+        # Threads open their own connections from the shared settings dict
+        connections.close_all()
+        connection.settings_dict.update(PROFILES[name])
+        connection.ensure_connection()  # switch the file's journal mode before anyone else connects
+
+        stop = threading.Event()
+        reads, writes, errors = [], [], []
+        threads = [
+            threading.Thread(target=run_worker, args=(lambda n: read_page(), stop, reads, errors))
+            for _ in range(options['readers'])
+        ] + [
+            threading.Thread(target=run_worker, args=(submit_contact_form, stop, writes, errors))
+            for _ in range(options['writers'])
+        ]
+        for thread in threads:
+            thread.start()
+        time.sleep(options['seconds'])
+        stop.set()
+        for thread in threads:
+            thread.join()
+        return name, options['seconds'], reads, writes, errors
+
+    def format_run(self, name, seconds, reads, writes, errors):
+        def percentile(values, q):
+            return statistics.quantiles(values, n=100)[q - 1] * 1000 if len(values) > 1 else 0
+
+        return (f'{name:>8} {len(reads) / seconds:>9.0f} {percentile(reads, 50):>7.2f}ms {percentile(reads, 95):>7.2f}ms '
+                f'{max(reads, default=0) * 1000:>7.2f}ms {len(writes) / seconds:>9.0f} '
+                f'{percentile(writes, 95):>8.2f}ms {len(errors):>7}')
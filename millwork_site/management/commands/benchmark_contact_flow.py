@@ -0,0 +1,68 @@
+import statistics
+import tempfile
+import time
+
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from millwork_site.management.benchmarking import scratch_database
+
+DB_SESSIONS = 'django.contrib.sessions.backends.db'
+# (session engine, message storage)
+PROFILES = {
+    'db session': (DB_SESSIONS, 'django.contrib.messages.storage.session.SessionStorage'),
+    'fallback': (DB_SESSIONS, 'django.contrib.messages.storage.fallback.FallbackStorage'),
+    'cookie': (settings.SESSION_ENGINE, settings.MESSAGE_STORAGE),
+}
+FORM = {
+    'firstName': 'Benchmark', 'lastName': 'Visitor', 'email': 'benchmark@example.com', 'phone': '0',
+    'projectType': 'other', 'budget': '', 'message': 'Benchmark message',
+}
+
+
+class Command(BaseCommand):
+    help = 'Measure the contact form POST -> redirect -> GET round trip per session/message storage'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help='Round trips per profile')
+
+    def handle(self, *args, **options):
+        header = (f'{"profile":>10} {"p50 ms":>8} {"p95 ms":>8} {"queries":>8} '
+                  f'{"besides insert":>15} {"session rows":>13}')
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+
+        with tempfile.TemporaryDirectory() as directory, scratch_database(on_disk=True):
+            caches = {
+                alias: {'BACKEND': 'millwork_site.cache_backends.SQLiteCache', 'LOCATION': f'{directory}/{alias}.sqlite3'}
+                for alias in settings.CACHES
+            }
+            # No replica: the scratch database is the only one with the tables
+            with override_settings(CACHES=caches, DATABASE_ROUTERS=[]):
+                for name, (engine, storage) in PROFILES.items():
+                    with override_settings(SESSION_ENGINE=engine, MESSAGE_STORAGE=storage):
+                        self.stdout.write(self.run(name, options['requests']))
+
+    def run(self, name, requests):
+        Session.objects.all().delete()
+        client = Client()
+        url = reverse('contact')
+        client.post(url, FORM, follow=True)  # warm the singleton and template caches
+
+        timings, queries = [], []
+        for _ in range(requests):
+            with CaptureQueriesContext(connection) as ctx:
+                start = time.perf_counter()
+                response = client.post(url, FORM, follow=True)
+                timings.append(time.perf_counter() - start)
+            assert b'Thank you for your message' in response.content
+            queries.append(len(ctx.captured_queries))
+
+        p50, p95 = (statistics.quantiles(timings, n=100)[q - 1] * 1000 for q in (50, 95))
+        per_trip = statistics.mean(queries)
+        return (f'{name:>10} {p50:>8.2f} {p95:>8.2f} {per_trip:>8.1f} '
+                f'{per_trip - 1:>15.1f} {Session.objects.count():>13}')
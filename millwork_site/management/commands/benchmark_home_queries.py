@@ -0,0 +1,62 @@
+from django.core.management.base import BaseCommand
+from millwork_site.management.benchmarking import scratch_database, measure
+from millwork_site.models import Project
+from millwork_site.queries import top_projects_per_category
+
+
+def per_category_loop(categories, limit):
+    """The original home-page loader: one exists() and one fetch per category"""
+    result = []
+    for category_key, category_name in categories:
+        projects = Project.objects.filter(category=category_key, is_active=True)[:limit]
+        if projects.exists():
+            result.append({'key': category_key, 'name': category_name, 'projects': list(projects)})
+    return result
+
+
+class Command(BaseCommand):
+    help = 'Compare the per-category project loop with the windowed top-N loader'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--categories', type=int, nargs='+', default=[4, 16, 64],
+                            help='Category counts to benchmark')
+        parser.add_argument('--projects', type=int, nargs='+', default=[10, 100, 1000],
+                            help='Projects per category to benchmark')
+        parser.add_argument('--limit', type=int, default=3, help='Projects shown per category')
+        parser.add_argument('--repeat', type=int, default=20, help='Timed calls per measurement')
+
+    def handle(self, *args, **options):
+        limit = options['limit']
+        repeat = options['repeat']
+
+        header = f'{"categories":>10} {"projects":>9} {"loop q":>7} {"loop ms":>9} {"window q":>9} {"window ms":>10}'
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+
+        with scratch_database():
+            for category_count in options['categories']:
+                categories = [(f'category_{i}', f'Category {i}') for i in range(category_count)]
+                for per_category in options['projects']:
+                    Project.objects.all().delete()
+                    Project.objects.bulk_create(
+                        Project(
+                            title=f'Project {c}-{n}',
+                            description='Benchmark project',
+                            image='projects/benchmark.jpg',
+                            category=key,
+                            order=n % 5,
+                        )
+                        for c, (key, _) in enumerate(categories)
+                        for n in range(per_category)
+                    )
+
+                    loop_q, loop_ms = measure(lambda: per_category_loop(categories, limit), repeat)
+                    window_q, window_ms = measure(
+                        lambda: top_projects_per_category(limit=limit, categories=categories), repeat
+                    )
+                    self.stdout.write(
+                        f'{category_count:>10} {per_category:>9} {loop_q:>7} {loop_ms:>9.2f} '
+                        f'{window_q:>9} {window_ms:>10.2f}'
+                    )
+
+        self.stdout.write(self.style.SUCCESS('✓ Benchmark complete'))
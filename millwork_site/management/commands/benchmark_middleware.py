@@ -0,0 +1,90 @@
+import time
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext, override_settings
+from millwork_site.management.benchmarking import scratch_database
+
+FAST_PATH = 'millwork_site.middleware.AnonymousFastPathMiddleware'
+
+
+def full_stack():
+    """settings.MIDDLEWARE as it was before the fast path"""
+    middleware = []
+    for name in settings.MIDDLEWARE:
+        if name == 'django.middleware.locale.LocaleMiddleware':
+            middleware += ['django.contrib.sessions.middleware.SessionMiddleware', name]
+        elif name == FAST_PATH:
+            middleware += [
+                'django.contrib.auth.middleware.AuthenticationMiddleware',
+                'django.contrib.messages.middleware.MessageMiddleware',
+            ]
+        else:
+            middleware.append(name)
+    return middleware
+
+
+class Command(BaseCommand):
+    help = 'Measure the per-request overhead of the middleware stack on cached anonymous page views'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000, help='Requests per page and profile')
+        parser.add_argument('--rounds', type=int, default=5, help='Alternating rounds; the fastest is kept')
+        parser.add_argument('--paths', nargs='+', default=['/', '/about/', '/contact/', '/ar/services/'])
+
+    def handle(self, *args, **options):
+        header = f'{"path":>14} {"full stack µs":>14} {"fast path µs":>13} {"saved":>7} {"queries":>8}'
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+
+        # A per-process cache and no replica, so the numbers are middleware cost
+        overrides = {
+            'CACHES': {
+                'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+                # SESSION_CACHE_ALIAS, used by the full stack
+                'sessions': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'sessions'},
+            },
+            'DATABASE_ROUTERS': [],
+        }
+        with scratch_database(), override_settings(**overrides):
+            handlers = {}
+            for name, middleware in (('full', full_stack()), ('fast', settings.MIDDLEWARE)):
+                with override_settings(MIDDLEWARE=middleware):
+                    handlers[name] = WSGIHandler()
+
+            for path in options['paths']:
+                environ = RequestFactory().get(path).environ
+                queries = {}
+                for name, handler in handlers.items():
+                    self.call(handler, environ)  # fill the page cache
+                    with CaptureQueriesContext(connection) as ctx:
+                        status = self.call(handler, environ)
+                    # Timing error pages would measure nothing useful
+                    if status != '200 OK':
+                        raise CommandError(f'{path} returned {status} with the {name} stack')
+                    queries[name] = len(ctx.captured_queries)
+
+                best = {name: float('inf') for name in handlers}
+                for _ in range(options['rounds']):
+                    for name, handler in handlers.items():
+                        start = time.perf_counter()
+                        for _ in range(options['requests']):
+                            self.call(handler, environ)
+                        best[name] = min(best[name], (time.perf_counter() - start) / options['requests'])
+
+                full, fast = best['full'] * 1_000_000, best['fast'] * 1_000_000
+                self.stdout.write(
+                    f'{path:>14} {full:>14.0f} {fast:>13.0f} {1 - fast / full:>6.0%} '
+                    f'{queries["full"]:>3} → {queries["fast"]}'
+                )
+
+    @staticmethod
+    def call(handler, environ):
+        """Run one request through `handler` and return its status line"""
+        statuses = []
+        response = handler(dict(environ), lambda status, headers: statuses.append(status))
+        response.close()
+        return statuses[0]
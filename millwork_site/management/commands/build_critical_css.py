@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from millwork_site import critical_css
+
+
+class Command(BaseCommand):
+    help = 'Extract the above-the-fold CSS of every page template'
+
+    def handle(self, *args, **options):
+        for template_name in critical_css.page_templates():
+            css = critical_css.build(template_name)
+            self.stdout.write(f'  • {template_name}: {len(css.encode()) / 1024:.1f} KB')
+        self.stdout.write(self.style.SUCCESS(f'✓ Critical CSS written to {critical_css.critical_root()}'))
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from millwork_site import images
+
+
+class Command(BaseCommand):
+    help = 'Regenerate the responsive JPEG/WebP derivatives of every uploaded image'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=None,
+                            help='Worker processes (defaults to the number of CPUs)')
+
+    def handle(self, *args, **options):
+        done = failed = 0
+        for name, widths, error in images.regenerate_all(workers=options['workers']):
+            if error is None:
+                done += 1
+                self.stdout.write(f'  • {name}: {", ".join(f"{w}w" for w in widths) or "kept original size"}')
+            else:
+                failed += 1
+                self.stdout.write(self.style.WARNING(f'  • {name}: {error}'))
+
+        self.stdout.write(self.style.SUCCESS(f'✓ Derivatives built for {done} images'))
+        if failed:
+            self.stdout.write(self.style.WARNING(f'{failed} images could not be read'))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from millwork_site import sitemap
+
+
+class Command(BaseCommand):
+    help = 'Pre-generate the XML sitemap (and gzipped copy) for a site URL'
+
+    def add_arguments(self, parser):
+        parser.add_argument('base_url', nargs='?', help='Public site root (defaults to SITE_URL)')
+
+    def handle(self, *args, **options):
+        base_url = (options['base_url'] or sitemap.site_url()).rstrip('/') + '/'
+        directory = sitemap.get_directory(base_url)
+        files = sorted(path.name for path in directory.iterdir())
+        self.stdout.write(self.style.SUCCESS(f'✓ Sitemap for {base_url} written to {directory}'))
+        for name in files:
+            self.stdout.write(f'  • {name}')
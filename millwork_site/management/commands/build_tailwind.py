@@ -0,0 +1,27 @@
+import re
+
+from django.core.management.base import BaseCommand
+from millwork_site import tailwind
+
+
+class Command(BaseCommand):
+    help = 'Compile the Tailwind utilities used by the templates into a hashed static stylesheet'
+
+    def handle(self, *args, **options):
+        path, compiled, unknown = tailwind.build()
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ {len(compiled)} utilities written to {path} ({path.stat().st_size / 1024:.1f} KB)'
+        ))
+
+        # Our own stylesheets define the rest; anything else is probably a typo
+        defined = set()
+        for stylesheet in tailwind.stylesheet_dir().glob('*.css'):
+            defined.update(re.findall(r'\.(-?[a-zA-Z_][\w-]*)', stylesheet.read_text(encoding='utf-8')))
+        for template in tailwind.template_files():
+            for style in re.findall(r'<style>(.*?)</style>', template.read_text(encoding='utf-8'), re.S):
+                defined.update(re.findall(r'\.(-?[a-zA-Z_][\w-]*)', style))
+        missing = sorted(name for name in unknown if name not in defined and name != 'group')
+        if missing:
+            self.stdout.write(self.style.WARNING('Classes with no matching rule:'))
+            for name in missing:
+                self.stdout.write(f'  • {name}')
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand, CommandError
+from millwork_site import vendor
+
+
+class Command(BaseCommand):
+    help = 'Subset the web fonts to the characters the site uses and vendor Alpine.js into static/'
+
+    def handle(self, *args, **options):
+        try:
+            result = vendor.build()
+        except (RuntimeError, OSError) as exc:
+            raise CommandError(exc)
+
+        written = set()
+        for face in result['faces']:
+            if face['file'] not in written:
+                written.add(face['file'])
+                self.stdout.write(f"  • {face['file']}: {face['size'] / 1024:.1f} KB ({face['weight']})")
+        self.stdout.write(f"  • {result['scripts']['alpine']}")
+        self.stdout.write(self.style.SUCCESS(f'✓ Manifest written to {vendor.static_root() / vendor.MANIFEST_NAME}'))
+        self.stdout.write('  Run again after adding Arabic content that uses new characters.')
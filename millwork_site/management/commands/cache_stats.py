@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand
+from millwork_site.fragments import fragment_stats, reset_fragment_stats
+from millwork_site.page_cache import page_cache_stats, reset_page_cache_stats
+from millwork_site.query_cache import query_cache_stats, reset_query_cache_stats
+
+
+class Command(BaseCommand):
+    help = 'Show hit/miss counters for the site caches, as last flushed by the workers'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Reset the counters after printing them')
+
+    def handle(self, *args, **options):
+        stats = page_cache_stats()
+        lookups = stats['hits'] + stats['misses']
+        ratio = stats['hits'] / lookups if lookups else 0
+
+        self.stdout.write(self.style.WARNING('Page cache:'))
+        self.stdout.write(f'  • Hits: {stats["hits"]}')
+        self.stdout.write(f'  • Misses: {stats["misses"]}')
+        self.stdout.write(f'  • Stale copies served: {stats["stale"]}')
+        self.stdout.write(f'  • Bypasses: {stats["bypasses"]}')
+        self.stdout.write(f'  • Hit ratio: {ratio:.1%}')
+
+        self.stdout.write(self.style.WARNING('Fragment cache:'))
+        for name, counts in fragment_stats().items():
+            lookups = counts['hits'] + counts['misses']
+            ratio = counts['hits'] / lookups if lookups else 0
+            self.stdout.write(
+                f'  • {name}: {counts["hits"]} hits, {counts["misses"]} misses '
+                f'({ratio:.1%}), {counts["stale"]} stale, {counts["saved_ms"]:.1f} ms of rendering saved'
+            )
+
+        self.stdout.write(self.style.WARNING('Queryset cache:'))
+        for label, counts in query_cache_stats().items():
+            lookups = counts['hits'] + counts['misses']
+            ratio = counts['hits'] / lookups if lookups else 0
+            self.stdout.write(
+                f'  • {label}: {counts["hits"]} hits, {counts["misses"]} misses ({ratio:.1%}), '
+                f'{counts["entries"]} entries, {counts["bytes"] / 1024:.1f} KB cached'
+            )
+
+        if options['reset']:
+            reset_page_cache_stats()
+            reset_fragment_stats()
+            reset_query_cache_stats()
+            self.stdout.write(self.style.SUCCESS('✓ Counters reset'))
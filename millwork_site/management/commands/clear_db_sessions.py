@@ -0,0 +1,25 @@
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    help = 'Delete the rows left in django_session now that sessions are kept in the cache'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--expired-only', action='store_true', help='Keep sessions that have not expired yet')
+        parser.add_argument('--vacuum', action='store_true', help='Give the freed pages back to the filesystem')
+
+    def handle(self, *args, **options):
+        sessions = Session.objects.all()
+        if options['expired_only']:
+            sessions = sessions.filter(expire_date__lt=timezone.now())
+        deleted, _ = sessions.delete()
+        self.stdout.write(self.style.SUCCESS(f'✓ Deleted {deleted} session rows'))
+        self.stdout.write(f'  • Remaining: {Session.objects.count()}')
+
+        if options['vacuum']:
+            with connection.cursor() as cursor:
+                cursor.execute('VACUUM')
+            self.stdout.write('  • Database vacuumed')
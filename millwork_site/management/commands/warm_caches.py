@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand
+from millwork_site import warmup
+
+
+class Command(BaseCommand):
+    help = 'Render every public URL in every language so the site caches start warm'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', help='Public site root the requests are made as (default: WARM_CACHES_BASE_URL)')
+        parser.add_argument('--workers', type=int, default=4, help='Concurrent requests')
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        results = warmup.warm(workers=options['workers'], url=options['url'])
+        elapsed = time.perf_counter() - start
+
+        for path, status, seconds in sorted(results, key=lambda result: -result[2]):
+            line = f'  • {seconds * 1000:>8.1f} ms  {path}'
+            self.stdout.write(line if status == 200 else self.style.ERROR(f'{line} ({status})'))
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ Warmed {len(results)} URLs in {elapsed:.1f}s with {options["workers"]} workers'
+        ))
@@ -0,0 +1,159 @@
+"""
+Site middleware
+"""
+import mimetypes
+import re
+from functools import lru_cache
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.messages.middleware import MessageMiddleware
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import FileResponse, HttpResponseNotModified
+from django.urls import Resolver404, resolve
+from django.utils import translation
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+from . import page_cache, routers
+
+# ManifestStaticFilesStorage puts a 12 character content hash before the extension
+HASHED_NAME = re.compile(r'\.[0-9a-f]{12}\.\w+$')
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+def accepts_encoding(request, coding):
+    """Whether the request's Accept-Encoding allows `coding`; q=0 refuses it"""
+    qualities = {}
+    for token in request.META.get('HTTP_ACCEPT_ENCODING', '').split(','):
+        name, *params = token.split(';')
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition('=')
+            if key.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[name.strip().lower()] = quality
+    return qualities.get(coding, qualities.get('*', 0.0)) > 0
+
+
+class PrecompressedStaticMiddleware:
+    """
+    Serve files from STATIC_ROOT, sending the .br or .gz copy written by
+    collectstatic when the client accepts it. Hashed names are cached for a
+    year; anything else must be revalidated.
+
+    Not used with DEBUG on, where runserver serves the files through the
+    staticfiles finders and STATIC_ROOT would hand out a stale collectstatic.
+    """
+
+    def __init__(self, get_response):
+        if settings.DEBUG:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        prefix = '/' + settings.STATIC_URL.lstrip('/')
+        if request.method in ('GET', 'HEAD') and request.path_info.startswith(prefix):
+            response = self.serve(request, request.path_info[len(prefix):])
+            if response is not None:
+                return response
+        return self.get_response(request)
+
+    def serve(self, request, name):
+        root = Path(settings.STATIC_ROOT).resolve()
+        path = (root / name).resolve()
+        if root not in path.parents or not path.is_file():
+            return None
+
+        served, encoding, variants = path, None, False
+        for candidate, suffix in ENCODINGS:
+            compressed = path.with_name(path.name + suffix)
+            if compressed.is_file():
+                variants = True
+                if encoding is None and accepts_encoding(request, candidate):
+                    served, encoding = compressed, candidate
+
+        mtime = served.stat().st_mtime
+        if not was_modified_since(request.META.get('HTTP_IF_MODIFIED_SINCE'), mtime):
+            response = HttpResponseNotModified()
+        else:
+            content_type = mimetypes.guess_type(path.name)[0] or 'application/octet-stream'
+            response = FileResponse(open(served, 'rb'), content_type=content_type)
+            response['Last-Modified'] = http_date(mtime)
+            if encoding:
+                response['Content-Encoding'] = encoding
+        if variants:
+            patch_vary_headers(response, ['Accept-Encoding'])
+        if HASHED_NAME.search(path.name):
+            patch_cache_control(response, public=True, max_age=31536000, immutable=True)
+        else:
+            patch_cache_control(response, no_cache=True)
+        return response
+
+
+class ReplicaReadsMiddleware:
+    """
+    Let the public views read from the replica database (see routers.py).
+    Requests for anything else keep using the primary.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with routers.request_scope():
+            return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if view_func.__module__ == routers.PUBLIC_VIEWS_MODULE:
+            routers.use_replica()
+
+
+class AnonymousFastPathMiddleware:
+    """
+    SessionMiddleware, AuthenticationMiddleware and MessageMiddleware in
+    one, skipped for anonymous GET/HEAD requests to the public views.
+
+    Those requests carry no session or message cookie, so all the three
+    would do is build lazy objects and add `Vary: Cookie`. Instead they get
+    an AnonymousUser and an empty cookie message store, and request.session
+    is not set at all, so nothing can reach the session store or the user
+    table. Everything else, the admin and form posts included, goes through
+    the three middleware as usual. Must come after LocaleMiddleware, which
+    the i18n URL patterns need to resolve the path.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.full_stack = SessionMiddleware(AuthenticationMiddleware(MessageMiddleware(get_response)))
+
+    def __call__(self, request):
+        if not self.is_fast_path(request):
+            return self.full_stack(request)
+        request.user = AnonymousUser()
+        request._messages = CookieStorage(request)
+        return self.get_response(request)
+
+    def is_fast_path(self, request):
+        return page_cache.is_cacheable_request(request) and _is_public_path(
+            request.path_info, translation.get_language(), getattr(request, 'urlconf', None) or settings.ROOT_URLCONF
+        )
+
+
+@lru_cache(maxsize=2048)
+def _is_public_path(path, language, urlconf):
+    # The handler resolves the path again later; memoising keeps the fast
+    # path from paying for it twice. `language` selects the i18n prefix.
+    try:
+        match = resolve(path, urlconf)
+    except Resolver404:
+        return False
+    return match.func.__module__ == routers.PUBLIC_VIEWS_MODULE
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.6 on 2026-10-18 09:52
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('millwork_site', '0006_alter_project_category'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='project',
+            options={'ordering': ['order', '-created_at', 'id']},
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.6 on 2026-10-18 10:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('millwork_site', '0008_updated_at_timestamps'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='project',
+            name='image_color',
+            field=models.CharField(blank=True, editable=False, help_text='Dominant colour of the image (#rrggbb)', max_length=7),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='image_placeholder',
+            field=models.TextField(blank=True, editable=False, help_text='Tiny base64 preview shown while the image loads'),
+        ),
+        migrations.AddField(
+            model_name='projectimage',
+            name='image_color',
+            field=models.CharField(blank=True, editable=False, help_text='Dominant colour of the image (#rrggbb)', max_length=7),
+        ),
+        migrations.AddField(
+            model_name='projectimage',
+            name='image_placeholder',
+            field=models.TextField(blank=True, editable=False, help_text='Tiny base64 preview shown while the image loads'),
+        ),
+        migrations.AddField(
+            model_name='service',
+            name='image_color',
+            field=models.CharField(blank=True, editable=False, help_text='Dominant colour of the image (#rrggbb)', max_length=7),
+        ),
+        migrations.AddField(
+            model_name='service',
+            name='image_placeholder',
+            field=models.TextField(blank=True, editable=False, help_text='Tiny base64 preview shown while the image loads'),
+        ),
+    ]
@@ -2,6 +2,8 @@ from django.db import models
 from django.utils import timezone
 from django.utils.text import slugify
 
+from .query_cache import CachedQuerySet
+
 class Service(models.Model):
     """Model for services offered by the company"""
     name = models.CharField(max_length=100)
@@ -9,14 +11,23 @@ class Service(models.Model):
     description = models.TextField()
     description_arabic = models.TextField(blank=True)
     image = models.ImageField(upload_to='services/', blank=True, null=True)
+    image_placeholder = models.TextField(blank=True, editable=False, help_text="Tiny base64 preview shown while the image loads")
+    image_color = models.CharField(max_length=7, blank=True, editable=False, help_text="Dominant colour of the image (#rrggbb)")
     icon = models.CharField(max_length=50, blank=True, help_text="Icon class name (e.g., 'fas fa-window')")
     is_active = models.BooleanField(default=True)
     order = models.PositiveIntegerField(default=0, help_text="Order for display")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = CachedQuerySet.as_manager()
+
     class Meta:
         ordering = ['order', 'name']
+        # Partial: SQLite compares filter(is_active=True), written as a bare
+        # `WHERE "is_active"`, with an index's WHERE, never with its columns
+        indexes = [
+            models.Index(fields=['order', 'name'], condition=models.Q(is_active=True), name='service_active_order_idx'),
+        ]
 
     def __str__(self):
         return self.name
@@ -35,6 +46,8 @@ class Project(models.Model):
     description = models.TextField()
     description_arabic = models.TextField(blank=True)
     image = models.ImageField(upload_to='projects/', help_text="Main display image")
+    image_placeholder = models.TextField(blank=True, editable=False, help_text="Tiny base64 preview shown while the image loads")
+    image_color = models.CharField(max_length=7, blank=True, editable=False, help_text="Dominant colour of the image (#rrggbb)")
     category = models.CharField(max_length=50, choices=CATEGORY_CHOICES)
     is_featured = models.BooleanField(default=False)
     is_active = models.BooleanField(default=True)
@@ -42,8 +55,17 @@ class Project(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = CachedQuerySet.as_manager()
+
     class Meta:
-        ordering = ['order', '-created_at']
+        # `id` breaks ties so every project has a unique position (keyset pagination)
+        ordering = ['order', '-created_at', 'id']
+        # One per public filter, each in the model ordering so no query sorts
+        indexes = [
+            models.Index(fields=['order', '-created_at'], condition=models.Q(is_active=True), name='project_active_order_idx'),
+            models.Index(fields=['category', 'order', '-created_at'], condition=models.Q(is_active=True), name='project_category_order_idx'),
+            models.Index(fields=['order', '-created_at'], condition=models.Q(is_active=True, is_featured=True), name='project_featured_order_idx'),
+        ]
 
     def __str__(self):
         return self.title
@@ -52,13 +74,22 @@ class ProjectImage(models.Model):
     """Model for additional project images (for slider)"""
     project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='additional_images')
     image = models.ImageField(upload_to='projects/gallery/')
+    image_placeholder = models.TextField(blank=True, editable=False, help_text="Tiny base64 preview shown while the image loads")
+    image_color = models.CharField(max_length=7, blank=True, editable=False, help_text="Dominant colour of the image (#rrggbb)")
     caption = models.CharField(max_length=200, blank=True)
     caption_arabic = models.CharField(max_length=200, blank=True)
     order = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = CachedQuerySet.as_manager()
 
     class Meta:
         ordering = ['order', 'created_at']
+        # The gallery prefetch orders by project first, see queries.with_gallery
+        indexes = [
+            models.Index(fields=['project', 'order', 'created_at'], name='projectimage_gallery_idx'),
+        ]
         verbose_name = "Project Image"
         verbose_name_plural = "Project Images"
 
@@ -77,9 +108,15 @@ class TeamMember(models.Model):
     is_active = models.BooleanField(default=True)
     order = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = CachedQuerySet.as_manager()
 
     class Meta:
         ordering = ['order', 'name']
+        indexes = [
+            models.Index(fields=['order', 'name'], condition=models.Q(is_active=True), name='team_active_order_idx'),
+        ]
 
     def __str__(self):
         return self.name
@@ -137,9 +174,15 @@ class Testimonial(models.Model):
     is_active = models.BooleanField(default=True)
     order = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = CachedQuerySet.as_manager()
 
     class Meta:
         ordering = ['order', '-created_at']
+        indexes = [
+            models.Index(fields=['order', '-created_at'], condition=models.Q(is_active=True), name='testimonial_active_order_idx'),
+        ]
 
     def __str__(self):
         return f"{self.customer_name} - {self.company}"
@@ -166,6 +209,13 @@ class ContactMessage(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        # The admin list (which adds -pk to the ordering), unfiltered and
+        # filtered by status, and its project type filter choices
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='contact_created_idx'),
+            models.Index(fields=['status', '-created_at', '-id'], name='contact_status_created_idx'),
+            models.Index(fields=['project_type'], name='contact_project_type_idx'),
+        ]
 
     def __str__(self):
         return f"{self.first_name} {self.last_name} - {self.project_type}"
@@ -235,8 +285,13 @@ class WhyChooseUsItem(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = CachedQuerySet.as_manager()
+
     class Meta:
         ordering = ['order', 'title']
+        indexes = [
+            models.Index(fields=['order', 'title'], condition=models.Q(is_active=True), name='whychooseus_active_order_idx'),
+        ]
         verbose_name = "Why Choose Us Item"
         verbose_name_plural = "Why Choose Us Items"
 
@@ -255,8 +310,13 @@ class Certification(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = CachedQuerySet.as_manager()
+
     class Meta:
         ordering = ['order', 'name']
+        indexes = [
+            models.Index(fields=['order', 'name'], condition=models.Q(is_active=True), name='cert_active_order_idx'),
+        ]
         verbose_name = "Certification"
         verbose_name_plural = "Certifications"
 
@@ -281,8 +341,13 @@ class FAQ(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = CachedQuerySet.as_manager()
+
     class Meta:
         ordering = ['order', 'created_at']
+        indexes = [
+            models.Index(fields=['order', 'created_at'], condition=models.Q(is_active=True), name='faq_active_order_idx'),
+        ]
         verbose_name = "FAQ"
         verbose_name_plural = "FAQs"
 
@@ -0,0 +1,140 @@
+"""
+Full-page response cache for the public views.
+
+Anonymous GET/HEAD requests are answered from the cache without running the
+view. Keys combine the host, path, query string and active language with a
+global content generation counter that signals.py bumps whenever site
+content is saved or deleted, so a single admin edit retires every cached
+page at once without having to enumerate keys.
+
+Misses are rebuilt through millwork_site.regeneration: one request renders
+the page while concurrent ones get the last good copy, which is also served
+when the database is locked or down.
+"""
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.core.cache import cache
+from django.utils import translation
+
+from . import regeneration, stats
+
+CONTENT_GENERATION_KEY = 'content:generation'
+STATS_KEY_PREFIX = 'page_cache:stats:'
+STATS = ('hits', 'misses', 'stale', 'bypasses')
+
+
+def content_generation():
+    """Return the current content generation number"""
+    generation = cache.get(CONTENT_GENERATION_KEY)
+    if generation is None:
+        # Seed from the clock so an evicted counter never reuses old numbers
+        cache.add(CONTENT_GENERATION_KEY, time.time_ns(), None)
+        generation = cache.get(CONTENT_GENERATION_KEY)
+    return generation
+
+
+def bump_content_generation():
+    """Retire every cached page by moving to a new content generation"""
+    try:
+        return cache.incr(CONTENT_GENERATION_KEY)
+    except ValueError:
+        cache.add(CONTENT_GENERATION_KEY, time.time_ns(), None)
+        return cache.get(CONTENT_GENERATION_KEY)
+
+
+def is_anonymous_request(request):
+    """
+    True when the request carries no session or flash-message cookie, i.e.
+    it cannot belong to a logged-in user or have per-visitor content.
+    """
+    return (
+        settings.SESSION_COOKIE_NAME not in request.COOKIES
+        and CookieStorage.cookie_name not in request.COOKIES
+    )
+
+
+def is_cacheable_request(request):
+    return request.method in ('GET', 'HEAD') and is_anonymous_request(request)
+
+
+def is_cacheable_response(response, request=None):
+    """
+    Only plain 200 responses that set no cookies are shared between
+    visitors. A page that used a CSRF token counts as setting one:
+    CsrfViewMiddleware only adds the cookie after the view returns.
+    """
+    return (
+        response.status_code == 200
+        and not response.streaming
+        and not response.cookies
+        and not (request is not None and request.META.get('CSRF_COOKIE_NEEDS_UPDATE'))
+        and 'private' not in response.get('Cache-Control', '')
+    )
+
+
+def _location_digest(request):
+    location = f'{request.get_host()}{request.get_full_path()}'
+    return hashlib.md5(location.encode()).hexdigest()
+
+
+def page_cache_key(request, generation=None):
+    if generation is None:
+        generation = content_generation()
+    return f'page:{generation}:{translation.get_language()}:{_location_digest(request)}'
+
+
+def stale_page_key(request):
+    """Key of the last good copy of the page, whatever its generation"""
+    return f'page:last:{translation.get_language()}:{_location_digest(request)}'
+
+
+def served_stale(request):
+    """True when the page cache answered `request` with a previous copy of the page"""
+    return getattr(request, '_served_stale_page', False)
+
+
+def _record(stat):
+    stats.increment(STATS_KEY_PREFIX + stat)
+
+
+def page_cache_stats():
+    """Return the hit, miss, stale and bypass counters since the last reset"""
+    values = stats.read([STATS_KEY_PREFIX + stat for stat in STATS])
+    return {stat: values[STATS_KEY_PREFIX + stat] for stat in STATS}
+
+
+def reset_page_cache_stats():
+    stats.reset([STATS_KEY_PREFIX + stat for stat in STATS])
+
+
+def cache_public_page(view_func):
+    """
+    Serve anonymous GET/HEAD requests for `view_func` from the page cache.
+    Everything else (POSTs, visitors with a session or pending messages)
+    bypasses the cache and runs the view normally. While a miss is being
+    rebuilt, other requests for the page get its previous copy.
+    """
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        if not is_cacheable_request(request):
+            _record('bypasses')
+            return view_func(request, *args, **kwargs)
+
+        key = page_cache_key(request)
+        response = cache.get(key)
+        if response is not None:
+            _record('hits')
+            return response
+
+        response, outcome = regeneration.regenerate(
+            key, stale_page_key(request), lambda: view_func(request, *args, **kwargs),
+            getattr(settings, 'PAGE_CACHE_TIMEOUT', 600), lambda response: is_cacheable_response(response, request),
+        )
+        _record({regeneration.BUILT: 'misses', regeneration.STALE: 'stale', regeneration.WAITED: 'hits'}[outcome])
+        request._served_stale_page = outcome == regeneration.STALE
+        return response
+    return wrapper
@@ -0,0 +1,126 @@
+"""
+Keyset (seek) pagination.
+
+Instead of COUNT(*) plus OFFSET, each page is fetched with a WHERE clause on
+the ordering columns of the last row seen, so page 500 costs the same as page
+1. Positions are passed around as signed, opaque cursors.
+"""
+from django.core import signing
+from django.db.models import Q
+
+
+class KeysetPage:
+    """A single page of results, iterable like django.core.paginator.Page"""
+
+    def __init__(self, object_list, has_next, has_previous, paginator):
+        self.object_list = object_list
+        self.has_next = has_next
+        self.has_previous = has_previous
+        self.paginator = paginator
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_other_pages(self):
+        return self.has_next or self.has_previous
+
+    @property
+    def next_cursor(self):
+        if self.has_next:
+            return self.paginator.encode_cursor(self.object_list[-1])
+        return None
+
+    @property
+    def previous_cursor(self):
+        if self.has_previous:
+            return self.paginator.encode_cursor(self.object_list[0])
+        return None
+
+
+class KeysetPaginator:
+    """
+    Paginate `queryset` by the fields in `ordering` (e.g. ('order',
+    '-created_at', 'id')). The last field must be unique so every row has a
+    distinct position.
+    """
+    salt = 'millwork_site.pagination'
+
+    def __init__(self, queryset, per_page, ordering):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.ordering = tuple(ordering)
+        self.fields = [name.lstrip('-') for name in self.ordering]
+
+    def encode_cursor(self, obj):
+        values = [getattr(obj, name) for name in self.fields]
+        # Untimestamped, so a page's "next" link - part of the page cache key
+        # of the page it leads to - is the same on every render
+        return signing.Signer(salt=self.salt).sign_object([
+            value.isoformat() if hasattr(value, 'isoformat') else value
+            for value in values
+        ])
+
+    def decode_cursor(self, cursor):
+        """Return the ordering values stored in `cursor`, or None if it is invalid"""
+        try:
+            values = signing.Signer(salt=self.salt).unsign_object(cursor)
+        except signing.BadSignature:
+            return None
+        if not isinstance(values, list) or len(values) != len(self.fields):
+            return None
+        model = self.queryset.model
+        try:
+            return [
+                model._meta.get_field(name).to_python(value)
+                for name, value in zip(self.fields, values)
+            ]
+        except Exception:
+            return None
+
+    def _seek(self, values, forward):
+        """Q object matching rows strictly after (or before) `values`"""
+        condition = Q()
+        for i, name in enumerate(self.ordering):
+            field = name.lstrip('-')
+            descending = name.startswith('-')
+            lookup = 'lt' if descending == forward else 'gt'
+            step = Q(**{f'{field}__{lookup}': values[i]})
+            for prev_field, prev_value in zip(self.fields[:i], values[:i]):
+                step &= Q(**{prev_field: prev_value})
+            condition |= step
+        return condition
+
+    def get_page(self, after=None, before=None):
+        """
+        Return the page following the `after` cursor, or preceding the
+        `before` cursor. Without a (valid) cursor the first page is returned.
+        """
+        if before:
+            values = self.decode_cursor(before)
+            if values is not None:
+                reverse_ordering = [
+                    name[1:] if name.startswith('-') else f'-{name}'
+                    for name in self.ordering
+                ]
+                rows = list(
+                    self.queryset.filter(self._seek(values, forward=False))
+                    .order_by(*reverse_ordering)[:self.per_page + 1]
+                )
+                has_previous = len(rows) > self.per_page
+                rows = rows[:self.per_page][::-1]
+                return KeysetPage(rows, has_next=True, has_previous=has_previous, paginator=self)
+
+        queryset = self.queryset.order_by(*self.ordering)
+        values = self.decode_cursor(after) if after else None
+        if values is not None:
+            queryset = queryset.filter(self._seek(values, forward=True))
+        rows = list(queryset[:self.per_page + 1])
+        return KeysetPage(
+            rows[:self.per_page],
+            has_next=len(rows) > self.per_page,
+            has_previous=values is not None,
+            paginator=self,
+        )
@@ -0,0 +1,86 @@
+"""
+Reusable query helpers for loading grouped site content in one round trip
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F, Prefetch, Window
+from django.db.models.functions import RowNumber
+from django.utils import translation
+
+from .models import Project, ProjectImage
+from .page_cache import content_generation
+
+
+def for_language(queryset):
+    """
+    Skip loading the `*_arabic` columns of `queryset` unless the active
+    language is Arabic; English pages never render them.
+    """
+    if translation.get_language() == 'ar':
+        return queryset
+    arabic = [
+        field.attname for field in queryset.model._meta.concrete_fields
+        if field.name.endswith('_arabic')
+    ]
+    return queryset.defer(*arabic) if arabic else queryset
+
+
+def with_gallery(queryset):
+    """
+    Prefetch the ProjectImage gallery of every project in `queryset` so
+    templates can count and loop over `additional_images.all` without
+    issuing a query per project. Ordering by project first lets the
+    `project IN (...)` lookup walk projectimage_gallery_idx without a sort.
+    """
+    images = ProjectImage.objects.order_by('project_id', *ProjectImage._meta.ordering)
+    return queryset.prefetch_related(Prefetch('additional_images', queryset=for_language(images)))
+
+
+def top_projects_per_category(limit=3, queryset=None, categories=None):
+    """
+    Return the first `limit` projects of every category as a list of
+    {'key', 'name', 'projects'} dicts, in the order of `categories`
+    (Project.CATEGORY_CHOICES by default). Categories without projects are
+    skipped. All categories are loaded with a single windowed query.
+    """
+    if queryset is None:
+        queryset = Project.objects.filter(is_active=True)
+    if categories is None:
+        categories = Project.CATEGORY_CHOICES
+
+    ordering = list(queryset.query.order_by or Project._meta.ordering)
+    ranked = queryset.filter(
+        category__in=[key for key, _ in categories]
+    ).annotate(
+        category_rank=Window(
+            expression=RowNumber(),
+            partition_by=F('category'),
+            order_by=ordering,
+        )
+    ).filter(category_rank__lte=limit).order_by(*ordering)
+
+    grouped = {}
+    for project in ranked:
+        grouped.setdefault(project.category, []).append(project)
+
+    return [
+        {'key': key, 'name': name, 'projects': grouped[key]}
+        for key, name in categories
+        if key in grouped
+    ]
+
+
+def active_project_count(category=None):
+    """
+    Number of active projects (optionally in one category), cached until the
+    next content change so paginated pages never run COUNT(*) themselves.
+    """
+    key = f'project_count:{content_generation()}:{category or "all"}'
+    count = cache.get(key)
+    if count is None:
+        queryset = Project.objects.filter(is_active=True)
+        if category:
+            queryset = queryset.filter(category=category)
+        count = queryset.count()
+        cache.set(key, count, getattr(settings, 'PAGE_CACHE_TIMEOUT', 600))
+    return count
@@ -0,0 +1,185 @@
+"""
+Opt-in result cache for the querysets of the public pages.
+
+Models whose manager is built from CachedQuerySet get a `.cached()` method:
+
+    Service.objects.filter(is_active=True).cached()
+
+When such a queryset is evaluated, its rows (with anything prefetched onto
+them) are stored under a key made of the compiled SQL and the table
+versions of every table it reads: the tables named in the SQL and those of
+its prefetch_related lookups. Any save or delete bumps its table's version
+(signals.py), and so do update(), bulk_create() and bulk_update() on these
+querysets, once their transaction commits. A write retires exactly the
+entries that read the table - a ProjectImage edit retires the Project
+querysets with galleries, while the services stay cached.
+
+Hits, misses and the bytes each model has in the cache are reported by
+`manage.py cache_stats`.
+"""
+import hashlib
+import pickle
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet, FieldDoesNotExist
+from django.db import connections, models, transaction
+from django.db.models.constants import LOOKUP_SEP
+
+from . import stats, versions
+
+STATS_KEY_PREFIX = 'queryset_cache:stats:'
+SIZES_KEY_PREFIX = 'queryset_cache:sizes:'
+# Entries remembered per model for the footprint report
+SIZES_LIMIT = 500
+
+
+def _prefetch_models(model, lookups):
+    """Models reached through the prefetch_related `lookups` of `model`"""
+    found = set()
+    for lookup in lookups:
+        current = model
+        path = lookup.prefetch_through if isinstance(lookup, models.Prefetch) else lookup
+        for name in path.split(LOOKUP_SEP):
+            try:
+                current = current._meta.get_field(name).related_model
+            except FieldDoesNotExist:
+                # A to_attr or property, not a relation to follow
+                break
+            if current is None:
+                break
+            found.add(current)
+        if isinstance(lookup, models.Prefetch) and lookup.queryset is not None:
+            found.add(lookup.queryset.model)
+    return found
+
+
+def _site_tables():
+    return {model._meta.db_table for model in apps.get_app_config('millwork_site').get_models()}
+
+
+class CachedQuerySet(models.QuerySet):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._cache_results = False
+
+    def _clone(self):
+        clone = super()._clone()
+        clone._cache_results = self._cache_results
+        return clone
+
+    def cached(self):
+        """Return a copy whose results are served from the query cache"""
+        clone = self._chain()
+        clone._cache_results = True
+        return clone
+
+    def cache_key(self):
+        """
+        Return the cache key of this queryset's results, or None when it
+        can't match any rows
+        """
+        connection = connections[self.db]
+        try:
+            sql, params = self.query.get_compiler(connection=connection).as_sql()
+        except EmptyResultSet:
+            return None
+        quote = connection.ops.quote_name
+        tables = {table for table in _site_tables() if quote(table) in sql}
+        tables.update(
+            model._meta.db_table for model in _prefetch_models(self.model, self._prefetch_related_lookups)
+        )
+        fingerprint = repr((
+            sql, params, self._iterable_class.__name__, self._fields,
+            [getattr(lookup, 'prefetch_to', lookup) for lookup in self._prefetch_related_lookups],
+            sorted(versions.table_versions(tables).items()),
+        ))
+        return f'queryset:{self.model._meta.label_lower}:{hashlib.md5(fingerprint.encode()).hexdigest()}'
+
+    def _fetch_all(self):
+        key = self.cache_key() if self._cache_results and self._result_cache is None else None
+        if key is None:
+            super()._fetch_all()
+            return
+
+        label = self.model._meta.label_lower
+        results = cache.get(key)
+        if results is not None:
+            _record(label, 'hits')
+            self._result_cache = results
+            self._prefetch_done = True
+            return
+
+        _record(label, 'misses')
+        super()._fetch_all()
+        size = len(pickle.dumps(self._result_cache, pickle.HIGHEST_PROTOCOL))
+        cache.set(key, self._result_cache, getattr(settings, 'QUERYSET_CACHE_TIMEOUT', 3600))
+        _remember_size(label, key, size)
+
+    def _tables_written(self):
+        transaction.on_commit(lambda: versions.content_changed(self.model), using=self.db)
+
+    def update(self, **kwargs):
+        rows = super().update(**kwargs)
+        self._tables_written()
+        return rows
+
+    def bulk_create(self, *args, **kwargs):
+        objs = super().bulk_create(*args, **kwargs)
+        self._tables_written()
+        return objs
+
+    def bulk_update(self, *args, **kwargs):
+        rows = super().bulk_update(*args, **kwargs)
+        self._tables_written()
+        return rows
+
+
+def _record(label, stat):
+    stats.increment(f'{STATS_KEY_PREFIX}{label}:{stat}')
+
+
+def _remember_size(label, key, size):
+    # Read-modify-write, so concurrent misses may lose an entry; it only
+    # feeds the footprint report
+    sizes = cache.get(SIZES_KEY_PREFIX + label) or {}
+    sizes.pop(key, None)
+    sizes[key] = size
+    while len(sizes) > SIZES_LIMIT:
+        del sizes[next(iter(sizes))]
+    cache.set(SIZES_KEY_PREFIX + label, sizes, None)
+
+
+def cached_models():
+    return [
+        model for model in apps.get_app_config('millwork_site').get_models()
+        if isinstance(model._default_manager.get_queryset(), CachedQuerySet)
+    ]
+
+
+def query_cache_stats():
+    """
+    Return {model label: {'hits', 'misses', 'entries', 'bytes'}}, where
+    entries and bytes count the results still in the cache
+    """
+    labels = [model._meta.label_lower for model in cached_models()]
+    counters = stats.read([f'{STATS_KEY_PREFIX}{label}:{stat}' for label in labels for stat in ('hits', 'misses')])
+    report = {}
+    for label in labels:
+        sizes = cache.get(SIZES_KEY_PREFIX + label) or {}
+        live = {key: size for key, size in sizes.items() if cache.has_key(key)}
+        if len(live) != len(sizes):
+            cache.set(SIZES_KEY_PREFIX + label, live, None)
+        report[label] = {
+            'hits': counters[f'{STATS_KEY_PREFIX}{label}:hits'],
+            'misses': counters[f'{STATS_KEY_PREFIX}{label}:misses'],
+            'entries': len(live),
+            'bytes': sum(live.values()),
+        }
+    return report
+
+
+def reset_query_cache_stats():
+    labels = [model._meta.label_lower for model in cached_models()]
+    stats.reset([f'{STATS_KEY_PREFIX}{label}:{stat}' for label in labels for stat in ('hits', 'misses')])
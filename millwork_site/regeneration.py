@@ -0,0 +1,93 @@
+"""
+Single-flight regeneration for the page and fragment caches.
+
+Cache keys embed the content generation or the table versions, so an admin
+save (or a timeout) makes every worker miss the same entry at once. Instead
+of all of them rebuilding it against SQLite, regenerate() lets the one that
+wins a lock taken with cache.add() - atomic across worker processes - do
+the work, while the others answer with the last good copy. That copy is
+kept under a second key without the version for STALE_CACHE_TIMEOUT
+seconds, and is also what gets served when a rebuild fails because the
+database is locked or unavailable.
+
+With no previous copy (a cold cache) the others wait up to REGENERATION_WAIT
+seconds for the winner's result before building it themselves.
+"""
+import logging
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError
+
+logger = logging.getLogger(__name__)
+
+LOCK_PREFIX = 'regenerating:'
+UNSHARED_PREFIX = 'unshared:'
+POLL_INTERVAL = 0.05
+
+BUILT, STALE, WAITED = 'built', 'stale', 'waited'
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def _build(key, stale_key, build, timeout, cacheable):
+    """Run `build` and store its result; returns (value, outcome)"""
+    try:
+        value = build()
+    except DatabaseError:
+        stale = cache.get(stale_key)
+        if stale is None:
+            raise
+        logger.warning('Serving the last good copy of %s, the rebuild failed', key, exc_info=True)
+        return stale, STALE
+    if cacheable(value):
+        cache.set(key, value, timeout)
+        cache.set(stale_key, value, _setting('STALE_CACHE_TIMEOUT', 86400))
+    else:
+        # Don't make later misses queue for a result that is never shared
+        cache.set(UNSHARED_PREFIX + key, True, timeout)
+    return value, BUILT
+
+
+def regenerate(key, stale_key, build, timeout, cacheable=lambda value: True):
+    """
+    Return (value, outcome) after a miss on `key`, where outcome is BUILT
+    when this caller ran `build`, STALE when it got the last good copy from
+    `stale_key`, and WAITED when it got another worker's fresh result.
+    Results failing `cacheable` are returned but never stored.
+    """
+    if cache.get(UNSHARED_PREFIX + key):
+        return _build(key, stale_key, build, timeout, cacheable)
+
+    lock = LOCK_PREFIX + key
+    token = uuid.uuid4().hex
+    deadline = time.monotonic() + _setting('REGENERATION_WAIT', 5)
+    while True:
+        if cache.add(lock, token, _setting('REGENERATION_LOCK_TIMEOUT', 30)):
+            try:
+                # The previous holder may have stored the entry just before
+                # releasing the lock
+                value = cache.get(key)
+                if value is not None:
+                    return value, WAITED
+                return _build(key, stale_key, build, timeout, cacheable)
+            finally:
+                # The lock may have timed out and been taken by someone else
+                if cache.get(lock) == token:
+                    cache.delete(lock)
+
+        stale = cache.get(stale_key)
+        if stale is not None:
+            return stale, STALE
+        if time.monotonic() >= deadline:
+            return _build(key, stale_key, build, timeout, cacheable)
+        time.sleep(POLL_INTERVAL)
+        value = cache.get(key)
+        if value is not None:
+            return value, WAITED
+        if cache.get(UNSHARED_PREFIX + key):
+            return _build(key, stale_key, build, timeout, cacheable)
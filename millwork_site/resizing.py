@@ -0,0 +1,229 @@
+"""
+On-demand resized copies of anything under MEDIA_ROOT.
+
+/media/r/<w>x<h>/<path>?s=<signature> returns `path` cropped to exactly
+w x h (or scaled to width w when h is 0). URLs are signed so nobody can make
+the server render arbitrary sizes. Results are kept in RESIZE_CACHE_ROOT,
+which is trimmed back under RESIZE_CACHE_MAX_BYTES by evicting the least
+recently served files, at most once per RESIZE_EVICT_INTERVAL seconds
+across all workers. Concurrent requests for the same variant wait on a file
+lock so the resize runs only once; the eviction pass also removes the lock
+files nobody holds.
+"""
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.urls import reverse
+from PIL import Image, ImageOps
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows development machines
+    fcntl = None
+
+SIGNING_SALT = 'millwork_site.resizing'
+FORMATS = {'JPEG', 'PNG', 'WEBP', 'GIF'}
+# Seconds after which a .part file can only be left over from a killed worker
+ABANDONED_AFTER = 3600
+EVICT_LOCK_KEY = 'resizing:evicted'
+
+_thread_locks = {}
+_thread_locks_guard = threading.Lock()
+
+
+class InvalidVariant(Exception):
+    """The requested size or source cannot be served"""
+
+
+def cache_root():
+    return Path(getattr(settings, 'RESIZE_CACHE_ROOT', Path(settings.BASE_DIR) / 'var' / 'resized'))
+
+
+def max_cache_bytes():
+    return getattr(settings, 'RESIZE_CACHE_MAX_BYTES', 256 * 1024 * 1024)
+
+
+def max_dimension():
+    return getattr(settings, 'RESIZE_MAX_DIMENSION', 3000)
+
+
+def evict_interval():
+    return getattr(settings, 'RESIZE_EVICT_INTERVAL', 60)
+
+
+def _signature(width, height, path):
+    return signing.Signer(salt=SIGNING_SALT).signature(f'{width}x{height}/{path}')
+
+
+def resized_url(path, width, height=0):
+    """Signed URL of `path` (relative to MEDIA_ROOT) resized to width x height"""
+    url = reverse('resized_media', kwargs={'width': width, 'height': height, 'path': path})
+    return f'{url}?s={_signature(width, height, path)}'
+
+
+def check_signature(width, height, path, signature):
+    return signing.constant_time_compare(_signature(width, height, path), signature or '')
+
+
+def source_path(path):
+    """Resolve `path` inside MEDIA_ROOT, refusing anything that escapes it"""
+    root = Path(settings.MEDIA_ROOT).resolve()
+    source = (root / path).resolve()
+    if root not in source.parents or not source.is_file():
+        raise InvalidVariant(path)
+    return source
+
+
+def _render(source, width, height, target):
+    with Image.open(source) as original:
+        image_format = original.format
+        if image_format not in FORMATS:
+            raise InvalidVariant(source)
+        image = ImageOps.exif_transpose(original)
+        if height:
+            image = ImageOps.fit(image, (width, height), Image.Resampling.LANCZOS)
+        else:
+            image = image.copy()
+            image.thumbnail((width, max_dimension()), Image.Resampling.LANCZOS)
+        if image_format == 'JPEG' and image.mode != 'RGB':
+            image = image.convert('RGB')
+
+        # Write beside the target and rename, so readers never see half a file
+        handle, temporary = tempfile.mkstemp(dir=target.parent, suffix='.part')
+        try:
+            with os.fdopen(handle, 'wb') as output:
+                image.save(output, format=image_format, quality=82, optimize=True)
+            os.replace(temporary, target)
+        finally:
+            # Left behind only if saving or the rename failed
+            Path(temporary).unlink(missing_ok=True)
+
+
+def _is_current(lock_file, lock_path):
+    """Whether `lock_file` is still the file at `lock_path`, not one evict() unlinked"""
+    try:
+        return os.fstat(lock_file.fileno()).st_ino == os.stat(lock_path).st_ino
+    except FileNotFoundError:
+        return False
+
+
+@contextmanager
+def _single_flight(lock_path):
+    """Hold an exclusive lock on `lock_path` across threads and processes"""
+    if fcntl is None:
+        with _thread_locks_guard:
+            lock = _thread_locks.setdefault(str(lock_path), threading.Lock())
+        with lock:
+            yield
+        return
+    while True:
+        lock_file = open(lock_path, 'a')
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        # evict() may have removed the file while we waited for it; a lock
+        # on the unlinked copy would not exclude whoever opens the path next
+        if _is_current(lock_file, lock_path):
+            break
+        lock_file.close()
+    with lock_file:
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def get_variant(path, width, height):
+    """Return the cached file for `path` at width x height, rendering it if needed"""
+    if not 0 < width <= max_dimension() or not 0 <= height <= max_dimension():
+        raise InvalidVariant(f'{width}x{height}')
+    source = source_path(path)
+    stat = source.stat()
+    digest = hashlib.md5(f'{path}:{width}x{height}:{stat.st_mtime_ns}:{stat.st_size}'.encode()).hexdigest()
+
+    root = cache_root()
+    directory = root / digest[:2]
+    target = directory / (digest + (source.suffix.lower() or '.img'))
+    if target.exists():
+        os.utime(target)  # mark as recently used
+        return target
+
+    directory.mkdir(parents=True, exist_ok=True)
+    rendered = False
+    with _single_flight(directory / f'{digest}.lock'):
+        # Whoever held the lock before us may have produced it already
+        if not target.exists():
+            _render(source, width, height, target)
+            rendered = True
+    # Outside the lock, so requests waiting for this variant aren't held up
+    if rendered:
+        _evict_periodically(root)
+    return target
+
+
+def _evict_periodically(root):
+    """Run evict() unless some worker already did within evict_interval()"""
+    interval = evict_interval()
+    if interval > 0 and not cache.add(EVICT_LOCK_KEY, True, interval):
+        return
+    evict(root)
+
+
+def _remove_unheld_lock(path):
+    """Delete the lock file `path` unless a request is holding it"""
+    if fcntl is None:
+        return
+    try:
+        # Not 'a': a lock file removed meanwhile must not be created again
+        lock_file = open(path, 'rb')
+    except FileNotFoundError:
+        return
+    with lock_file:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return
+        # Another eviction may have replaced it with a file a request now holds
+        if _is_current(lock_file, path):
+            path.unlink()
+
+
+def evict(root=None):
+    """
+    Delete least recently used variants until the cache fits its budget,
+    along with lock files nobody holds and renders abandoned by a crash
+    """
+    root = root or cache_root()
+    files = []
+    total = 0
+    now = time.time()
+    for path in root.glob('*/*'):
+        if path.suffix == '.lock':
+            _remove_unheld_lock(path)
+            continue
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue  # evicted by another worker meanwhile
+        if path.suffix == '.part':
+            if stat.st_mtime < now - ABANDONED_AFTER:
+                path.unlink(missing_ok=True)
+            continue
+        files.append((stat.st_mtime, stat.st_size, path))
+        total += stat.st_size
+
+    budget = max_cache_bytes()
+    if total <= budget:
+        return
+    # Trim to 90% so every new variant does not trigger another scan
+    for _, size, path in sorted(files):
+        if total <= budget * 0.9:
+            break
+        path.unlink(missing_ok=True)
+        total -= size
@@ -0,0 +1,65 @@
+"""
+Primary/replica database routing.
+
+Reads made while a public view (millwork_site.views) handles the request go
+to the read-only `replica` connection; everything else, including the
+admin, management commands and every write, uses `default`. Once a request
+writes, the rest of its reads are pinned to `default` so it sees its own
+changes. ReplicaReadsMiddleware marks the requests that may use the replica.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+PRIMARY = 'default'
+REPLICA = 'replica'
+PUBLIC_VIEWS_MODULE = 'millwork_site.views'
+
+_replica_reads = ContextVar('replica_reads', default=False)
+_pinned = ContextVar('pinned_to_primary', default=False)
+
+
+def replica_configured():
+    return REPLICA in settings.DATABASES
+
+
+@contextmanager
+def request_scope():
+    """Start a request on the primary with nothing pinned, and forget it afterwards"""
+    reads_token = _replica_reads.set(False)
+    pinned_token = _pinned.set(False)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(reads_token)
+        _pinned.reset(pinned_token)
+
+
+def use_replica():
+    """Send this request's reads to the replica until it writes"""
+    _replica_reads.set(True)
+
+
+def pin_to_primary():
+    _pinned.set(True)
+
+
+def reading_from_replica():
+    return _replica_reads.get() and not _pinned.get() and replica_configured()
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        return REPLICA if reading_from_replica() else PRIMARY
+
+    def db_for_write(self, model, **hints):
+        pin_to_primary()
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same data
+        return {obj1._state.db, obj2._state.db} <= {PRIMARY, REPLICA}
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == PRIMARY
@@ -0,0 +1,69 @@
+"""
+Signal handlers that keep the site caches in step with model changes.
+
+Invalidation waits for the transaction to commit: until then other workers
+still read the old rows, and anything they cached under a new generation or
+table version would outlive the change.
+"""
+from functools import partial
+
+from django.apps import apps
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import images, singletons, versions
+from .models import CompanyInfo, CompanyStatistics, ContactMessage, PageContent
+
+
+@receiver([post_save, post_delete], sender=CompanyInfo)
+def company_info_changed(sender, **kwargs):
+    transaction.on_commit(singletons.invalidate_company_info)
+
+
+@receiver([post_save, post_delete], sender=CompanyStatistics)
+def company_statistics_changed(sender, **kwargs):
+    transaction.on_commit(singletons.invalidate_company_statistics)
+
+
+@receiver([post_save, post_delete], sender=PageContent)
+def page_content_changed(sender, **kwargs):
+    transaction.on_commit(singletons.invalidate_page_content)
+
+
+def site_content_changed(sender, **kwargs):
+    transaction.on_commit(lambda: versions.content_changed(sender))
+
+
+# Connected per model: a delete receiver without a sender would stop Django
+# from fast-deleting the rows of every other app (sessions, admin log, ...)
+for model in apps.get_app_config('millwork_site').get_models():
+    # Contact submissions are never rendered on public pages, so they must not
+    # flush the page cache
+    if model is not ContactMessage:
+        post_save.connect(site_content_changed, sender=model)
+        post_delete.connect(site_content_changed, sender=model)
+
+
+def image_saved(sender, instance, **kwargs):
+    store_preview = sender in images.placeholder_models() and not instance.image_placeholder
+    for model, field_name in images.image_fields():
+        if model is sender:
+            image = getattr(instance, field_name)
+            if image:
+                transaction.on_commit(partial(
+                    images.process_in_background, sender, instance.pk, image.name,
+                    store_preview=store_preview and field_name == 'image',
+                ))
+
+
+def image_uploaded(sender, instance, **kwargs):
+    # The preview of a new upload is computed once it is stored (image_saved)
+    if not instance.image or not instance.image._committed:
+        instance.image_placeholder = instance.image_color = ''
+
+
+for model in dict.fromkeys(model for model, _ in images.image_fields()):
+    post_save.connect(image_saved, sender=model)
+for model in images.placeholder_models():
+    pre_save.connect(image_uploaded, sender=model)
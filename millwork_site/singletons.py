@@ -0,0 +1,102 @@
+"""
+Cached accessors for the site-wide singleton rows: CompanyInfo,
+CompanyStatistics and the per-page PageContent.
+
+Values are kept in two layers: a short-lived in-process memo backed by the
+shared Django cache. Both are keyed on the content generation, which saving
+or deleting one of these models bumps once the transaction commits (see
+signals.py). A worker that read the old row just before the commit can only
+store it under the retired generation, where nobody looks any more, so no
+worker serves an edited row for longer than it takes the commit to land;
+SINGLETON_LOCAL_TTL only bounds how long a memo entry is trusted without
+the generation changing.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import CompanyInfo, CompanyStatistics, PageContent
+from .page_cache import content_generation
+
+_MISSING = object()
+_memo = {}
+_memo_lock = threading.Lock()
+
+
+def _local_ttl():
+    return getattr(settings, 'SINGLETON_LOCAL_TTL', 10)
+
+
+def _cache_timeout():
+    return getattr(settings, 'SINGLETON_CACHE_TIMEOUT', 300)
+
+
+def _key(name, generation):
+    return f'singleton:{generation}:{name}'
+
+
+def _cached(name, loader):
+    """Return the value stored for `name`, loading it with `loader` on a miss"""
+    now = time.monotonic()
+    generation = content_generation()
+    entry = _memo.get(name)
+    if entry is not None and entry[0] > now and entry[1] == generation:
+        return entry[2]
+
+    key = _key(name, generation)
+    value = cache.get(key, _MISSING)
+    if value is _MISSING:
+        value = loader()
+        cache.set(key, value, _cache_timeout())
+
+    with _memo_lock:
+        _memo[name] = (now + _local_ttl(), generation, value)
+    return value
+
+
+def _invalidate(*names):
+    with _memo_lock:
+        for name in names:
+            _memo.pop(name, None)
+    generation = content_generation()
+    cache.delete_many([_key(name, generation) for name in names])
+
+
+def _page_name(page):
+    return f'page_content:{page}'
+
+
+def get_company_info():
+    """Return the CompanyInfo row (or None if none has been created)"""
+    return _cached('company_info', lambda: CompanyInfo.objects.first())
+
+
+def get_company_statistics():
+    """Return the CompanyStatistics row (or None if none has been created)"""
+    return _cached('company_statistics', lambda: CompanyStatistics.objects.first())
+
+
+def get_page_content(page):
+    """Return the PageContent row for `page` (or None if it does not exist)"""
+    return _cached(_page_name(page), lambda: PageContent.objects.filter(page=page).first())
+
+
+def invalidate_company_info():
+    _invalidate('company_info')
+
+
+def invalidate_company_statistics():
+    _invalidate('company_statistics')
+
+
+def invalidate_page_content():
+    # The page key of a row can be edited, so drop every page at once
+    _invalidate(*[_page_name(page) for page, _ in PageContent.PAGE_CHOICES])
+
+
+def clear():
+    """Forget every memoised singleton in this process"""
+    with _memo_lock:
+        _memo.clear()
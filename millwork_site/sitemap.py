@@ -0,0 +1,179 @@
+"""
+Pre-generated XML sitemaps.
+
+The sitemap of the site at SITE_URL is written to disk once (plain and
+gzipped) per content generation and served as a file; any content change
+moves to a new generation, so the next request builds a fresh copy in a new
+directory rather than deleting the one other requests may be reading or a
+slower build may still be renaming into place. Entries are streamed
+to disk as they are read from the database, and once there are more URLs
+than fit in one file (SITEMAP_SHARD_SIZE, 50,000 by the sitemap protocol)
+sitemap.xml becomes a sitemap index pointing at sitemap-<n>.xml shards.
+"""
+import gzip
+import hashlib
+import shutil
+import tempfile
+from itertools import chain, islice
+from pathlib import Path
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+
+from . import page_cache
+from .models import PageContent, Project
+
+STATIC_PAGES = [
+    {'url': '', 'page': 'home', 'priority': '1.0', 'changefreq': 'daily'},
+    {'url': 'about/', 'page': 'about', 'priority': '0.8', 'changefreq': 'monthly'},
+    {'url': 'services/', 'page': 'services', 'priority': '0.9', 'changefreq': 'weekly'},
+    {'url': 'portfolio/', 'page': 'portfolio', 'priority': '0.9', 'changefreq': 'weekly'},
+    {'url': 'contact/', 'page': 'contact', 'priority': '0.7', 'changefreq': 'monthly'},
+]
+
+XML_HEADER = '<?xml version="1.0" encoding="UTF-8"?>\n'
+NAMESPACE = 'http://www.sitemaps.org/schemas/sitemap/0.9'
+
+
+def site_url():
+    """Public root URL the sitemap's links are built from"""
+    return settings.SITE_URL.rstrip('/') + '/'
+
+
+def sitemap_root():
+    return Path(getattr(settings, 'SITEMAP_ROOT', Path(settings.BASE_DIR) / 'var' / 'sitemaps'))
+
+
+def shard_size():
+    return getattr(settings, 'SITEMAP_SHARD_SIZE', 50000)
+
+
+def iter_entries(base_url):
+    """Yield (loc, lastmod, changefreq, priority) for every URL on the site"""
+    updated = dict(PageContent.objects.values_list('page', 'updated_at'))
+    for language, _ in settings.LANGUAGES:
+        prefix = '' if language == settings.LANGUAGE_CODE else f'{language}/'
+        for page in STATIC_PAGES:
+            lastmod = updated.get(page['page'])
+            yield (f'{base_url}{prefix}{page["url"]}', lastmod, page['changefreq'], page['priority'])
+
+    projects = Project.objects.filter(is_active=True).order_by('id').values_list('id', 'updated_at')
+    for project_id, updated_at in projects.iterator(chunk_size=2000):
+        yield (f'{base_url}portfolio/?project={project_id}', updated_at, 'monthly', '0.6')
+
+
+def _url_element(loc, lastmod, changefreq, priority):
+    lines = [f'  <url>\n    <loc>{escape(loc)}</loc>\n']
+    if lastmod is not None:
+        lines.append(f'    <lastmod>{lastmod.strftime("%Y-%m-%d")}</lastmod>\n')
+    lines.append(f'    <changefreq>{changefreq}</changefreq>\n    <priority>{priority}</priority>\n  </url>\n')
+    return ''.join(lines)
+
+
+class _ShardWriter:
+    """Writes the same text to a plain file and its gzipped sibling"""
+
+    def __init__(self, path):
+        self.plain = open(path, 'w', encoding='utf-8')
+        self.compressed = gzip.open(f'{path}.gz', 'wt', encoding='utf-8')
+
+    def write(self, text):
+        self.plain.write(text)
+        self.compressed.write(text)
+
+    def close(self):
+        self.plain.close()
+        self.compressed.close()
+
+
+def _write_urlset(path, entries):
+    """Stream `entries` into a urlset file and return their newest lastmod"""
+    newest = None
+    writer = _ShardWriter(path)
+    writer.write(f'{XML_HEADER}<urlset xmlns="{NAMESPACE}">\n')
+    for entry in entries:
+        writer.write(_url_element(*entry))
+        lastmod = entry[1]
+        if lastmod is not None and (newest is None or lastmod > newest):
+            newest = lastmod
+    writer.write('</urlset>\n')
+    writer.close()
+    return newest
+
+
+def _write_index(path, base_url, shards):
+    writer = _ShardWriter(path)
+    writer.write(f'{XML_HEADER}<sitemapindex xmlns="{NAMESPACE}">\n')
+    for number, lastmod in shards:
+        writer.write(f'  <sitemap>\n    <loc>{escape(base_url)}sitemap-{number}.xml</loc>\n')
+        if lastmod is not None:
+            writer.write(f'    <lastmod>{lastmod.strftime("%Y-%m-%d")}</lastmod>\n')
+        writer.write('  </sitemap>\n')
+    writer.write('</sitemapindex>\n')
+    writer.close()
+
+
+def build(base_url, directory):
+    """Write sitemap.xml (and any shards) for `base_url` into `directory`"""
+    directory = Path(directory)
+    limit = shard_size()
+    entries = iter_entries(base_url)
+
+    # Look ahead by at most one shard so a small site stays a single urlset
+    first = list(islice(entries, limit + 1))
+    if len(first) <= limit:
+        _write_urlset(directory / 'sitemap.xml', first)
+        return
+
+    remaining = chain(first, entries)
+    shards = []
+    while True:
+        head = next(remaining, None)
+        if head is None:
+            break
+        number = len(shards) + 1
+        lastmod = _write_urlset(
+            directory / f'sitemap-{number}.xml', chain([head], islice(remaining, limit - 1))
+        )
+        shards.append((number, lastmod))
+    _write_index(directory / 'sitemap.xml', base_url, shards)
+
+
+def get_directory(base_url):
+    """
+    Return the directory holding the stored sitemap for `base_url`, building
+    it first if there is no copy for the current content generation.
+    """
+    root = sitemap_root()
+    prefix = hashlib.md5(base_url.encode()).hexdigest()[:12]
+    # Read before the rows: a build that races a commit lands under the old
+    # generation, which the commit's bump has already retired
+    generation = page_cache.content_generation()
+    directory = root / f'{prefix}-{generation}'
+    if (directory / 'sitemap.xml').exists():
+        return directory
+
+    root.mkdir(parents=True, exist_ok=True)
+    staging = Path(tempfile.mkdtemp(dir=root, prefix='.build-'))
+    try:
+        build(base_url, staging)
+        staging.rename(directory)
+    except OSError:
+        # Another process finished first; its copy is just as fresh
+        if not (directory / 'sitemap.xml').exists():
+            raise
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+    _remove_older(root, prefix, generation)
+    return directory
+
+
+def _remove_older(root, prefix, generation):
+    """Delete the copies of `prefix` stored for generations before `generation`"""
+    for directory in root.glob(f'{prefix}-*'):
+        try:
+            older = int(directory.name.rpartition('-')[2]) < generation
+        except ValueError:
+            continue
+        if older:
+            shutil.rmtree(directory, ignore_errors=True)
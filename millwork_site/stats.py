@@ -0,0 +1,70 @@
+"""
+Cache-backed counters used to report cache effectiveness
+
+Increments are summed in process and written to the cache at most once per
+CACHE_STATS_FLUSH_INTERVAL seconds, so a cache hit costs no cache write. A
+worker's unflushed counts are visible to read() in that worker only, and
+are lost if it exits before the next flush.
+"""
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+
+_pending = Counter()
+_pending_lock = threading.Lock()
+_last_flush = time.monotonic()
+
+
+def flush_interval():
+    return getattr(settings, 'CACHE_STATS_FLUSH_INTERVAL', 10)
+
+
+def _store(key, delta):
+    try:
+        cache.incr(key, delta)
+    except ValueError:
+        if not cache.add(key, delta, None):
+            cache.incr(key, delta)
+
+
+def flush():
+    """Write the increments summed in this process to the cache"""
+    global _last_flush
+    with _pending_lock:
+        pending = dict(_pending)
+        _pending.clear()
+        _last_flush = time.monotonic()
+    for key, delta in pending.items():
+        _store(key, delta)
+
+
+def increment(key, delta=1):
+    """Add `delta` to the counter stored under `key`, creating it if needed"""
+    with _pending_lock:
+        _pending[key] += delta
+        due = time.monotonic() - _last_flush >= flush_interval()
+    if due:
+        flush()
+
+
+def read(keys):
+    """Return {key: value} for `keys`, with 0 for counters never incremented"""
+    flush()
+    values = cache.get_many(keys)
+    return {key: values.get(key, 0) for key in keys}
+
+
+def reset(keys):
+    with _pending_lock:
+        for key in keys:
+            _pending.pop(key, None)
+    cache.delete_many(keys)
+
+
+def clear():
+    """Drop this process's unflushed increments"""
+    with _pending_lock:
+        _pending.clear()
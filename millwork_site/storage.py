@@ -0,0 +1,96 @@
+"""
+Static files storage that content-hashes names and precompresses.
+
+collectstatic writes hashed copies (ManifestStaticFilesStorage) and then a
+.gz and a .br sibling for every text asset, spread over a process pool.
+brotli is in requirements.txt; without it only .gz copies are written and
+`check --deploy` warns (millwork_site.W002). A small record in STATIC_ROOT remembers
+the content hash each compressed copy was made from, so unchanged files are
+skipped on the next run. PrecompressedStaticMiddleware serves the result.
+"""
+import gzip
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = {
+    '.css', '.js', '.mjs', '.map', '.json', '.svg', '.txt', '.xml', '.html', '.ico', '.ttf', '.otf', '.eot',
+}
+MIN_COMPRESS_SIZE = 256
+RECORD_NAME = 'compressed.json'
+
+
+def _compress(path, known_digest):
+    """
+    Write path.gz (and path.br) unless they were already made from the same
+    content. Returns (path, content digest, list of written suffixes).
+    """
+    with open(path, 'rb') as source:
+        content = source.read()
+    digest = hashlib.md5(content).hexdigest()
+    suffixes = ['.gz'] + (['.br'] if brotli is not None else [])
+    if digest == known_digest and all(os.path.exists(path + suffix) for suffix in suffixes):
+        return path, digest, []
+
+    written = []
+    for suffix in suffixes:
+        if suffix == '.gz':
+            # mtime=0 keeps the output byte-identical between runs
+            compressed = gzip.compress(content, compresslevel=9, mtime=0)
+        else:
+            compressed = brotli.compress(content, quality=11)
+        if len(compressed) < len(content):
+            with open(path + suffix, 'wb') as output:
+                output.write(compressed)
+            written.append(suffix)
+        elif os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    return path, digest, written
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            # Not collected yet (a fresh checkout, the test run): use the plain name
+            return name
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+
+        names = set(paths) | set(self.hashed_files.values())
+        candidates = [
+            name for name in sorted(names)
+            if os.path.splitext(name)[1].lower() in COMPRESSIBLE_EXTENSIONS
+            and self.exists(name) and self.size(name) >= MIN_COMPRESS_SIZE
+        ]
+        record_path = self.path(RECORD_NAME)
+        try:
+            with open(record_path) as record_file:
+                record = json.load(record_file)
+        except (OSError, ValueError):
+            record = {}
+
+        workers = getattr(settings, 'STATIC_COMPRESS_WORKERS', None)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            jobs = pool.map(_compress, [self.path(name) for name in candidates],
+                            [record.get(name) for name in candidates], chunksize=16)
+            for name, (_, digest, written) in zip(candidates, jobs):
+                record[name] = digest
+                for suffix in written:
+                    yield name, name + suffix, True
+
+        with open(record_path, 'w') as record_file:
+            json.dump(record, record_file, indent=0, sort_keys=True)
@@ -0,0 +1,765 @@
+"""
+A small build-time stand-in for the Tailwind CDN script.
+
+The templates are scanned for class names (class="...", Alpine :class
+bindings and x-transition attributes) and only the Tailwind utilities found
+there are compiled, following Tailwind v3's theme and rule order, into one
+minified stylesheet. Classes that are not Tailwind utilities (hover-lift,
+animate-*, ...) are left to static/css/*.css. The colours are the ones
+base.html used to pass to `tailwind.config`.
+"""
+import hashlib
+import json
+import re
+from functools import lru_cache
+from pathlib import Path
+
+from django.conf import settings
+
+OUTPUT_DIR = 'css'
+MANIFEST_NAME = 'tailwind.json'
+
+SCREENS = {'sm': '640px', 'md': '768px', 'lg': '1024px', 'xl': '1280px', '2xl': '1536px'}
+
+# Applied in this order, after the plain utilities, like Tailwind's variant order
+PSEUDO_VARIANTS = {
+    'first': ':first-child', 'last': ':last-child', 'odd': ':nth-child(odd)', 'even': ':nth-child(even)',
+    'focus-within': ':focus-within', 'hover': ':hover', 'focus': ':focus', 'focus-visible': ':focus-visible',
+    'active': ':active', 'disabled': ':disabled',
+}
+GROUP_VARIANTS = {'group-hover': ':hover', 'group-focus': ':focus'}
+
+THEME_COLORS = {
+    'background': 'var(--background, #ffffff)',
+    'foreground': 'var(--foreground, #475569)',
+    'card': 'var(--card, #ecfeff)',
+    'card-foreground': 'var(--card-foreground, #164e63)',
+    'popover': 'var(--popover, #ffffff)',
+    'popover-foreground': 'var(--popover-foreground, #475569)',
+    'primary': 'var(--primary, #164e63)',
+    'primary-foreground': 'var(--primary-foreground, #ffffff)',
+    'secondary': 'var(--secondary, #f97316)',
+    'secondary-foreground': 'var(--secondary-foreground, #ffffff)',
+    'muted': 'var(--muted, #fef2f2)',
+    'muted-foreground': 'var(--muted-foreground, #374151)',
+    'accent': 'var(--accent, #f97316)',
+    'accent-foreground': 'var(--accent-foreground, #ffffff)',
+    'destructive': 'var(--destructive, #dc2626)',
+    'destructive-foreground': 'var(--destructive-foreground, #ffffff)',
+    'border': 'var(--border, #475569)',
+    'input': 'var(--input, #ecfeff)',
+    'ring': 'var(--ring, rgba(25, 118, 210, 0.5))',
+    'sidebar': 'var(--sidebar, #ffffff)',
+    'sidebar-foreground': 'var(--sidebar-foreground, #475569)',
+    'sidebar-primary': 'var(--sidebar-primary, #164e63)',
+    'sidebar-primary-foreground': 'var(--sidebar-primary-foreground, #ffffff)',
+    'sidebar-accent': 'var(--sidebar-accent, #f97316)',
+    'sidebar-accent-foreground': 'var(--sidebar-accent-foreground, #ffffff)',
+    'sidebar-border': 'var(--sidebar-border, #475569)',
+    'sidebar-ring': 'var(--sidebar-ring, rgba(25, 118, 210, 0.5))',
+}
+
+SHADES = ('50', '100', '200', '300', '400', '500', '600', '700', '800', '900', '950')
+PALETTE = {
+    'slate': '#f8fafc #f1f5f9 #e2e8f0 #cbd5e1 #94a3b8 #64748b #475569 #334155 #1e293b #0f172a #020617',
+    'gray': '#f9fafb #f3f4f6 #e5e7eb #d1d5db #9ca3af #6b7280 #4b5563 #374151 #1f2937 #111827 #030712',
+    'red': '#fef2f2 #fee2e2 #fecaca #fca5a5 #f87171 #ef4444 #dc2626 #b91c1c #991b1b #7f1d1d #450a0a',
+    'orange': '#fff7ed #ffedd5 #fed7aa #fdba74 #fb923c #f97316 #ea580c #c2410c #9a3412 #7c2d12 #431407',
+    'yellow': '#fefce8 #fef9c3 #fef08a #fde047 #facc15 #eab308 #ca8a04 #a16207 #854d0e #713f12 #422006',
+    'green': '#f0fdf4 #dcfce7 #bbf7d0 #86efac #4ade80 #22c55e #16a34a #15803d #166534 #14532d #052e16',
+    'blue': '#eff6ff #dbeafe #bfdbfe #93c5fd #60a5fa #3b82f6 #2563eb #1d4ed8 #1e40af #1e3a8a #172554',
+}
+COLORS = {
+    'inherit': 'inherit', 'current': 'currentColor', 'transparent': 'transparent',
+    'black': '#000000', 'white': '#ffffff',
+    **{f'{name}-{shade}': hex_value
+       for name, values in PALETTE.items() for shade, hex_value in zip(SHADES, values.split())},
+    **THEME_COLORS,
+}
+
+SPACING = {'0': '0px', 'px': '1px'}
+SPACING.update({
+    key: f'{float(key) / 4:g}rem'
+    for key in ('0.5 1 1.5 2 2.5 3 3.5 4 5 6 7 8 9 10 11 12 14 16 20 24 28 32 36 40 44 48 52 56 60 64 72 80 96').split()
+})
+
+FONT_SIZES = {
+    'xs': ('0.75rem', '1rem'), 'sm': ('0.875rem', '1.25rem'), 'base': ('1rem', '1.5rem'),
+    'lg': ('1.125rem', '1.75rem'), 'xl': ('1.25rem', '1.75rem'), '2xl': ('1.5rem', '2rem'),
+    '3xl': ('1.875rem', '2.25rem'), '4xl': ('2.25rem', '2.5rem'), '5xl': ('3rem', '1'),
+    '6xl': ('3.75rem', '1'), '7xl': ('4.5rem', '1'), '8xl': ('6rem', '1'), '9xl': ('8rem', '1'),
+}
+FONT_WEIGHTS = {
+    'thin': '100', 'extralight': '200', 'light': '300', 'normal': '400', 'medium': '500',
+    'semibold': '600', 'bold': '700', 'extrabold': '800', 'black': '900',
+}
+LINE_HEIGHTS = {
+    'none': '1', 'tight': '1.25', 'snug': '1.375', 'normal': '1.5', 'relaxed': '1.625', 'loose': '2',
+    **{str(n): f'{n / 4:g}rem' for n in range(3, 11)},
+}
+MAX_WIDTHS = {
+    'none': 'none', 'xs': '20rem', 'sm': '24rem', 'md': '28rem', 'lg': '32rem', 'xl': '36rem',
+    '2xl': '42rem', '3xl': '48rem', '4xl': '56rem', '5xl': '64rem', '6xl': '72rem', '7xl': '80rem',
+    'full': '100%', 'min': 'min-content', 'max': 'max-content', 'fit': 'fit-content', 'prose': '65ch',
+    **{f'screen-{name}': width for name, width in SCREENS.items()},
+}
+RADII = {
+    'none': '0px', 'sm': '0.125rem', '': '0.25rem', 'md': '0.375rem', 'lg': '0.5rem',
+    'xl': '0.75rem', '2xl': '1rem', '3xl': '1.5rem', 'full': '9999px',
+}
+SHADOWS = {
+    'sm': '0 1px 2px 0 rgb(0 0 0/0.05)',
+    '': '0 1px 3px 0 rgb(0 0 0/0.1),0 1px 2px -1px rgb(0 0 0/0.1)',
+    'md': '0 4px 6px -1px rgb(0 0 0/0.1),0 2px 4px -2px rgb(0 0 0/0.1)',
+    'lg': '0 10px 15px -3px rgb(0 0 0/0.1),0 4px 6px -4px rgb(0 0 0/0.1)',
+    'xl': '0 20px 25px -5px rgb(0 0 0/0.1),0 8px 10px -6px rgb(0 0 0/0.1)',
+    '2xl': '0 25px 50px -12px rgb(0 0 0/0.25)',
+    'inner': 'inset 0 2px 4px 0 rgb(0 0 0/0.05)',
+    'none': '0 0 #0000',
+}
+BLURS = {'none': '0', 'sm': '4px', '': '8px', 'md': '12px', 'lg': '16px', 'xl': '24px', '2xl': '40px', '3xl': '64px'}
+BORDER_WIDTHS = {'': '1px', '0': '0px', '2': '2px', '4': '4px', '8': '8px'}
+EASINGS = {
+    'linear': 'linear', 'in': 'cubic-bezier(0.4,0,1,1)', 'out': 'cubic-bezier(0,0,0.2,1)',
+    'in-out': 'cubic-bezier(0.4,0,0.2,1)',
+}
+TRANSITIONS = {
+    '': 'color,background-color,border-color,text-decoration-color,fill,stroke,opacity,box-shadow,transform,filter,backdrop-filter',
+    'all': 'all',
+    'colors': 'color,background-color,border-color,text-decoration-color,fill,stroke',
+    'opacity': 'opacity',
+    'shadow': 'box-shadow',
+    'transform': 'transform',
+}
+GRADIENT_DIRECTIONS = {
+    't': 'to top', 'tr': 'to top right', 'r': 'to right', 'br': 'to bottom right',
+    'b': 'to bottom', 'bl': 'to bottom left', 'l': 'to left', 'tl': 'to top left',
+}
+SIDES = {
+    '': ('',), 'x': ('-left', '-right'), 'y': ('-top', '-bottom'),
+    't': ('-top',), 'r': ('-right',), 'b': ('-bottom',), 'l': ('-left',),
+}
+
+TRANSFORM = (
+    'transform:translate(var(--tw-translate-x),var(--tw-translate-y)) rotate(var(--tw-rotate)) '
+    'skewX(var(--tw-skew-x)) skewY(var(--tw-skew-y)) scaleX(var(--tw-scale-x)) scaleY(var(--tw-scale-y))'
+)
+BOX_SHADOW = 'box-shadow:var(--tw-ring-offset-shadow,0 0 #0000),var(--tw-ring-shadow,0 0 #0000),var(--tw-shadow)'
+
+PREFLIGHT = (
+    '*,::before,::after{box-sizing:border-box;border-width:0;border-style:solid;border-color:#e5e7eb;'
+    '--tw-translate-x:0;--tw-translate-y:0;--tw-rotate:0;--tw-skew-x:0;--tw-skew-y:0;--tw-scale-x:1;'
+    '--tw-scale-y:1;--tw-ring-inset: ;--tw-ring-offset-width:0px;--tw-ring-offset-color:#fff;'
+    '--tw-ring-color:rgb(59 130 246/0.5);--tw-ring-offset-shadow:0 0 #0000;--tw-ring-shadow:0 0 #0000;'
+    '--tw-shadow:0 0 #0000}'
+    '::before,::after{--tw-content:\'\'}'
+    'html,:host{line-height:1.5;-webkit-text-size-adjust:100%;tab-size:4;font-family:ui-sans-serif,system-ui,'
+    'sans-serif,"Apple Color Emoji","Segoe UI Emoji","Segoe UI Symbol","Noto Color Emoji";'
+    '-webkit-tap-highlight-color:transparent}'
+    'body{margin:0;line-height:inherit}'
+    'hr{height:0;color:inherit;border-top-width:1px}'
+    'abbr:where([title]){text-decoration:underline dotted}'
+    'h1,h2,h3,h4,h5,h6{font-size:inherit;font-weight:inherit}'
+    'a{color:inherit;text-decoration:inherit}'
+    'b,strong{font-weight:bolder}'
+    'code,kbd,samp,pre{font-family:ui-monospace,SFMono-Regular,Menlo,Monaco,Consolas,monospace;font-size:1em}'
+    'small{font-size:80%}'
+    'sub,sup{font-size:75%;line-height:0;position:relative;vertical-align:baseline}sub{bottom:-0.25em}sup{top:-0.5em}'
+    'table{text-indent:0;border-color:inherit;border-collapse:collapse}'
+    'button,input,optgroup,select,textarea{font-family:inherit;font-feature-settings:inherit;'
+    'font-variation-settings:inherit;font-size:100%;font-weight:inherit;line-height:inherit;'
+    'letter-spacing:inherit;color:inherit;margin:0;padding:0}'
+    'button,select{text-transform:none}'
+    'button,input:where([type=button]),input:where([type=reset]),input:where([type=submit])'
+    '{-webkit-appearance:button;background-color:transparent;background-image:none}'
+    ':-moz-focusring{outline:auto}:-moz-ui-invalid{box-shadow:none}progress{vertical-align:baseline}'
+    '::-webkit-inner-spin-button,::-webkit-outer-spin-button{height:auto}'
+    '[type=search]{-webkit-appearance:textfield;outline-offset:-2px}'
+    '::-webkit-search-decoration{-webkit-appearance:none}'
+    '::-webkit-file-upload-button{-webkit-appearance:button;font:inherit}summary{display:list-item}'
+    'blockquote,dl,dd,h1,h2,h3,h4,h5,h6,hr,figure,p,pre{margin:0}fieldset{margin:0;padding:0}legend{padding:0}'
+    'ol,ul,menu{list-style:none;margin:0;padding:0}dialog{padding:0}textarea{resize:vertical}'
+    'input::placeholder,textarea::placeholder{opacity:1;color:#9ca3af}'
+    'button,[role=button]{cursor:pointer}:disabled{cursor:default}'
+    'img,svg,video,canvas,audio,iframe,embed,object{display:block;vertical-align:middle}'
+    'img,video{max-width:100%;height:auto}[hidden]:where(:not([hidden=until-found])){display:none}'
+)
+
+
+# Utility rules -----------------------------------------------------------
+
+_RULES = []
+
+
+def _rule(pattern):
+    """Register a utility; rules are emitted in registration order"""
+    def register(func):
+        _RULES.append((re.compile(pattern + '$'), func))
+        return func
+    return register
+
+
+def _arbitrary(value):
+    if value.startswith('[') and value.endswith(']'):
+        return value[1:-1].replace('_', ' ')
+    return None
+
+
+def _fraction(value):
+    match = re.fullmatch(r'(\d+)/(\d+)', value)
+    if match:
+        return f'{int(match[1]) / int(match[2]) * 100:g}%'
+    return None
+
+
+def _spacing(value, negative=False, extra=None):
+    """Resolve a spacing-scale key, fraction, keyword from `extra` or [arbitrary] value"""
+    resolved = SPACING.get(value) or _fraction(value) or (extra or {}).get(value) or _arbitrary(value)
+    if resolved is None:
+        return None
+    if negative:
+        return f'-{resolved}' if resolved[0].isdigit() else f'calc({resolved}*-1)'
+    return resolved
+
+
+def _rgb(hex_value):
+    hex_value = hex_value.lstrip('#')
+    if len(hex_value) == 3:
+        hex_value = ''.join(c * 2 for c in hex_value)
+    return tuple(int(hex_value[i:i + 2], 16) for i in (0, 2, 4))
+
+
+def _color(value):
+    """Resolve a colour name (optionally /<opacity>) or [#hex] to a CSS colour"""
+    value, _, opacity = value.partition('/')
+    color = COLORS.get(value) or _arbitrary(value)
+    if color is None or not re.fullmatch(r'#[0-9a-fA-F]{3,6}|var\(.*\)|[a-zA-Z]+|rgba?\(.*\)', color):
+        return None
+    if not opacity:
+        return color
+    if not opacity.isdigit():
+        return None
+    alpha = int(opacity) / 100
+    if color.startswith('#'):
+        red, green, blue = _rgb(color)
+        return f'rgb({red} {green} {blue}/{alpha:g})'
+    return f'color-mix(in srgb,{color} {opacity}%,transparent)'
+
+
+@_rule(r'pointer-events-(none|auto)')
+def _pointer_events(m, neg):
+    return [f'pointer-events:{m[1]}']
+
+
+@_rule(r'(visible|invisible)')
+def _visibility(m, neg):
+    return [f'visibility:{"visible" if m[1] == "visible" else "hidden"}']
+
+
+@_rule(r'(static|fixed|absolute|relative|sticky)')
+def _position(m, neg):
+    return [f'position:{m[1]}']
+
+
+@_rule(r'(inset|inset-x|inset-y|top|right|bottom|left)-(.+)')
+def _inset(m, neg):
+    value = _spacing(m[2], neg, {'full': '100%', 'auto': 'auto'})
+    if value is None:
+        return None
+    properties = {'inset': ('inset',), 'inset-x': ('left', 'right'), 'inset-y': ('top', 'bottom')}.get(m[1], (m[1],))
+    return [f'{prop}:{value}' for prop in properties]
+
+
+@_rule(r'z-(\d+|auto)')
+def _z_index(m, neg):
+    return [f'z-index:{"-" if neg else ""}{m[1]}']
+
+
+@_rule(r'col-span-(\d+|full)')
+def _col_span(m, neg):
+    return ['grid-column:1/-1'] if m[1] == 'full' else [f'grid-column:span {m[1]}/span {m[1]}']
+
+
+@_rule(r'm([xytrbl]?)-(.+)')
+def _margin(m, neg):
+    value = _spacing(m[2], neg, {'auto': 'auto'})
+    if value is None:
+        return None
+    return [f'margin{side}:{value}' for side in SIDES[m[1]]]
+
+
+@_rule(r'(block|inline-block|inline|flex|inline-flex|table|grid|inline-grid|contents|list-item|hidden)')
+def _display(m, neg):
+    return [f'display:{"none" if m[1] == "hidden" else m[1]}']
+
+
+@_rule(r'h-(.+)')
+def _height(m, neg):
+    value = _spacing(m[1], extra={'full': '100%', 'auto': 'auto', 'screen': '100vh', 'fit': 'fit-content'})
+    return value and [f'height:{value}']
+
+
+@_rule(r'max-h-(.+)')
+def _max_height(m, neg):
+    value = _spacing(m[1], extra={'full': '100%', 'screen': '100vh', 'none': 'none'})
+    return value and [f'max-height:{value}']
+
+
+@_rule(r'min-h-(0|full|screen)')
+def _min_height(m, neg):
+    return [f'min-height:{ {"0": "0px", "full": "100%", "screen": "100vh"}[m[1]] }']
+
+
+@_rule(r'w-(.+)')
+def _width(m, neg):
+    value = _spacing(m[1], extra={'full': '100%', 'auto': 'auto', 'screen': '100vw', 'fit': 'fit-content'})
+    return value and [f'width:{value}']
+
+
+@_rule(r'max-w-(.+)')
+def _max_width(m, neg):
+    value = MAX_WIDTHS.get(m[1]) or _arbitrary(m[1])
+    return value and [f'max-width:{value}']
+
+
+@_rule(r'(flex-shrink|shrink)(?:-(0))?')
+def _flex_shrink(m, neg):
+    return [f'flex-shrink:{m[2] or 1}']
+
+
+@_rule(r'(flex-grow|grow)(?:-(0))?')
+def _flex_grow(m, neg):
+    return [f'flex-grow:{m[2] or 1}']
+
+
+@_rule(r'flex-(1|auto|initial|none)')
+def _flex(m, neg):
+    return [f'flex:{ {"1": "1 1 0%", "auto": "1 1 auto", "initial": "0 1 auto", "none": "none"}[m[1]] }']
+
+
+@_rule(r'translate-([xy])-(.+)')
+def _translate(m, neg):
+    value = _spacing(m[2], neg, {'full': '100%'})
+    return value and [f'--tw-translate-{m[1]}:{value}', TRANSFORM]
+
+
+@_rule(r'rotate-(\d+)')
+def _rotate(m, neg):
+    return [f'--tw-rotate:{"-" if neg else ""}{m[1]}deg', TRANSFORM]
+
+
+@_rule(r'scale(?:-([xy]))?-(\d+)')
+def _scale(m, neg):
+    axes = (m[1],) if m[1] else ('x', 'y')
+    return [f'--tw-scale-{axis}:{int(m[2]) / 100:g}' for axis in axes] + [TRANSFORM]
+
+
+@_rule(r'transform')
+def _transform(m, neg):
+    return [TRANSFORM]
+
+
+@_rule(r'cursor-(pointer|default|not-allowed|wait|text|move|auto)')
+def _cursor(m, neg):
+    return [f'cursor:{m[1]}']
+
+
+@_rule(r'grid-cols-(\d+|none)')
+def _grid_columns(m, neg):
+    return ['grid-template-columns:none'] if m[1] == 'none' else [f'grid-template-columns:repeat({m[1]},minmax(0,1fr))']
+
+
+@_rule(r'flex-(row|row-reverse|col|col-reverse)')
+def _flex_direction(m, neg):
+    return [f'flex-direction:{m[1].replace("col", "column")}']
+
+
+@_rule(r'flex-(wrap|wrap-reverse|nowrap)')
+def _flex_wrap(m, neg):
+    return [f'flex-wrap:{m[1]}']
+
+
+@_rule(r'items-(start|end|center|baseline|stretch)')
+def _align_items(m, neg):
+    return [f'align-items:{ {"start": "flex-start", "end": "flex-end"}.get(m[1], m[1]) }']
+
+
+@_rule(r'justify-(start|end|center|between|around|evenly)')
+def _justify_content(m, neg):
+    value = {'start': 'flex-start', 'end': 'flex-end', 'between': 'space-between',
+             'around': 'space-around', 'evenly': 'space-evenly'}.get(m[1], m[1])
+    return [f'justify-content:{value}']
+
+
+@_rule(r'gap(?:-([xy]))?-(.+)')
+def _gap(m, neg):
+    value = _spacing(m[2])
+    if value is None:
+        return None
+    prop = {'x': 'column-gap', 'y': 'row-gap'}.get(m[1], 'gap')
+    return [f'{prop}:{value}']
+
+
+@_rule(r'space-([xy])-(.+)')
+def _space(m, neg):
+    value = _spacing(m[2], neg)
+    if value is None:
+        return None
+    start, end = ('left', 'right') if m[1] == 'x' else ('top', 'bottom')
+    return [
+        f'--tw-space-{m[1]}-reverse:0',
+        f'margin-{end}:calc({value}*var(--tw-space-{m[1]}-reverse))',
+        f'margin-{start}:calc({value}*calc(1 - var(--tw-space-{m[1]}-reverse)))',
+    ], '>:not([hidden])~:not([hidden])'
+
+
+# After space-x-*/space-y-*, which reset the flag
+@_rule(r'space-([xy])-reverse')
+def _space_reverse(m, neg):
+    return [f'--tw-space-{m[1]}-reverse:1'], '>:not([hidden])~:not([hidden])'
+
+
+@_rule(r'overflow(?:-([xy]))?-(auto|hidden|visible|scroll|clip)')
+def _overflow(m, neg):
+    return [f'overflow{"-" + m[1] if m[1] else ""}:{m[2]}']
+
+
+@_rule(r'(whitespace)-(normal|nowrap|pre|pre-line|pre-wrap)')
+def _whitespace(m, neg):
+    return [f'white-space:{m[2]}']
+
+
+@_rule(r'(truncate)')
+def _truncate(m, neg):
+    return ['overflow:hidden', 'text-overflow:ellipsis', 'white-space:nowrap']
+
+
+@_rule(r'rounded(?:-([trbl]|tl|tr|br|bl))?(?:-(none|sm|md|lg|xl|2xl|3xl|full))?')
+def _rounded(m, neg):
+    value = RADII[m[2] or '']
+    corners = {
+        None: ('',), 't': ('-top-left', '-top-right'), 'r': ('-top-right', '-bottom-right'),
+        'b': ('-bottom-right', '-bottom-left'), 'l': ('-top-left', '-bottom-left'),
+        'tl': ('-top-left',), 'tr': ('-top-right',), 'br': ('-bottom-right',), 'bl': ('-bottom-left',),
+    }[m[1]]
+    return [f'border{corner}-radius:{value}' for corner in corners]
+
+
+@_rule(r'border(?:-([xytrbl]))?(?:-(0|2|4|8))?')
+def _border_width(m, neg):
+    return [f'border{side}-width:{BORDER_WIDTHS[m[2] or ""]}' for side in SIDES[m[1] or '']]
+
+
+@_rule(r'border-(solid|dashed|dotted|double|none)')
+def _border_style(m, neg):
+    return [f'border-style:{m[1]}']
+
+
+@_rule(r'border(?:-([xytrbl]))?-(.+)')
+def _border_color(m, neg):
+    color = _color(m[2])
+    return color and [f'border{side}-color:{color}' for side in SIDES[m[1] or '']]
+
+
+@_rule(r'bg-(.+)')
+def _background_color(m, neg):
+    color = _color(m[1])
+    return color and [f'background-color:{color}']
+
+
+@_rule(r'bg-gradient-to-(t|tr|r|br|b|bl|l|tl)')
+def _background_gradient(m, neg):
+    return [f'background-image:linear-gradient({GRADIENT_DIRECTIONS[m[1]]},var(--tw-gradient-stops))']
+
+
+@_rule(r'from-(.+)')
+def _gradient_from(m, neg):
+    color = _color(m[1])
+    return color and [
+        f'--tw-gradient-from:{color}', '--tw-gradient-to:transparent',
+        '--tw-gradient-stops:var(--tw-gradient-from),var(--tw-gradient-to)',
+    ]
+
+
+@_rule(r'via-(.+)')
+def _gradient_via(m, neg):
+    color = _color(m[1])
+    return color and [
+        '--tw-gradient-to:transparent',
+        f'--tw-gradient-stops:var(--tw-gradient-from),{color},var(--tw-gradient-to)',
+    ]
+
+
+@_rule(r'to-(.+)')
+def _gradient_to(m, neg):
+    color = _color(m[1])
+    return color and [f'--tw-gradient-to:{color}']
+
+
+@_rule(r'object-(contain|cover|fill|none|scale-down)')
+def _object_fit(m, neg):
+    return [f'object-fit:{m[1]}']
+
+
+@_rule(r'p([xytrbl]?)-(.+)')
+def _padding(m, neg):
+    value = _spacing(m[2])
+    return value and [f'padding{side}:{value}' for side in SIDES[m[1]]]
+
+
+@_rule(r'text-(left|center|right|justify|start|end)')
+def _text_align(m, neg):
+    return [f'text-align:{m[1]}']
+
+
+@_rule(r'font-(sans|serif|mono)')
+def _font_family(m, neg):
+    return [{
+        'sans': 'font-family:ui-sans-serif,system-ui,sans-serif',
+        'serif': 'font-family:ui-serif,Georgia,Cambria,"Times New Roman",Times,serif',
+        'mono': 'font-family:ui-monospace,SFMono-Regular,Menlo,Monaco,Consolas,monospace',
+    }[m[1]]]
+
+
+@_rule(r'text-(xs|sm|base|lg|xl|[2-9]xl)')
+def _font_size(m, neg):
+    size, line_height = FONT_SIZES[m[1]]
+    return [f'font-size:{size}', f'line-height:{line_height}']
+
+
+@_rule(r'font-(thin|extralight|light|normal|medium|semibold|bold|extrabold|black)')
+def _font_weight(m, neg):
+    return [f'font-weight:{FONT_WEIGHTS[m[1]]}']
+
+
+@_rule(r'(italic|not-italic)')
+def _font_style(m, neg):
+    return [f'font-style:{"italic" if m[1] == "italic" else "normal"}']
+
+
+@_rule(r'leading-(.+)')
+def _line_height(m, neg):
+    value = LINE_HEIGHTS.get(m[1]) or _arbitrary(m[1])
+    return value and [f'line-height:{value}']
+
+
+@_rule(r'tracking-(tighter|tight|normal|wide|wider|widest)')
+def _letter_spacing(m, neg):
+    values = {'tighter': '-0.05em', 'tight': '-0.025em', 'normal': '0em',
+              'wide': '0.025em', 'wider': '0.05em', 'widest': '0.1em'}
+    return [f'letter-spacing:{values[m[1]]}']
+
+
+@_rule(r'text-(.+)')
+def _text_color(m, neg):
+    color = _color(m[1])
+    return color and [f'color:{color}']
+
+
+@_rule(r'(underline|no-underline|line-through)')
+def _text_decoration(m, neg):
+    return [f'text-decoration-line:{"none" if m[1] == "no-underline" else m[1]}']
+
+
+@_rule(r'opacity-(\d+)')
+def _opacity(m, neg):
+    return [f'opacity:{int(m[1]) / 100:g}']
+
+
+@_rule(r'shadow(?:-(sm|md|lg|xl|2xl|inner|none))?')
+def _box_shadow(m, neg):
+    return [f'--tw-shadow:{SHADOWS[m[1] or ""]}', BOX_SHADOW]
+
+
+@_rule(r'outline-none')
+def _outline_none(m, neg):
+    return ['outline:2px solid transparent', 'outline-offset:2px']
+
+
+@_rule(r'ring(?:-(0|1|2|4|8))?')
+def _ring_width(m, neg):
+    width = m[1] or '3'
+    return [
+        '--tw-ring-offset-shadow:var(--tw-ring-inset) 0 0 0 var(--tw-ring-offset-width) var(--tw-ring-offset-color)',
+        f'--tw-ring-shadow:var(--tw-ring-inset) 0 0 0 calc({width}px + var(--tw-ring-offset-width)) var(--tw-ring-color)',
+        'box-shadow:var(--tw-ring-offset-shadow),var(--tw-ring-shadow),var(--tw-shadow,0 0 #0000)',
+    ]
+
+
+@_rule(r'ring-(.+)')
+def _ring_color(m, neg):
+    color = _color(m[1])
+    return color and [f'--tw-ring-color:{color}']
+
+
+@_rule(r'backdrop-blur(?:-(none|sm|md|lg|xl|2xl|3xl))?')
+def _backdrop_blur(m, neg):
+    blur = f'blur({BLURS[m[1] or ""]})'
+    return [f'-webkit-backdrop-filter:{blur}', f'backdrop-filter:{blur}']
+
+
+@_rule(r'transition(?:-(all|colors|opacity|shadow|transform|none))?')
+def _transition(m, neg):
+    if m[1] == 'none':
+        return ['transition-property:none']
+    return [
+        f'transition-property:{TRANSITIONS[m[1] or ""]}',
+        'transition-timing-function:cubic-bezier(0.4,0,0.2,1)',
+        'transition-duration:150ms',
+    ]
+
+
+@_rule(r'duration-(\d+)')
+def _duration(m, neg):
+    return [f'transition-duration:{m[1]}ms']
+
+
+@_rule(r'delay-(\d+)')
+def _delay(m, neg):
+    return [f'transition-delay:{m[1]}ms']
+
+
+@_rule(r'ease-(linear|in|out|in-out)')
+def _ease(m, neg):
+    return [f'transition-timing-function:{EASINGS[m[1]]}']
+
+
+# Compilation -------------------------------------------------------------
+
+def _escape(class_name):
+    return re.sub(r'([^a-zA-Z0-9_-])', r'\\\1', class_name)
+
+
+def _split_variants(class_name):
+    """Split 'md:hover:bg-white/50' into (['md', 'hover'], 'bg-white/50')"""
+    parts = re.split(r':(?![^\[]*\])', class_name)
+    return parts[:-1], parts[-1]
+
+
+def resolve(class_name):
+    """
+    Return (sort key, media query or None, CSS rule) for a Tailwind class, or
+    None when it is not one we can compile.
+    """
+    variants, utility = _split_variants(class_name)
+    negative = utility.startswith('-')
+    if negative:
+        utility = utility[1:]
+
+    for index, (pattern, func) in enumerate(_RULES):
+        match = pattern.match(utility)
+        if not match:
+            continue
+        result = func(match, negative)
+        if result:
+            break
+    else:
+        return None
+
+    declarations, child = result if isinstance(result, tuple) else (result, '')
+    selector = '.' + _escape(class_name)
+    media, screen_rank, variant_rank, prefix = None, 0, 0, ''
+    for variant in variants:
+        if variant in SCREENS:
+            media = f'(min-width:{SCREENS[variant]})'
+            screen_rank = list(SCREENS).index(variant) + 1
+        elif variant in PSEUDO_VARIANTS:
+            selector += PSEUDO_VARIANTS[variant]
+            variant_rank = max(variant_rank, list(PSEUDO_VARIANTS).index(variant) + 1)
+        elif variant in GROUP_VARIANTS:
+            prefix = f'.group{GROUP_VARIANTS[variant]} '
+            variant_rank = max(variant_rank, len(PSEUDO_VARIANTS) + 1)
+        elif variant == 'dark':
+            prefix = '.dark ' + prefix
+            variant_rank = len(PSEUDO_VARIANTS) + 2
+        else:
+            return None
+    rule = f'{prefix}{selector}{child}{{{";".join(declarations)}}}'
+    return (screen_rank, variant_rank, index, class_name), media, rule
+
+
+def compile_css(class_names):
+    """Compile `class_names` into minified CSS; returns (css, set of compiled classes)"""
+    resolved = [r for r in map(resolve, set(class_names)) if r is not None]
+    resolved.sort(key=lambda item: item[0])
+
+    chunks = [PREFLIGHT]
+    open_media = None
+    for _, media, rule in resolved:
+        if media != open_media:
+            if open_media:
+                chunks.append('}')
+            if media:
+                chunks.append(f'@media {media}{{')
+            open_media = media
+        chunks.append(rule)
+    if open_media:
+        chunks.append('}')
+    return ''.join(chunks), {key[3] for key, _, _ in resolved}
+
+
+# Template scanning -------------------------------------------------------
+
+_TEMPLATE_TAG = re.compile(r'{%.*?%}|{#.*?#}', re.S)
+# A variable glued to a class name (animate-delay-{{ n }}00) makes it unknowable
+_TEMPLATE_VARIABLE = re.compile(r'{{.*?}}', re.S)
+_CLASS_ATTRIBUTE = re.compile(r'''(?<![\w:-])(?:class|x-transition:[\w-]+)\s*=\s*(["'])(.*?)\1''', re.S)
+_BOUND_CLASS = re.compile(r'''(?<![\w-])(?::class|x-bind:class)\s*=\s*"(.*?)"''', re.S)
+_JS_STRING = re.compile(r"""'([^']*)'|`([^`]*)`""")
+_CLASS_TOKEN = re.compile(r'^-?[a-z0-9\[][\w\-:/.\[\]#%()]*$', re.I)
+
+
+def classes_in_template(text):
+    """Return every candidate class name used in the template source `text`"""
+    def strip(value):
+        return _TEMPLATE_VARIABLE.sub('\x00', _TEMPLATE_TAG.sub(' ', value))
+
+    classes = set()
+    for match in _CLASS_ATTRIBUTE.finditer(text):
+        classes.update(strip(match[2]).split())
+    for match in _BOUND_CLASS.finditer(text):
+        # Alpine expressions: the class names are the quoted strings
+        for literal in _JS_STRING.finditer(strip(match[1])):
+            classes.update((literal[1] or literal[2] or '').split())
+    return {name for name in classes if _CLASS_TOKEN.match(name)}
+
+
+def template_files():
+    for directory in settings.TEMPLATES[0]['DIRS']:
+        yield from sorted(Path(directory).glob('*.html'))
+
+
+def stylesheet_dir():
+    return Path(settings.STATICFILES_DIRS[0]) / OUTPUT_DIR
+
+
+def build():
+    """
+    Compile the classes used by the templates into
+    static/css/tailwind.<hash>.css, drop older builds and record the name in
+    static/css/tailwind.json. Returns (path, compiled classes, unknown classes).
+    """
+    classes = set()
+    for path in template_files():
+        classes |= classes_in_template(path.read_text(encoding='utf-8'))
+    css, compiled = compile_css(classes)
+
+    directory = stylesheet_dir()
+    digest = hashlib.md5(css.encode()).hexdigest()[:10]
+    path = directory / f'tailwind.{digest}.css'
+    for old in directory.glob('tailwind.*.css'):
+        if old != path:
+            old.unlink()
+    path.write_text(css, encoding='utf-8')
+    (directory / MANIFEST_NAME).write_text(
+        json.dumps({'stylesheet': f'{OUTPUT_DIR}/{path.name}'}, indent=2) + '\n', encoding='utf-8'
+    )
+    stylesheet_name.cache_clear()
+    return path, compiled, classes - compiled
+
+
+@lru_cache(maxsize=None)
+def stylesheet_name():
+    """Static name of the current build, from static/css/tailwind.json"""
+    manifest = stylesheet_dir() / MANIFEST_NAME
+    return json.loads(manifest.read_text(encoding='utf-8'))['stylesheet']
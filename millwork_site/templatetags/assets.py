@@ -0,0 +1,60 @@
+from django import template
+from django.templatetags.static import static
+from django.utils import translation
+from django.utils.html import format_html, format_html_join, mark_safe
+
+from millwork_site import critical_css, vendor
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def page_stylesheets(context):
+    """
+    Inline the critical CSS of the page being rendered and load the full
+    site stylesheets without blocking the first paint.
+    """
+    urls = [static(name) for name in critical_css.stylesheets()]
+    template_name = getattr(context.template, 'name', None)
+    if not template_name:
+        return format_html_join('\n', '<link rel="stylesheet" href="{}">', ((url,) for url in urls))
+
+    critical = critical_css.get(template_name)
+    links = format_html_join(
+        '\n',
+        '<link rel="preload" href="{0}" as="style" onload="this.onload=null;this.rel=\'stylesheet\'">'
+        '<noscript><link rel="stylesheet" href="{0}"></noscript>',
+        ((url,) for url in urls),
+    )
+    return format_html('<style>{}</style>\n{}', mark_safe(critical), links)
+
+
+
+@register.simple_tag
+def font_faces():
+    """
+    @font-face rules for the self-hosted fonts (`manage.py
+    build_vendor_assets`), preloading the files for the active language.
+    """
+    faces = vendor.manifest().get('faces')
+    if not faces:
+        return format_html('<link href="{}" rel="stylesheet">', vendor.GOOGLE_FONTS_CSS_URL)
+
+    script = 'arabic' if translation.get_language_bidi() else 'latin'
+    preloads = dict.fromkeys(static(face['file']) for face in faces if face['script'] == script)
+    rules = ''.join(
+        "@font-face{font-family:'%s';font-style:normal;font-weight:%s;font-display:swap;"
+        "src:url(%s) format('woff2');unicode-range:%s}"
+        % (face['family'], face['weight'], static(face['file']), face['unicode_range'])
+        for face in faces
+    )
+    links = format_html_join(
+        '\n', '<link rel="preload" href="{}" as="font" type="font/woff2" crossorigin>', ((url,) for url in preloads)
+    )
+    return format_html('{}\n<style>{}</style>', links, mark_safe(rules))
+
+
+@register.simple_tag
+def alpine_script():
+    name = vendor.manifest().get('scripts', {}).get('alpine')
+    return format_html('<script defer src="{}"></script>', static(name) if name else vendor.ALPINE_URL)
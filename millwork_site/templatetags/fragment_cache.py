@@ -0,0 +1,57 @@
+import time
+
+from django import template
+
+from millwork_site import fragments, regeneration
+
+register = template.Library()
+
+
+class FragmentCacheNode(template.Node):
+    def __init__(self, nodelist, name):
+        self.nodelist = nodelist
+        self.name = name
+
+    def render(self, context):
+        key = fragments.fragment_key(self.name)
+        cached = fragments.get_fragment(key)
+        if cached is not None:
+            html, render_seconds = cached
+            fragments.record_hit(self.name, render_seconds)
+            return html
+
+        def build():
+            start = time.perf_counter()
+            html = self.nodelist.render(context)
+            return html, time.perf_counter() - start
+
+        (html, render_seconds), outcome = regeneration.regenerate(
+            key, fragments.stale_fragment_key(self.name), build, fragments.fragment_timeout()
+        )
+        if outcome == regeneration.BUILT:
+            fragments.record_miss(self.name)
+        elif outcome == regeneration.STALE:
+            fragments.record_stale(self.name)
+        else:
+            fragments.record_hit(self.name, render_seconds)
+        return html
+
+
+@register.tag
+def cachefragment(parser, token):
+    """
+    Cache the enclosed template section under a registered fragment name:
+
+        {% cachefragment 'testimonials' %} ... {% endcachefragment %}
+
+    The fragment's models are listed in millwork_site.fragments.FRAGMENTS.
+    """
+    bits = token.split_contents()
+    if len(bits) != 2 or bits[1][0] not in '\'"' or bits[1][-1] != bits[1][0]:
+        raise template.TemplateSyntaxError(f"'{bits[0]}' takes a single quoted fragment name")
+    name = bits[1][1:-1]
+    if name not in fragments.FRAGMENTS:
+        raise template.TemplateSyntaxError(f"Unknown fragment '{name}'")
+    nodelist = parser.parse(('endcachefragment',))
+    parser.delete_first_token()
+    return FragmentCacheNode(nodelist, name)
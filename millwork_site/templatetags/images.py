@@ -0,0 +1,59 @@
+from django import template
+from django.core.files.storage import default_storage
+from django.utils.html import format_html, format_html_join
+
+from millwork_site import images, resizing
+
+register = template.Library()
+
+# Cards sit in a 1/2/3 column grid
+CARD_SIZES = '(min-width: 1024px) 33vw, (min-width: 768px) 50vw, 100vw'
+
+
+def _srcset(name, widths, image_format):
+    return ', '.join(
+        f'{default_storage.url(images.derivative_name(name, width, image_format))} {width}w'
+        for width in widths
+    )
+
+
+@register.simple_tag
+def responsive_image(image, sizes=CARD_SIZES, **attrs):
+    """
+    Render `image` (an ImageField file) as a <picture> offering its WebP and
+    JPEG derivatives, falling back to the original upload:
+
+        {% responsive_image project.image sizes='100vw' alt=project.title class='w-full' %}
+
+    Pass `placeholder=project` to paint the row's stored preview and
+    dominant colour behind the image until it has loaded.
+    """
+    if not image:
+        return ''
+    placeholder = attrs.pop('placeholder', None)
+    if placeholder is not None and placeholder.image_color:
+        attrs['style'] = (
+            f'background: {placeholder.image_color} url({placeholder.image_placeholder}) center / cover no-repeat'
+        )
+    attrs.setdefault('loading', 'lazy')
+    attrs.setdefault('decoding', 'async')
+    extra = format_html_join('', ' {}="{}"', attrs.items())
+
+    widths = images.available_widths(image.name)
+    if not widths:
+        return format_html('<img src="{}"{}>', image.url, extra)
+    return format_html(
+        '<picture><source type="image/webp" srcset="{}" sizes="{}">'
+        '<img src="{}" srcset="{}" sizes="{}"{}></picture>',
+        _srcset(image.name, widths, 'webp'), sizes,
+        image.url, _srcset(image.name, widths, 'jpeg'), sizes, extra,
+    )
+
+
+@register.simple_tag
+def resized_url(image, width, height=0):
+    """Signed URL of `image` resized on demand: {% resized_url project.image 600 400 %}"""
+    if not image:
+        return ''
+    return resizing.resized_url(image.name, width, height)
+
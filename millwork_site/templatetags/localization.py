@@ -0,0 +1,28 @@
+from django import template
+from django.urls import translate_url
+from django.utils import translation
+
+register = template.Library()
+
+
+@register.filter
+def localized(obj, field):
+    """
+    Return `field` of `obj` in the active language, e.g. `title_arabic` for
+    Arabic pages, falling back to the English value when it is empty
+    """
+    if obj is None:
+        return ''
+    if translation.get_language() == 'ar':
+        value = getattr(obj, f'{field}_arabic', '')
+        if value:
+            return value
+    return getattr(obj, field, '')
+
+
+@register.simple_tag(takes_context=True)
+def translated_url(context, language, absolute=False):
+    """URL of the current page in `language`, keeping the query string"""
+    request = context['request']
+    url = translate_url(request.get_full_path(), language)
+    return request.build_absolute_uri(url) if absolute else url
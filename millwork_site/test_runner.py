@@ -0,0 +1,30 @@
+"""
+Test runner that keeps the test run's cache out of var/cache.sqlite3.
+
+The shared SQLite cache outlives the process, and the tests clear it and
+read its counters, so each run gets a throwaway cache file instead.
+"""
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+class SiteTestRunner(DiscoverRunner):
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._cache_dir = tempfile.TemporaryDirectory()
+        caches = {
+            alias: {**config, 'LOCATION': Path(self._cache_dir.name) / f'{alias}.sqlite3'}
+            if config['BACKEND'].endswith('SQLiteCache') else config
+            for alias, config in settings.CACHES.items()
+        }
+        self._cache_override = override_settings(CACHES=caches)
+        self._cache_override.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self._cache_override.disable()
+        self._cache_dir.cleanup()
+        super().teardown_test_environment(**kwargs)
@@ -1,3 +1,1388 @@
-from django.test import TestCase
+import gzip
+import json
+import multiprocessing
+import os
+import re
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from io import BytesIO, StringIO
+from pathlib import Path
+from unittest import mock, skipIf
+
+from django.contrib.auth.models import User
+from django.contrib.sessions.models import Session
+from django.core.cache import cache, caches
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.management import call_command
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.conf import settings
+from django.db import OperationalError, connection, connections
+from django.http import HttpResponse
+from django.template import RequestContext, Template
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone, translation
+from django.utils.http import http_date
+from PIL import Image
+
+from . import (
+    checks, critical_css, fragments, freshness, images, page_cache, query_cache, regeneration, resizing, routers, singletons,
+    sitemap, stats, tailwind, vendor, versions, warmup,
+)
+from .cache_backends import SQLiteCache
+from .middleware import PrecompressedStaticMiddleware
+from .models import (
+    CompanyInfo, CompanyStatistics, ContactMessage, PageContent, Project, ProjectImage, Service, Testimonial,
+)
+from .pagination import KeysetPaginator
+from .queries import top_projects_per_category, with_gallery
+
+
+def make_project(**kwargs):
+    defaults = {
+        'title': 'Project',
+        'description': 'Description',
+        'image': 'projects/test.jpg',
+        'category': 'aluminium_kitchen',
+    }
+    defaults.update(kwargs)
+    return Project.objects.create(**defaults)
+
+
+def make_upload(name='photo.jpg', size=(1600, 900)):
+    buffer = BytesIO()
+    Image.new('RGB', size, (120, 80, 40)).save(buffer, format='JPEG')
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/jpeg')
+
+
+class SiteTestCase(TestCase):
+    """Start every test with empty caches, since rolled-back rows send no signals"""
+    databases = {'default', 'replica'}
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # Public views read from the replica, a test mirror of default. Give it
+        # default's connection so it sees the rows of the test's transaction.
+        cls.replica_connection = connections['replica']
+        connections['replica'] = connections['default']
+
+    @classmethod
+    def tearDownClass(cls):
+        connections['replica'] = cls.replica_connection
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        singletons.clear()
+        stats.clear()
+        # A request to /ar/ leaves Arabic active in the test thread
+        translation.activate('en')
+
+
+class TopProjectsPerCategoryTests(SiteTestCase):
+    def test_groups_first_projects_of_each_category_in_one_query(self):
+        for order in range(5):
+            make_project(title=f'Kitchen {order}', order=order)
+        make_project(title='Partition', category='glass_door_partition')
+        make_project(title='Hidden', category='glass_door_partition', is_active=False)
+
+        with self.assertNumQueries(1):
+            groups = top_projects_per_category(limit=3)
+
+        self.assertEqual([group['key'] for group in groups], ['aluminium_kitchen', 'glass_door_partition'])
+        self.assertEqual(groups[0]['name'], 'Aluminium Kitchen Cabinet Luxurious Design')
+        self.assertEqual([p.title for p in groups[0]['projects']], ['Kitchen 0', 'Kitchen 1', 'Kitchen 2'])
+        self.assertEqual([p.title for p in groups[1]['projects']], ['Partition'])
+
+    def test_home_page_renders_category_showcase(self):
+        make_project(title='Showcase Kitchen')
+        response = self.client.get(reverse('home'))
+        self.assertContains(response, 'Showcase Kitchen')
+
+
+class GalleryPrefetchTests(SiteTestCase):
+    def portfolio_query_count(self):
+        # Retire the cached page and the cached project querysets
+        page_cache.bump_content_generation()
+        versions.bump_table_version(Project._meta.db_table)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('portfolio'))
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries)
+
+    def test_portfolio_query_count_does_not_grow_with_page_size(self):
+        project = make_project()
+        ProjectImage.objects.create(project=project, image='projects/gallery/a.jpg')
+        self.portfolio_query_count()  # warm the singleton cache
+        baseline = self.portfolio_query_count()
+
+        for n in range(8):
+            extra = make_project(title=f'Extra {n}')
+            ProjectImage.objects.create(project=extra, image='projects/gallery/b.jpg')
+            ProjectImage.objects.create(project=extra, image='projects/gallery/c.jpg')
+
+        self.assertEqual(self.portfolio_query_count(), baseline)
+
+    def test_slider_renders_prefetched_gallery(self):
+        project = make_project()
+        ProjectImage.objects.create(project=project, image='projects/gallery/a.jpg', caption='Side view')
+        response = self.client.get(reverse('portfolio'))
+        self.assertContains(response, 'totalSlides: 2')
+        self.assertContains(response, 'projects/gallery/a.jpg')
+
+
+class SingletonCacheTests(SiteTestCase):
+    def test_company_info_is_served_without_queries_once_cached(self):
+        CompanyInfo.objects.create(name='Royal', description='d', address='a', phone='1', email='a@b.qa')
+        self.assertEqual(singletons.get_company_info().name, 'Royal')
+        with self.assertNumQueries(0):
+            self.assertEqual(singletons.get_company_info().name, 'Royal')
+
+    def test_missing_rows_are_cached_too(self):
+        self.assertIsNone(singletons.get_page_content('about'))
+        with self.assertNumQueries(0):
+            self.assertIsNone(singletons.get_page_content('about'))
+
+    def test_save_and_delete_invalidate(self):
+        info = CompanyInfo.objects.create(name='Royal', description='d', address='a', phone='1', email='a@b.qa')
+        singletons.get_company_info()
+        info.name = 'Royal Qatar'
+        with self.captureOnCommitCallbacks(execute=True):
+            info.save()
+        self.assertEqual(singletons.get_company_info().name, 'Royal Qatar')
+
+        page = PageContent.objects.create(page='about', title='About us')
+        self.assertEqual(singletons.get_page_content('about').title, 'About us')
+        with self.captureOnCommitCallbacks(execute=True):
+            page.delete()
+        self.assertIsNone(singletons.get_page_content('about'))
+
+    def test_edits_in_other_workers_drop_the_memo(self):
+        info = CompanyInfo.objects.create(name='Royal', description='d', address='a', phone='1', email='a@b.qa')
+        singletons.get_company_info()
+
+        # Another worker saves the row: it moves the generation, but can't
+        # touch this process' memo
+        CompanyInfo.objects.filter(pk=info.pk).update(name='Royal Qatar')
+        page_cache.bump_content_generation()
+        self.assertEqual(singletons.get_company_info().name, 'Royal Qatar')
+
+    def test_old_rows_stored_after_the_commit_are_not_served(self):
+        info = CompanyInfo.objects.create(name='Royal', description='d', address='a', phone='1', email='a@b.qa')
+        generation = page_cache.content_generation()
+        # A worker reads the row just before the admin's edit commits...
+        stale = CompanyInfo.objects.get()
+        info.name = 'Royal Qatar'
+        with self.captureOnCommitCallbacks(execute=True):
+            info.save()
+        # ...and stores it once the invalidation has run
+        cache.set(singletons._key('company_info', generation), stale)
+        singletons.clear()
+        self.assertEqual(singletons.get_company_info().name, 'Royal Qatar')
+
+
+class PageCacheTests(SiteTestCase):
+    def test_anonymous_get_is_served_from_cache_without_queries(self):
+        make_project(title='Cached Kitchen')
+        self.client.get(reverse('portfolio'))
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('portfolio'))
+        self.assertContains(response, 'Cached Kitchen')
+        self.assertEqual(page_cache.page_cache_stats(), {'hits': 1, 'misses': 1, 'stale': 0, 'bypasses': 0})
+
+    def test_query_string_is_part_of_the_key(self):
+        make_project(title='Kitchen', category='aluminium_kitchen')
+        make_project(title='Partition', category='glass_door_partition')
+        self.client.get(reverse('portfolio'))
+        response = self.client.get(reverse('portfolio'), {'category': 'glass_door_partition'})
+        self.assertNotContains(response, '>Kitchen<')
+        self.assertContains(response, 'Partition')
+
+    def test_saving_content_retires_cached_pages(self):
+        service = Service.objects.create(name='Windows', description='d')
+        self.client.get(reverse('services'))
+        service.name = 'Sliding Windows'
+        with self.captureOnCommitCallbacks(execute=True):
+            service.save()
+        self.assertContains(self.client.get(reverse('services')), 'Sliding Windows')
+
+    def test_cached_pages_are_retired_only_when_the_write_commits(self):
+        generation = page_cache.content_generation()
+        with self.captureOnCommitCallbacks(execute=True):
+            Service.objects.create(name='Windows', description='d')
+            self.assertEqual(page_cache.content_generation(), generation)
+        self.assertNotEqual(page_cache.content_generation(), generation)
+
+    def test_contact_submissions_do_not_retire_cached_pages(self):
+        generation = page_cache.content_generation()
+        ContactMessage.objects.create(first_name='A', last_name='B', email='a@b.qa', message='Hi')
+        self.assertEqual(page_cache.content_generation(), generation)
+
+    def test_pages_using_a_csrf_token_are_not_cached(self):
+        @page_cache.cache_public_page
+        def form_view(request):
+            return HttpResponse(Template('{% csrf_token %}').render(RequestContext(request)))
+
+        first = form_view(RequestFactory().get('/form/'))
+        second = form_view(RequestFactory().get('/form/'))
+        self.assertNotEqual(first.content, second.content)
+        self.assertEqual(page_cache.page_cache_stats()['hits'], 0)
+
+    def test_visitors_with_a_session_bypass_the_cache(self):
+        self.client.cookies['sessionid'] = 'abc'
+        self.client.get(reverse('about'))
+        self.assertEqual(page_cache.page_cache_stats()['bypasses'], 1)
+
+
+class RegenerationTests(SiteTestCase):
+    burst = 8
+
+    def setUp(self):
+        super().setUp()
+        self.builds = 0
+        self.served = []
+
+    def make_view(self, wait_for_others=True):
+        def view(request):
+            self.builds += 1
+            version = self.builds
+            # Keep the rebuild in flight until every other request has been answered
+            deadline = time.monotonic() + 5
+            while wait_for_others and len(self.served) < self.burst - 1 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            return HttpResponse(f'version {version}')
+        return page_cache.cache_public_page(view)
+
+    def run_burst(self, view):
+        barrier = threading.Barrier(self.burst)
+
+        def request_page(_):
+            barrier.wait()
+            response = view(RequestFactory().get('/burst/'))
+            self.served.append(response.content.decode())
+            return response
+
+        with ThreadPoolExecutor(self.burst) as executor:
+            list(executor.map(request_page, range(self.burst)))
+        return sorted(self.served)
+
+    def test_one_request_rebuilds_while_the_rest_get_the_previous_copy(self):
+        view = self.make_view()
+        view(RequestFactory().get('/burst/'))
+        page_cache.bump_content_generation()
+        page_cache.reset_page_cache_stats()
+
+        served = self.run_burst(view)
+        self.assertEqual(self.builds, 2)
+        self.assertEqual(served, ['version 1'] * (self.burst - 1) + ['version 2'])
+        self.assertEqual(page_cache.page_cache_stats()['stale'], self.burst - 1)
+        self.assertEqual(view(RequestFactory().get('/burst/')).content, b'version 2')
+
+    def test_cold_misses_wait_for_the_first_build(self):
+        served = self.run_burst(self.make_view(wait_for_others=False))
+        self.assertEqual(self.builds, 1)
+        self.assertEqual(served, ['version 1'] * self.burst)
+
+    def test_last_good_copy_is_served_when_the_database_fails(self):
+        make_project(title='Cached Kitchen')
+        self.client.get(reverse('portfolio'))
+        page_cache.bump_content_generation()
+
+        locked = OperationalError('database is locked')
+        with mock.patch('django.db.backends.sqlite3.base.SQLiteCursorWrapper.execute', side_effect=locked), \
+                self.assertLogs('millwork_site.regeneration', 'WARNING'):
+            response = self.client.get(reverse('portfolio'))
+        self.assertContains(response, 'Cached Kitchen')
+        self.assertEqual(page_cache.page_cache_stats()['stale'], 1)
+
+    def test_stale_copies_carry_no_validators(self):
+        CompanyInfo.objects.create(name='Royal', description='d', address='a', phone='1', email='a@b.qa')
+        self.client.get(reverse('about'))
+        info = CompanyInfo.objects.get()
+        info.name = 'Royal Qatar'
+        with self.captureOnCommitCallbacks(execute=True):
+            info.save()
+
+        # Another worker is rebuilding the page for the new content
+        key = page_cache.page_cache_key(RequestFactory().get(reverse('about')))
+        cache.add(regeneration.LOCK_PREFIX + key, 'other', 30)
+        response = self.client.get(reverse('about'))
+        self.assertContains(response, 'Royal')
+        self.assertNotContains(response, 'Royal Qatar')
+        self.assertFalse(response.has_header('ETag'))
+        self.assertFalse(response.has_header('Last-Modified'))
+        self.assertIn('no-store', response['Cache-Control'])
+
+    def test_database_errors_propagate_without_a_previous_copy(self):
+        def view(request):
+            raise OperationalError('database is locked')
+
+        with self.assertRaises(OperationalError):
+            page_cache.cache_public_page(view)(RequestFactory().get('/burst/'))
+
+    def test_fragment_being_rebuilt_elsewhere_is_served_stale(self):
+        testimonial = Testimonial.objects.create(customer_name='Client', testimonial='Great work')
+        self.client.get('/')
+        testimonial.testimonial = 'Even better work'
+        with self.captureOnCommitCallbacks(execute=True):
+            testimonial.save()
+
+        # Another worker holds the rebuild lock for the new version
+        cache.add(regeneration.LOCK_PREFIX + fragments.fragment_key('testimonials'), 'other', 30)
+        response = self.client.get('/')
+        self.assertContains(response, 'Great work')
+        self.assertEqual(fragments.fragment_stats()['testimonials']['stale'], 1)
+
+
+class StatsTests(SiteTestCase):
+    def test_increments_are_written_once_per_interval(self):
+        with override_settings(CACHE_STATS_FLUSH_INTERVAL=3600):
+            stats.flush()
+            for _ in range(3):
+                stats.increment('stats:test')
+            self.assertIsNone(cache.get('stats:test'))
+            self.assertEqual(stats.read(['stats:test']), {'stats:test': 3})
+            self.assertEqual(cache.get('stats:test'), 3)
+
+    def test_reset_drops_unflushed_increments(self):
+        with override_settings(CACHE_STATS_FLUSH_INTERVAL=3600):
+            stats.increment('stats:test')
+            stats.reset(['stats:test'])
+            self.assertEqual(stats.read(['stats:test']), {'stats:test': 0})
+
+
+class QueryCacheTests(SiteTestCase):
+    def test_results_are_cached_until_their_table_changes(self):
+        service = Service.objects.create(name='Windows', description='d')
+        self.assertEqual(list(Service.objects.filter(is_active=True).cached()), [service])
+        with self.assertNumQueries(0):
+            self.assertEqual(list(Service.objects.filter(is_active=True).cached()), [service])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Service.objects.create(name='Doors', description='d')
+        self.assertEqual(len(Service.objects.filter(is_active=True).cached()), 2)
+        stats = query_cache.query_cache_stats()['millwork_site.service']
+        self.assertEqual((stats['hits'], stats['misses']), (1, 2))
+        self.assertEqual(stats['entries'], 2)
+        self.assertGreater(stats['bytes'], 0)
+
+    def test_querysets_without_cached_always_query(self):
+        Service.objects.create(name='Windows', description='d')
+        list(Service.objects.filter(is_active=True))
+        with self.assertNumQueries(1):
+            list(Service.objects.filter(is_active=True))
+
+    def test_gallery_writes_retire_cached_projects(self):
+        project = make_project()
+        Service.objects.create(name='Windows', description='d')
+        list(Service.objects.cached())
+        projects = with_gallery(Project.objects.filter(is_active=True).cached())
+        self.assertEqual(len(list(projects)[0].additional_images.all()), 0)
+        with self.assertNumQueries(0):
+            self.assertEqual(len(list(projects.all())[0].additional_images.all()), 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ProjectImage.objects.create(project=project, image='projects/gallery/a.jpg')
+        self.assertEqual(len(list(projects.all())[0].additional_images.all()), 1)
+        with self.assertNumQueries(0):
+            list(Service.objects.cached())
+
+    def test_bulk_updates_retire_cached_results(self):
+        Service.objects.create(name='Windows', description='d')
+        list(Service.objects.filter(is_active=True).cached())
+        with self.captureOnCommitCallbacks(execute=True):
+            Service.objects.update(is_active=False)
+        self.assertEqual(list(Service.objects.filter(is_active=True).cached()), [])
+
+
+class WarmupTests(SiteTestCase):
+    host = 'royalaluminiumupvcqatar.com'
+
+    def test_public_urls_cover_languages_categories_and_pages(self):
+        for n in range(10):
+            make_project(title=f'Kitchen {n}', category='aluminium_kitchen')
+        urls = warmup.public_urls()
+        for path in ('/', '/about/', '/portfolio/', '/ar/', '/ar/contact/', '/sitemap.xml',
+                     '/portfolio/?category=aluminium_kitchen', '/ar/portfolio/?category=upvc_door_window'):
+            self.assertIn(path, urls)
+
+        # The second page, with the cursor the "next" link renders
+        response = self.client.get('/portfolio/?category=aluminium_kitchen')
+        next_link = re.search(r'href="\?(after=[^"]+)"', response.content.decode()).group(1)
+        self.assertIn(f'/portfolio/?{next_link.replace("&amp;", "&")}', urls)
+        self.assertEqual(len([url for url in urls if 'after=' in url]), 4)
+
+    def test_warmed_pages_are_served_from_cache(self):
+        make_project(title='Warm Kitchen')
+        results = warmup.warm(workers=1)
+        self.assertTrue(all(status == 200 for _, status, _ in results))
+        self.assertEqual(len(results), len(warmup.public_urls()))
+
+        with self.assertNumQueries(0):
+            response = self.client.get('/ar/portfolio/', HTTP_HOST=self.host, secure=True)
+        self.assertContains(response, 'Warm Kitchen')
+
+    def test_failures_are_reported_with_their_status(self):
+        with mock.patch('millwork_site.views.render', side_effect=OperationalError('database is locked')), \
+                self.assertLogs('millwork_site.warmup', 'WARNING'):
+            results = warmup.warm(['/about/', '/no-such-page/'], workers=1)
+        self.assertEqual([(path, status) for path, status, _ in results], [('/about/', 500), ('/no-such-page/', 404)])
+
+    def test_only_server_entry_points_warm_on_startup(self):
+        with mock.patch.object(warmup, 'warm_in_background') as warm_in_background:
+            self.assertIsNone(warmup.warm_on_startup())
+            with override_settings(WARM_CACHES_ON_STARTUP=True, WARM_CACHES_DELAY=0):
+                warmup.warm_on_startup()
+        warm_in_background.assert_called_once_with(delay=0)
+
+    def test_startup_warmup_runs_once_per_content_generation(self):
+        with mock.patch.object(warmup, 'warm', return_value=[]) as warm:
+            warmup.warm_in_background().join()
+            warmup.warm_in_background().join()
+        self.assertEqual(warm.call_count, 1)
+
+
+class AnonymousFastPathTests(SiteTestCase):
+    def test_anonymous_public_gets_skip_session_and_user(self):
+        with mock.patch('django.contrib.sessions.backends.db.SessionStore.load') as load, \
+                mock.patch('django.contrib.auth.get_user') as get_user:
+            response = self.client.get(reverse('about'))
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(hasattr(response.wsgi_request, 'session'))
+        self.assertTrue(response.wsgi_request.user.is_anonymous)
+        self.assertNotIn('Cookie', response.get('Vary', ''))
+        load.assert_not_called()
+        get_user.assert_not_called()
+
+    def test_everything_else_takes_the_full_stack(self):
+        self.client.cookies['sessionid'] = 'abc'
+        self.assertTrue(hasattr(self.client.get(reverse('about')).wsgi_request, 'session'))
+        del self.client.cookies['sessionid']
+        self.assertRedirects(self.client.get('/admin/'), '/admin/login/?next=/admin/')
+
+    def test_contact_page_is_cached_without_a_csrf_cookie(self):
+        first = self.client.get(reverse('contact'))
+        self.assertNotIn(settings.CSRF_COOKIE_NAME, first.cookies)
+        with self.assertNumQueries(0):
+            self.client.get(reverse('contact'))
+        self.assertEqual(page_cache.page_cache_stats()['hits'], 1)
+
+    def test_form_tells_visitors_without_javascript_how_to_reach_us(self):
+        response = self.client.get(reverse('contact'))
+        self.assertContains(response, '<noscript>')
+        self.assertContains(response, 'Sending this form needs JavaScript')
+
+    def test_form_posts_with_the_lazily_fetched_token(self):
+        client = self.client_class(enforce_csrf_checks=True)
+        data = {
+            'firstName': 'A', 'lastName': 'B', 'email': 'a@b.qa', 'phone': '1',
+            'projectType': 'other', 'budget': '', 'message': 'Hi',
+        }
+        self.assertEqual(client.post(reverse('contact'), data).status_code, 403)
+
+        response = client.get(reverse('csrf_token'))
+        self.assertIn('no-store', response['Cache-Control'])
+        data['csrfmiddlewaretoken'] = response.json()['token']
+        self.assertRedirects(client.post(reverse('contact'), data), reverse('contact'))
+        self.assertTrue(ContactMessage.objects.filter(email='a@b.qa').exists())
+
+
+class SessionStorageTests(SiteTestCase):
+    form = {
+        'firstName': 'A', 'lastName': 'B', 'email': 'a@b.qa', 'phone': '1',
+        'projectType': 'other', 'budget': '', 'message': 'Hi',
+    }
+
+    def test_contact_flow_only_writes_the_message(self):
+        with self.assertNumQueries(1):
+            response = self.client.post(reverse('contact'), self.form)
+        self.assertIn('messages', response.cookies)
+        self.assertContains(self.client.get(response.url), 'Thank you for your message')
+        self.assertFalse(Session.objects.exists())
+
+    def test_admin_sessions_live_in_the_sessions_cache(self):
+        User.objects.create_superuser('admin', 'admin@example.com', 'secret')
+        self.assertTrue(self.client.login(username='admin', password='secret'))
+        self.assertEqual(self.client.get('/admin/').status_code, 200)
+        session_key = self.client.cookies[settings.SESSION_COOKIE_NAME].value
+        self.assertTrue(caches['sessions'].has_key(f'django.contrib.sessions.cache{session_key}'))
+        self.assertFalse(Session.objects.exists())
+
+    def test_clear_db_sessions(self):
+        now = timezone.now()
+        Session.objects.bulk_create([
+            Session(session_key='expired', session_data='', expire_date=now - timedelta(days=1)),
+            Session(session_key='current', session_data='', expire_date=now + timedelta(days=1)),
+        ])
+        call_command('clear_db_sessions', '--expired-only', stdout=StringIO())
+        self.assertEqual(list(Session.objects.values_list('session_key', flat=True)), ['current'])
+        call_command('clear_db_sessions', stdout=StringIO())
+        self.assertFalse(Session.objects.exists())
+
+    def test_other_apps_keep_fast_deletes(self):
+        Session.objects.create(session_key='old', session_data='', expire_date=timezone.now())
+        # The cache invalidation receivers are only connected to the site's models
+        with self.assertNumQueries(1):
+            Session.objects.all().delete()
+
+
+class KeysetPaginationTests(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        # Equal `order` values force the created_at/id tie-breakers into play
+        self.projects = [make_project(title=f'P{n}', order=n // 4) for n in range(10)]
+        self.expected = list(Project.objects.filter(is_active=True))
+
+    def paginator(self):
+        return KeysetPaginator(Project.objects.filter(is_active=True), 3, Project._meta.ordering)
+
+    def test_walks_forward_and_back_in_ordering(self):
+        paginator = self.paginator()
+        pages = [paginator.get_page()]
+        while pages[-1].has_next:
+            pages.append(paginator.get_page(after=pages[-1].next_cursor))
+        self.assertEqual([p for page in pages for p in page], self.expected)
+        self.assertFalse(pages[0].has_previous)
+
+        previous = paginator.get_page(before=pages[2].previous_cursor)
+        self.assertEqual(list(previous), list(pages[1]))
+        self.assertTrue(previous.has_previous)
+
+    def test_deep_pages_cost_one_query(self):
+        paginator = self.paginator()
+        cursor = paginator.encode_cursor(self.expected[6])
+        with self.assertNumQueries(1):
+            page = paginator.get_page(after=cursor)
+        self.assertEqual(list(page), self.expected[7:10])
+
+    def test_cursors_do_not_change_over_time(self):
+        paginator = self.paginator()
+        cursor = paginator.encode_cursor(self.expected[2])
+        with mock.patch('time.time', return_value=time.time() + 5):
+            self.assertEqual(paginator.encode_cursor(self.expected[2]), cursor)
+
+    def test_tampered_cursor_falls_back_to_first_page(self):
+        page = self.paginator().get_page(after='not-a-cursor')
+        self.assertEqual(list(page), self.expected[:3])
+
+    def test_portfolio_links_to_next_cursor_within_category(self):
+        response = self.client.get(reverse('portfolio'), {'category': 'aluminium_kitchen'})
+        self.assertContains(response, '10 Projects')
+        next_cursor = response.context['projects'].next_cursor
+        self.assertContains(response, f'?after={next_cursor}&category=aluminium_kitchen')
+
+
+class SitemapTests(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        self.enterContext(override_settings(SITEMAP_ROOT=root.name, SITE_URL='https://example.com'))
+
+    def test_static_lastmod_comes_from_page_content(self):
+        page = PageContent.objects.create(page='about', title='About')
+        response = self.client.get('/sitemap.xml')
+        body = b''.join(response.streaming_content).decode()
+        self.assertIn('<loc>https://example.com/about/</loc>', body)
+        self.assertIn('<loc>https://example.com/ar/about/</loc>', body)
+        self.assertIn(f'<lastmod>{page.updated_at:%Y-%m-%d}</lastmod>', body)
+        self.assertEqual(body.count('<lastmod>'), 2)
+
+    def test_stored_copy_is_reused_until_projects_change(self):
+        project = make_project()
+        self.client.get('/sitemap.xml')
+        with self.assertNumQueries(0):
+            self.client.get('/sitemap.xml')
+        pk = project.pk
+        with self.captureOnCommitCallbacks(execute=True):
+            project.delete()
+        response = self.client.get('/sitemap.xml')
+        self.assertNotIn(f'project={pk}<', b''.join(response.streaming_content).decode())
+        # The new generation's copy replaced the old one
+        self.assertEqual(len(list(sitemap.sitemap_root().iterdir())), 1)
+
+    def test_a_slow_build_for_an_older_generation_keeps_the_newer_copy(self):
+        old = page_cache.content_generation()
+        page_cache.bump_content_generation()
+        newer = sitemap.get_directory(sitemap.site_url())
+        with mock.patch.object(page_cache, 'content_generation', return_value=old):
+            sitemap.get_directory(sitemap.site_url())
+        self.assertTrue((newer / 'sitemap.xml').exists())
+        self.assertEqual(sitemap.get_directory(sitemap.site_url()), newer)
+
+    def test_a_copy_removed_while_serving_is_a_404(self):
+        with tempfile.TemporaryDirectory() as empty:
+            with mock.patch.object(sitemap, 'get_directory', return_value=Path(empty)):
+                self.assertEqual(self.client.get('/sitemap.xml').status_code, 404)
+
+    def test_sitemap_and_robots_are_not_per_language(self):
+        self.assertEqual(self.client.get('/robots.txt').status_code, 200)
+        self.assertEqual(self.client.get('/ar/robots.txt').status_code, 404)
+        self.assertEqual(self.client.get('/ar/sitemap.xml').status_code, 404)
+
+    def test_links_ignore_the_host_header(self):
+        self.client.get('/sitemap.xml', HTTP_HOST='attacker.example')
+        response = self.client.get('/sitemap.xml', HTTP_HOST='other.example')
+        self.assertIn('<loc>https://example.com/</loc>', b''.join(response.streaming_content).decode())
+        self.assertEqual(len(list(sitemap.sitemap_root().iterdir())), 1)
+
+    def test_gzip_variant_is_served_when_accepted(self):
+        response = self.client.get('/sitemap.xml', HTTP_ACCEPT_ENCODING='gzip, br')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn(b'<urlset', gzip.decompress(b''.join(response.streaming_content)))
+
+    def test_gzip_refused_with_q_0_is_not_served(self):
+        response = self.client.get('/sitemap.xml', HTTP_ACCEPT_ENCODING='gzip;q=0, identity')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertIn(b'<urlset', b''.join(response.streaming_content))
+
+    @override_settings(SITEMAP_SHARD_SIZE=6)
+    def test_large_sitemaps_are_split_into_an_index_and_shards(self):
+        for n in range(6):
+            make_project(title=f'P{n}')
+        index = b''.join(self.client.get('/sitemap.xml').streaming_content).decode()
+        self.assertIn('<sitemapindex', index)
+        self.assertIn('https://example.com/sitemap-3.xml', index)
+        self.assertNotIn('sitemap-4.xml', index)
+        shard = b''.join(self.client.get('/sitemap-3.xml').streaming_content).decode()
+        self.assertEqual(shard.count('<url>'), 4)
+        self.assertEqual(self.client.get('/sitemap-4.xml').status_code, 404)
+
+
+class ConditionalGetTests(SiteTestCase):
+    def test_matching_etag_gets_304_without_rendering(self):
+        first = self.client.get(reverse('about'))
+        self.assertIn('ETag', first)
+        self.assertNotIn('Last-Modified', first)
+        self.assertIn('no-cache', first['Cache-Control'])
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('about'), HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+    def test_head_revalidates_too(self):
+        first = self.client.get(reverse('services'))
+        response = self.client.head(reverse('services'), HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_if_modified_since_alone_never_hides_a_deletion(self):
+        project = make_project(title='Removed Kitchen')
+        self.client.get(reverse('portfolio'))
+        with self.captureOnCommitCallbacks(execute=True):
+            project.delete()
+        response = self.client.get(reverse('portfolio'), HTTP_IF_MODIFIED_SINCE=http_date(time.time() + 60))
+        self.assertEqual(response.status_code, 200)
+        self.assertNotContains(response, 'Removed Kitchen')
+
+    def test_edits_and_deletes_change_the_etag(self):
+        testimonial = Testimonial.objects.create(customer_name='Client', testimonial='Great')
+        etag = self.client.get(reverse('about'))['ETag']
+        testimonial.testimonial = 'Excellent'
+        with self.captureOnCommitCallbacks(execute=True):
+            testimonial.save()
+        changed = self.client.get(reverse('about'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(changed.status_code, 200)
+
+        etag = changed['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            testimonial.delete()
+        self.assertEqual(self.client.get(reverse('about'), HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_unrelated_models_keep_the_etag(self):
+        etag = self.client.get(reverse('contact'))['ETag']
+        Service.objects.create(name='Windows', description='d')
+        self.assertEqual(self.client.get(reverse('contact'), HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+
+class LanguageTests(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        make_project(title='Villa Kitchen', title_arabic='مطبخ فيلا')
+        Testimonial.objects.create(customer_name='Client', testimonial='Great work', testimonial_arabic='عمل رائع')
+
+    def test_each_language_renders_only_its_own_text(self):
+        english = self.client.get('/portfolio/')
+        self.assertContains(english, 'Villa Kitchen')
+        self.assertNotContains(english, 'مطبخ فيلا')
+        self.assertContains(english, '<html lang="en" dir="ltr"')
+
+        arabic = self.client.get('/ar/portfolio/')
+        self.assertContains(arabic, 'مطبخ فيلا')
+        self.assertNotContains(arabic, 'Villa Kitchen')
+        self.assertContains(arabic, '<html lang="ar" dir="rtl"')
+
+    def test_hreflang_links_point_at_real_alternates(self):
+        response = self.client.get('/about/?x=1')
+        self.assertContains(response, 'hreflang="ar" href="http://testserver/ar/about/?x=1"')
+        self.assertContains(response, 'hreflang="en" href="http://testserver/about/?x=1"')
+
+    def test_english_pages_do_not_load_arabic_columns(self):
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get('/about/')
+        self.assertFalse([q for q in ctx.captured_queries if '_arabic' in q['sql'] and 'testimonial' in q['sql']])
+
+    def test_page_cache_is_keyed_per_language(self):
+        self.client.get('/about/')
+        self.assertContains(self.client.get('/ar/about/'), 'عمل رائع')
+
+
+class FragmentCacheTests(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        Service.objects.create(name='Kitchens', description='Fitted kitchens')
+        self.testimonial = Testimonial.objects.create(customer_name='Client', testimonial='Great work')
+
+    def test_editing_a_testimonial_only_retires_its_fragment(self):
+        self.client.get('/')
+        self.testimonial.testimonial = 'Even better work'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.testimonial.save()
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get('/')
+        self.assertContains(response, 'Even better work')
+        self.assertFalse([q for q in ctx.captured_queries if 'FROM "millwork_site_service" WHERE' in q['sql']])
+
+        stats = fragments.fragment_stats()
+        self.assertEqual((stats['testimonials']['hits'], stats['testimonials']['misses']), (0, 2))
+        self.assertEqual((stats['services']['hits'], stats['services']['misses']), (1, 1))
+
+    def test_fragments_are_cached_per_language(self):
+        self.client.get('/')
+        self.client.get('/ar/')
+        self.assertEqual(fragments.fragment_stats()['services']['misses'], 2)
+
+    def test_new_templates_retire_every_fragment(self):
+        key, stale_key = fragments.fragment_key('services'), fragments.stale_fragment_key('services')
+        deployed = freshness.templates_modified() + timedelta(minutes=5)
+        with mock.patch.object(fragments, 'templates_modified', return_value=deployed):
+            self.assertNotEqual(fragments.fragment_key('services'), key)
+            self.assertNotEqual(fragments.stale_fragment_key('services'), stale_key)
+
+
+class ImageDerivativeTests(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        self.enterContext(override_settings(
+            MEDIA_ROOT=root.name, IMAGE_DERIVATIVE_WIDTHS=(320, 640, 1024), IMAGE_PROCESSING_IN_BACKGROUND=False,
+        ))
+
+    def make_project(self, **kwargs):
+        """make_project(), with the images processed as its commit would"""
+        with self.captureOnCommitCallbacks(execute=True):
+            project = make_project(**kwargs)
+        project.refresh_from_db()
+        return project
+
+    def test_saving_an_upload_writes_smaller_jpeg_and_webp_copies(self):
+        project = self.make_project(image=make_upload())
+        for width in (320, 640, 1024):
+            for image_format in ('jpeg', 'webp'):
+                with default_storage.open(images.derivative_name(project.image.name, width, image_format)) as f:
+                    copy = Image.open(f)
+                    self.assertEqual((copy.width, copy.format), (width, image_format.upper()))
+
+    def test_small_images_are_not_upscaled(self):
+        project = self.make_project(image=make_upload(size=(500, 300)))
+        self.assertEqual(images.available_widths(project.image.name), (320,))
+
+    def test_images_without_derivatives_are_not_regenerated_on_every_save(self):
+        project = self.make_project(image=make_upload(size=(200, 100)))
+        self.assertEqual(images.available_widths(project.image.name), ())
+        with mock.patch.object(images, 'generate_derivatives') as generate:
+            with self.captureOnCommitCallbacks(execute=True):
+                project.save()
+        generate.assert_not_called()
+
+    def test_nothing_is_processed_before_the_commit(self):
+        with mock.patch.object(images, 'process_saved_image') as process:
+            make_project(image=make_upload())
+        process.assert_not_called()
+
+    def test_unreadable_uploads_are_saved_without_copies(self):
+        upload = SimpleUploadedFile('broken.jpg', b'not a jpeg', content_type='image/jpeg')
+        with self.assertLogs('millwork_site.images', 'WARNING'):
+            project = self.make_project(image=upload)
+        self.assertEqual(images.available_widths(project.image.name), ())
+        self.assertEqual(project.image_placeholder, '')
+        self.assertEqual(self.client.get('/portfolio/').status_code, 200)
+
+    def test_cards_offer_webp_srcset(self):
+        project = self.make_project(image=make_upload())
+        response = self.client.get('/portfolio/')
+        webp = images.derivative_name(project.image.name, 320, 'webp')
+        self.assertContains(response, f'<source type="image/webp" srcset="/media/{webp} 320w')
+        self.assertContains(response, f'<img src="{project.image.url}" srcset="')
+
+    def assertColorNear(self, color, expected):
+        channels = [int(color[i:i + 2], 16) for i in (1, 3, 5)]
+        for channel, target in zip(channels, expected):
+            self.assertAlmostEqual(channel, target, delta=4)
+
+    def test_upload_stores_preview_and_dominant_colour(self):
+        image = Image.new('RGB', (1200, 800), (200, 30, 30))
+        image.paste((30, 30, 200), (0, 0, 300, 800))
+        buffer = BytesIO()
+        image.save(buffer, format='PNG')
+        project = self.make_project(image=SimpleUploadedFile('mostly-red.png', buffer.getvalue()))
+
+        self.assertTrue(project.image_placeholder.startswith('data:image/webp;base64,'))
+        self.assertLess(len(project.image_placeholder), 400)
+        self.assertEqual(project.image_color, '#c81e1e')
+
+        response = self.client.get('/portfolio/')
+        self.assertContains(response, 'style="background: #c81e1e url(data:image/webp;base64,')
+
+    def test_backfill_fills_rows_without_a_preview(self):
+        project = self.make_project(image=make_upload())
+        Project.objects.filter(pk=project.pk).update(image_placeholder='', image_color='')
+        generation = page_cache.content_generation()
+        call_command('backfill_image_placeholders', '--workers', '1', stdout=StringIO())
+        project.refresh_from_db()
+        self.assertColorNear(project.image_color, (120, 80, 40))
+        self.assertNotEqual(page_cache.content_generation(), generation)
+
+
+class ResizeEndpointTests(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        media = tempfile.TemporaryDirectory()
+        variants = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.addCleanup(variants.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=media.name, RESIZE_CACHE_ROOT=variants.name))
+        self.variants = Path(variants.name)
+        self.name = default_storage.save('projects/wide.jpg', make_upload())
+
+    def fetch(self, url):
+        response = self.client.get(url)
+        if response.status_code == 200:
+            response.image = Image.open(BytesIO(b''.join(response.streaming_content)))
+        return response
+
+    def test_signed_url_is_cropped_and_cached_for_a_year(self):
+        response = self.fetch(resizing.resized_url(self.name, 400, 300))
+        self.assertEqual(response.image.size, (400, 300))
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertIn('max-age=31536000', response['Cache-Control'])
+        self.assertEqual(self.fetch(resizing.resized_url(self.name, 200)).image.size, (200, 113))
+
+    def test_unsigned_and_escaping_requests_are_refused(self):
+        url = resizing.resized_url(self.name, 400, 300)
+        self.assertEqual(self.client.get(url.replace('400x300', '401x300')).status_code, 403)
+        self.assertEqual(self.client.get(resizing.resized_url('../settings.py', 100)).status_code, 404)
+        self.assertEqual(self.client.get(resizing.resized_url(self.name, 99999)).status_code, 404)
+
+    def test_concurrent_requests_render_once(self):
+        calls = []
+        render = resizing._render
+        barrier = threading.Barrier(4)
+
+        def counting_render(*args):
+            calls.append(args)
+            render(*args)
+
+        def request(_):
+            barrier.wait()
+            return resizing.get_variant(self.name, 300, 300)
+
+        with mock.patch.object(resizing, '_render', side_effect=counting_render):
+            with ThreadPoolExecutor(4) as pool:
+                paths = set(pool.map(request, range(4)))
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(len(paths), 1)
+
+    def test_least_recently_used_variants_are_evicted(self):
+        first = resizing.get_variant(self.name, 300, 300)
+        size = first.stat().st_size
+        with override_settings(RESIZE_CACHE_MAX_BYTES=int(size * 2.5), RESIZE_EVICT_INTERVAL=0):
+            second = resizing.get_variant(self.name, 310, 310)
+            # Apart by more than the filesystem's timestamp resolution
+            os.utime(first, (time.time() - 20,) * 2)
+            os.utime(second, (time.time() - 10,) * 2)
+            resizing.get_variant(self.name, 300, 300)  # touch: now newer than `second`
+            third = resizing.get_variant(self.name, 320, 320)
+        self.assertTrue(first.exists())
+        self.assertFalse(second.exists())
+        self.assertTrue(third.exists())
+
+    def test_failed_renders_leave_no_partial_file(self):
+        with mock.patch.object(Image.Image, 'save', side_effect=OSError('disk full')):
+            with self.assertRaises(OSError):
+                resizing.get_variant(self.name, 300, 300)
+        self.assertEqual(list(self.variants.glob('*/*.part')), [])
+
+    @skipIf(resizing.fcntl is None, 'no fcntl')
+    def test_eviction_removes_lock_files_nobody_holds(self):
+        with mock.patch.object(resizing, 'evict'):
+            resizing.get_variant(self.name, 300, 300)
+        [lock] = self.variants.glob('*/*.lock')
+        abandoned = lock.with_name('abandoned.part')
+        abandoned.touch()
+        os.utime(abandoned, (0, 0))
+
+        with resizing._single_flight(lock):
+            resizing.evict()
+            self.assertTrue(lock.exists())
+        self.assertFalse(abandoned.exists())
+        resizing.evict()
+        self.assertFalse(lock.exists())
+
+    @skipIf(resizing.fcntl is None, 'no fcntl')
+    def test_a_waiter_whose_lock_file_was_removed_locks_the_new_one(self):
+        lock = self.variants / 'variant.lock'
+        entered = threading.Event()
+        release = threading.Event()
+
+        def wait():
+            with resizing._single_flight(lock):
+                entered.set()
+                release.wait(5)
+
+        thread = threading.Thread(target=wait)
+        with resizing._single_flight(lock):
+            thread.start()
+            time.sleep(0.1)  # let it block on this file
+            lock.unlink()  # as evict() does once it gets the lock
+        self.assertTrue(entered.wait(5))
+        # The waiter holds the file now at the path, so it isn't removable
+        resizing._remove_unheld_lock(lock)
+        self.assertTrue(lock.exists())
+        release.set()
+        thread.join()
+
+    def test_eviction_runs_at_most_once_per_interval(self):
+        with mock.patch.object(resizing, 'evict') as evict:
+            resizing.get_variant(self.name, 300, 300)
+            resizing.get_variant(self.name, 310, 310)
+        self.assertEqual(evict.call_count, 1)
+
+
+class TailwindBuildTests(SimpleTestCase):
+    def test_scanner_reads_class_attributes_and_alpine_bindings(self):
+        classes = tailwind.classes_in_template(
+            '<div class="p-4 {% if x %}md:flex{% endif %} delay-{{ n }}00" '
+            ':class="open ? \'rotate-180 bg-white/50\' : \'\'" x-transition:enter="ease-out duration-300">'
+        )
+        self.assertEqual(classes, {'p-4', 'md:flex', 'rotate-180', 'bg-white/50', 'ease-out', 'duration-300'})
+
+    def test_utilities_compile_in_tailwind_order(self):
+        css, compiled = tailwind.compile_css(['md:grid-cols-3', 'hover:bg-primary/90', 'p-6', 'pt-2', 'hover-lift'])
+        self.assertEqual(compiled, {'md:grid-cols-3', 'hover:bg-primary/90', 'p-6', 'pt-2'})
+        self.assertIn('.hover\\:bg-primary\\/90:hover{background-color:color-mix(in srgb,var(--primary, #164e63) 90%,transparent)}', css)
+        self.assertLess(css.index('.p-6{'), css.index('.pt-2{'))
+        self.assertTrue(css.endswith('@media (min-width:768px){.md\\:grid-cols-3{grid-template-columns:repeat(3,minmax(0,1fr))}}'))
+
+    def test_committed_stylesheet_matches_the_templates(self):
+        classes = set()
+        for path in tailwind.template_files():
+            classes |= tailwind.classes_in_template(path.read_text(encoding='utf-8'))
+        css, _ = tailwind.compile_css(classes)
+        built = tailwind.stylesheet_dir().parent / tailwind.stylesheet_name()
+        self.assertEqual(built.read_text(encoding='utf-8'), css, 'Run `manage.py build_tailwind`')
+
+
+class StaticPipelineTests(SimpleTestCase):
+    def setUp(self):
+        source = tempfile.TemporaryDirectory()
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(source.cleanup)
+        self.addCleanup(root.cleanup)
+        Path(source.name, 'css').mkdir()
+        Path(source.name, 'css', 'site.css').write_text('body { color: red; }\n' * 100)
+        self.root = Path(root.name)
+        self.enterContext(override_settings(
+            STATICFILES_DIRS=[source.name], STATIC_ROOT=root.name, STATIC_COMPRESS_WORKERS=2,
+            STATICFILES_FINDERS=['django.contrib.staticfiles.finders.FileSystemFinder'],
+        ))
+
+    def collect(self):
+        call_command('collectstatic', interactive=False, verbosity=0)
+        return json.loads((self.root / 'staticfiles.json').read_text())['paths']['css/site.css']
+
+    def test_collectstatic_writes_hashed_and_compressed_copies(self):
+        hashed = self.collect()
+        self.assertRegex(hashed, r'^css/site\.[0-9a-f]{12}\.css$')
+        compressed = self.root / f'{hashed}.gz'
+        self.assertEqual(gzip.decompress(compressed.read_bytes()), (self.root / hashed).read_bytes())
+
+        # An unchanged file is not compressed again
+        stamp = compressed.stat().st_mtime_ns
+        self.collect()
+        self.assertEqual(compressed.stat().st_mtime_ns, stamp)
+
+    def test_middleware_serves_the_precompressed_copy(self):
+        hashed = self.collect()
+        response = self.client.get(f'/static/{hashed}', HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Content-Type'], 'text/css')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+        refused = self.client.get(f'/static/{hashed}', HTTP_ACCEPT_ENCODING='gzip;q=0, identity')
+        self.assertFalse(refused.has_header('Content-Encoding'))
+
+        plain = self.client.get(f'/static/{hashed}')
+        self.assertFalse(plain.has_header('Content-Encoding'))
+        self.assertEqual(b''.join(plain.streaming_content), (self.root / hashed).read_bytes())
+        self.assertIn('no-cache', self.client.get('/static/css/site.css')['Cache-Control'])
+        self.assertEqual(self.client.get('/static/../manage.py').status_code, 404)
+
+    @override_settings(DEBUG=True)
+    def test_middleware_stays_out_of_the_way_in_debug(self):
+        with self.assertRaises(MiddlewareNotUsed):
+            PrecompressedStaticMiddleware(lambda request: None)
+
+
+class CriticalCssTests(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        self.enterContext(override_settings(CRITICAL_CSS_ROOT=root.name))
+        critical_css._memo.clear()
+
+    def test_only_rules_for_the_visible_markup_are_kept(self):
+        css = (
+            '.hero{color:red}.footer{color:blue}.hero:hover{color:green}'
+            '@media (min-width:768px){.md\\:flex{display:flex}.lg\\:grid{display:grid}}'
+            '.fade{animation:fadeIn 1s}@keyframes fadeIn{from{opacity:0}}@keyframes unused{to{opacity:1}}'
+        )
+        critical = critical_css.extract('<section class="hero md:flex fade">', css)
+        self.assertEqual(
+            critical,
+            '.hero{color:red}@media (min-width:768px){.md\\:flex{display:flex}}'
+            '.fade{animation:fadeIn 1s}@keyframes fadeIn{from{opacity:0}}',
+        )
+
+    def test_pages_inline_critical_css_and_defer_stylesheets(self):
+        response = self.client.get('/about/')
+        self.assertContains(response, '.max-w-7xl{max-width:80rem}')
+        self.assertNotContains(response, '.hover\\:bg-primary\\/90:hover')
+        self.assertContains(response, 'as="style" onload="this.onload=null;this.rel=\'stylesheet\'"', count=3)
+        self.assertContains(response, '<noscript><link rel="stylesheet" href="/static/css/globals.css"></noscript>')
+
+    def test_rebuilds_replace_the_old_copy_only_once_the_new_one_is_written(self):
+        root = critical_css.critical_root()
+        old = root / 'about.0123456789abcdef.css'
+        old.write_text('.old{}')
+        with mock.patch.object(critical_css.os, 'replace', side_effect=OSError('disk full')):
+            with self.assertRaises(OSError):
+                critical_css.build('about.html')
+        self.assertEqual(list(root.iterdir()), [old])
+
+        critical = critical_css.build('about.html')
+        [stored] = root.iterdir()
+        self.assertNotEqual(stored, old)
+        self.assertEqual(stored.read_text(), critical)
+
+
+def make_font(path, characters):
+    """A TrueType font with an empty glyph for each character"""
+    from fontTools.fontBuilder import FontBuilder
+    from fontTools.pens.ttGlyphPen import TTGlyphPen
+
+    names = ['.notdef'] + [f'uni{ord(char):04X}' for char in characters]
+    builder = FontBuilder(1000, isTTF=True)
+    builder.setupGlyphOrder(names)
+    builder.setupCharacterMap({ord(char): name for char, name in zip(characters, names[1:])})
+    builder.setupGlyf({name: TTGlyphPen(None).glyph() for name in names})
+    builder.setupHorizontalMetrics({name: (500, 0) for name in names})
+    builder.setupHorizontalHeader(ascent=800, descent=-200)
+    builder.setupNameTable({'familyName': 'Test', 'styleName': 'Regular'})
+    builder.setupOS2(usWeightClass=400)
+    builder.setupPost()
+    builder.save(path)
+
+
+class VendorAssetTests(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        vendor.manifest.cache_clear()
+        self.addCleanup(vendor.manifest.cache_clear)
+
+    def test_subset_takes_new_arabic_characters_from_the_database(self):
+        Service.objects.create(name='Doors', description='Doors', name_arabic='أبواب ۆ')
+        characters = vendor.content_characters()
+        self.assertIn(0x6C6, vendor.codepoints('arabic', characters))
+        self.assertNotIn(0x6C6, vendor.codepoints('latin', characters))
+        self.assertEqual(vendor.unicode_range({0x41, 0x20, 0x42, 0x43, 0x61}), 'U+20,U+41-43,U+61')
+
+    def test_pages_fall_back_to_the_cdns_before_the_first_build(self):
+        with mock.patch.object(vendor, 'manifest', return_value={}):
+            response = self.client.get('/about/')
+        self.assertContains(response, vendor.GOOGLE_FONTS_CSS_URL.replace('&', '&amp;'))
+        self.assertContains(response, vendor.ALPINE_URL)
+
+    def test_deploy_check_warns_until_the_assets_are_built(self):
+        with mock.patch.object(vendor, 'manifest', return_value={}):
+            self.assertEqual([message.id for message in checks.vendor_assets_check(None)], ['millwork_site.W001'])
+        with mock.patch.object(vendor, 'manifest', return_value={'faces': [], 'scripts': {}}):
+            self.assertEqual(checks.vendor_assets_check(None), [])
+
+    def test_deploy_check_warns_without_brotli(self):
+        with mock.patch('millwork_site.storage.brotli', None):
+            self.assertEqual([message.id for message in checks.brotli_check(None)], ['millwork_site.W002'])
+
+    @skipIf(vendor.subset is None, 'fontTools is not installed')
+    def test_build_serves_subsetted_fonts_and_alpine_locally(self):
+        sources, static_dir = tempfile.TemporaryDirectory(), tempfile.TemporaryDirectory()
+        self.addCleanup(sources.cleanup)
+        self.addCleanup(static_dir.cleanup)
+        for name in vendor.FONTS:
+            make_font(f'{sources.name}/{name}.ttf', 'ABCabc\u0628\u062a\u06c6\u06cc')
+        Path(sources.name, f'alpine-{vendor.ALPINE_VERSION}.min.js').write_text('window.Alpine={}')
+
+        with override_settings(VENDOR_SOURCE_ROOT=sources.name), \
+                mock.patch.object(vendor, 'static_root', return_value=Path(static_dir.name)):
+            result = vendor.build(characters=set('\u06c6'))
+            latin = next(face for face in result['faces'] if face['script'] == 'latin')
+            arabic = next(face for face in result['faces'] if face['script'] == 'arabic')
+            self.assertEqual(latin['unicode_range'], 'U+41-43,U+61-63')
+            # The unused U+06CC is dropped, the U+06C6 used in the content is kept
+            self.assertEqual(arabic['unicode_range'], 'U+628,U+62A,U+6C6')
+            self.assertTrue(Path(static_dir.name, latin['file']).read_bytes().startswith(b'wOF2'))
+
+            response = self.client.get('/about/')
+            self.assertContains(response, f'<link rel="preload" href="/static/{latin["file"]}" as="font"')
+            self.assertNotContains(response, f'href="/static/{arabic["file"]}" as="font"')
+            self.assertContains(response, 'font-display:swap', count=4)
+            self.assertContains(response, f'<script defer src="/static/{result["scripts"]["alpine"]}"></script>')
+            self.assertNotContains(response, 'fonts.googleapis.com')
+            self.assertNotContains(response, 'unpkg.com')
+
+            response = self.client.get('/ar/about/')
+            self.assertContains(response, f'<link rel="preload" href="/static/{arabic["file"]}" as="font"')
+
+
+class QueryPlanTests(SiteTestCase):
+    """
+    Every query the public pages and the contact message admin run must be
+    answered from an index: no full table scan and no sort of table rows.
+    """
+    # Single-row tables read with .first()
+    ONE_ROW_TABLES = {CompanyInfo._meta.db_table, CompanyStatistics._meta.db_table}
+
+    def setUp(self):
+        super().setUp()
+        for n in range(12):
+            project = make_project(title=f'P{n}', order=n // 4, is_featured=n < 4)
+            ProjectImage.objects.create(project=project, image='projects/gallery/test.jpg')
+        ContactMessage.objects.create(first_name='A', last_name='B', email='a@example.com', message='Hi')
+        self.user = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+
+    def plan(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            return [row[-1] for row in cursor.fetchall()]
+
+    def assertIndexedQueries(self, url, **params):
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get(url, params).status_code, 200)
+        checked = 0
+        for query in queries.captured_queries:
+            sql = query['sql']
+            # freshness.table_state aggregates whole tables on purpose, once per content change
+            if not sql.startswith('SELECT') or 'millwork_site_' not in sql or sql.startswith('SELECT 0, MAX('):
+                continue
+            checked += 1
+            table = None
+            for step in self.plan(sql):
+                access = re.match(r'(?:SCAN|SEARCH) (\w+)', step)
+                if access:
+                    table = access[1] if access[1].startswith('millwork_site_') else None
+                    full_scan = step == f'SCAN {table}' and table not in self.ONE_ROW_TABLES
+                    self.assertFalse(full_scan, f'{url}: full scan of {table}\n{sql}')
+                elif 'TEMP B-TREE' in step:
+                    self.assertIsNone(table, f'{url}: {step} on {table}\n{sql}')
+        self.assertTrue(checked)
+
+    def test_public_pages(self):
+        for url in ('/', '/about/', '/services/', '/portfolio/', '/contact/', '/ar/'):
+            cache.clear()
+            with self.subTest(url=url):
+                self.assertIndexedQueries(url)
+
+    def test_portfolio_filters_and_deep_pages(self):
+        self.assertIndexedQueries('/portfolio/', category='aluminium_kitchen')
+        paginator = KeysetPaginator(Project.objects.filter(is_active=True), 9, Project._meta.ordering)
+        cursor = paginator.encode_cursor(Project.objects.filter(is_active=True)[8])
+        self.assertIndexedQueries('/portfolio/', after=cursor)
+        self.assertIndexedQueries('/portfolio/', before=cursor)
+
+    def test_contact_message_admin(self):
+        self.client.force_login(self.user)
+        url = reverse('admin:millwork_site_contactmessage_changelist')
+        self.assertIndexedQueries(url)
+        self.assertIndexedQueries(url, status__exact='new')
+
+
+class DatabaseProfileTests(SimpleTestCase):
+    databases = {'default'}
+
+    def pragma(self, wrapper, name):
+        with wrapper.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    def test_new_connections_apply_the_sqlite_pragmas(self):
+        self.assertEqual(self.pragma(connection, 'synchronous'), 1)  # NORMAL
+        self.assertEqual(self.pragma(connection, 'busy_timeout'), 5000)
+        self.assertEqual(self.pragma(connection, 'cache_size'), -20000)
+        self.assertEqual(connection.transaction_mode, 'IMMEDIATE')
+
+    def test_database_files_use_wal(self):
+        # The test database lives in memory, which has no journal to switch
+        with tempfile.TemporaryDirectory() as directory:
+            settings_dict = {**connection.settings_dict, 'NAME': f'{directory}/db.sqlite3'}
+            wrapper = connections['default'].__class__(settings_dict, 'wal_check')
+            try:
+                self.assertEqual(self.pragma(wrapper, 'journal_mode'), 'wal')
+                self.assertEqual(self.pragma(wrapper, 'mmap_size'), 128 * 1024 * 1024)
+            finally:
+                wrapper.close()
+
+
+class ReplicaRoutingTests(SiteTestCase):
+    def test_public_views_read_from_the_replica(self):
+        Service.objects.create(name='Doors', description='Doors')
+        response = self.client.get(reverse('services'))
+        self.assertEqual([service._state.db for service in response.context['services']], ['replica'])
+
+    def test_admin_and_code_outside_requests_use_the_primary(self):
+        Service.objects.create(name='Doors', description='Doors')
+        self.assertEqual(Service.objects.all().db, 'default')
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'password'))
+        response = self.client.get(reverse('admin:millwork_site_service_changelist'))
+        self.assertEqual(response.context['cl'].result_list[0]._state.db, 'default')
+
+    def test_reads_after_a_write_are_pinned_to_the_primary(self):
+        with routers.request_scope():
+            routers.use_replica()
+            self.assertEqual(Service.objects.all().db, 'replica')
+            ContactMessage.objects.create(first_name='A', last_name='B', email='a@example.com', message='Hi')
+            self.assertEqual(Service.objects.all().db, 'default')
+        with routers.request_scope():
+            routers.use_replica()
+            self.assertEqual(Service.objects.all().db, 'replica')
+
+    def test_replica_connection_is_read_only(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory, 'db.sqlite3')
+            primary = connections['default'].Database.connect(path)
+            primary.execute('CREATE TABLE item (name TEXT)')
+            primary.close()
+            replica = connections['default'].__class__({
+                **connections['default'].settings_dict,
+                'NAME': f'file:{path}?mode=ro',
+                'OPTIONS': settings.DATABASES['replica']['OPTIONS'],
+            }, 'replica_check')
+            try:
+                with replica.cursor() as cursor:
+                    cursor.execute('SELECT COUNT(*) FROM item')
+                    self.assertEqual(cursor.fetchone(), (0,))
+                    with self.assertRaisesMessage(OperationalError, 'readonly'):
+                        cursor.execute("INSERT INTO item VALUES ('x')")
+            finally:
+                replica.close()
+
+
+def _increment_shared_counter(location, times):
+    backend = SQLiteCache(location, {})
+    for _ in range(times):
+        backend.incr('counter')
+
+
+class SQLiteCacheTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.location = f'{directory.name}/cache.sqlite3'
+
+    def backend(self, **options):
+        return SQLiteCache(self.location, {'OPTIONS': options})
+
+    def test_values_are_shared_between_instances(self):
+        writer, reader = self.backend(), self.backend()
+        writer.set('page', {'html': '<p>Hi</p>'})
+        writer.set_many({'a': 1, 'b': [2]})
+        self.assertEqual(reader.get('page'), {'html': '<p>Hi</p>'})
+        self.assertEqual(reader.get_many(['a', 'b', 'c']), {'a': 1, 'b': [2]})
+        self.assertFalse(reader.add('a', 5))
+        reader.delete_many(['a', 'page'])
+        self.assertIsNone(writer.get('page'))
+        self.assertTrue(writer.add('a', 5))
+
+    def test_expired_entries_are_misses(self):
+        cache = self.backend()
+        cache.set('short', 'value', 0)
+        self.assertIsNone(cache.get('short'))
+        self.assertTrue(cache.add('short', 'again', None))
+        with mock.patch('time.time', return_value=time.time() + 3600):
+            cache.set('hour', 'value', 60)
+        self.assertEqual(cache.get('hour'), 'value')
+        self.assertTrue(cache.touch('hour', 0))
+        self.assertFalse(cache.has_key('hour'))
+
+    def test_incr_is_atomic_across_processes(self):
+        cache = self.backend()
+        cache.set('counter', 0, None)
+        context = multiprocessing.get_context('fork')
+        workers = [context.Process(target=_increment_shared_counter, args=(self.location, 200)) for _ in range(4)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        self.assertEqual(cache.get('counter'), 800)
+        self.assertEqual(cache.incr('counter', 10), 810)
+        with self.assertRaises(ValueError):
+            cache.incr('missing')
+
+    def test_counters_created_concurrently_count_every_increment(self):
+        cache, threads, keys = self.backend(), 8, [f'counter:{n}' for n in range(50)]
+        barrier = threading.Barrier(threads)
+
+        def increment_all(_):
+            barrier.wait()
+            for key in keys:
+                # As stats.flush() does
+                try:
+                    cache.incr(key)
+                except ValueError:
+                    if not cache.add(key, 1, None):
+                        cache.incr(key)
+
+        with ThreadPoolExecutor(threads) as executor:
+            list(executor.map(increment_all, range(threads)))
+        self.assertEqual(cache.get_many(keys), dict.fromkeys(keys, threads))
+
+    def test_size_is_bounded(self):
+        cache = self.backend(MAX_ENTRIES=10, CULL_FREQUENCY=2)
+        for n in range(30):
+            cache.set(f'key{n}', n)
+        self.assertLessEqual(len(cache.get_many([f'key{n}' for n in range(30)])), 10)
+        self.assertEqual(cache.get('key29'), 29)
+
+        cache = self.backend(MAX_BYTES=20000)
+        for n in range(30):
+            cache.set(f'big{n}', 'x' * 2000)
+        self.assertLessEqual(len(cache.get_many([f'big{n}' for n in range(30)])), 10)
+        self.assertEqual(cache.get('big29'), 'x' * 2000)
+
+    def test_bulk_reads_keep_entries_from_being_culled(self):
+        cache = self.backend(MAX_ENTRIES=4, CULL_FREQUENCY=2)
+        with mock.patch('time.time', return_value=time.time() - 3600):
+            for n in range(4):
+                cache.set(f'key{n}', n, None)
+        self.assertEqual(cache.get_many(['key0', 'key1']), {'key0': 0, 'key1': 1})
+        cache.set('key4', 4)
+        self.assertEqual(cache.get_many([f'key{n}' for n in range(5)]), {'key0': 0, 'key1': 1, 'key4': 4})
 
-# Create your tests here.
@@ -7,6 +7,5 @@ urlpatterns = [
     path('services/', views.services, name='services'),
     path('portfolio/', views.portfolio, name='portfolio'),
     path('contact/', views.contact, name='contact'),
-    path('sitemap.xml', views.sitemap_xml, name='sitemap'),
-    path('robots.txt', views.robots_txt, name='robots'),
+    path('csrf/', views.csrf_token, name='csrf_token'),
 ]
@@ -0,0 +1,232 @@
+"""
+Third-party front-end assets served from our own origin.
+
+`manage.py build_vendor_assets` downloads the pinned font sources and
+Alpine.js once into VENDOR_SOURCE_ROOT, then writes to static/:
+
+* fonts/<font>-<script>.<hash>.woff2 - each font subset to the characters
+  the site can show: the Latin range for English plus every character used
+  in the templates and the *_arabic fields in the database. Space Grotesk
+  and DM Sans have no Arabic glyphs, so Noto Sans Arabic is declared under
+  both family names with an Arabic unicode-range and browsers only fetch it
+  for pages that contain Arabic text.
+* js/alpine.<hash>.js
+* vendor.json, the manifest {% font_faces %} and {% alpine_script %} read.
+
+Until the command has run, those tags fall back to Google Fonts and unpkg,
+and `manage.py check --deploy` warns about it. It is a deploy step: run it
+where the sources can be downloaded and commit what it writes. Subsetting
+needs fontTools and brotli (pip install -r requirements-build.txt); only the
+build needs them, not the running site.
+"""
+import hashlib
+import io
+import json
+import urllib.request
+from functools import lru_cache
+from pathlib import Path
+
+from django.apps import apps
+from django.conf import settings
+from django.db import models
+
+from . import tailwind
+
+try:
+    from fontTools import subset
+    from fontTools.ttLib import TTFont
+    from fontTools.varLib import instancer
+except ImportError:
+    subset = TTFont = instancer = None
+
+MANIFEST_NAME = 'vendor.json'
+FONT_DIR = 'fonts'
+SCRIPT_DIR = 'js'
+
+GOOGLE_FONTS = 'https://github.com/google/fonts/raw/main/ofl'
+# Source file and the weight range kept from its wght axis
+FONTS = {
+    'space-grotesk': (f'{GOOGLE_FONTS}/spacegrotesk/SpaceGrotesk%5Bwght%5D.ttf', (400, 700)),
+    'dm-sans': (f'{GOOGLE_FONTS}/dmsans/DMSans%5Bopsz,wght%5D.ttf', (400, 700)),
+    'noto-sans-arabic': (f'{GOOGLE_FONTS}/notosansarabic/NotoSansArabic%5Bwdth,wght%5D.ttf', (400, 700)),
+}
+# (CSS family, font, script)
+FACES = (
+    ('Space Grotesk', 'space-grotesk', 'latin'),
+    ('DM Sans', 'dm-sans', 'latin'),
+    ('Space Grotesk', 'noto-sans-arabic', 'arabic'),
+    ('DM Sans', 'noto-sans-arabic', 'arabic'),
+)
+
+# Always kept, so text added in the admin later rarely needs a rebuild
+SCRIPT_RANGES = {
+    'latin': (
+        (0x20, 0x7E), (0xA0, 0xFF), (0x131, 0x131), (0x152, 0x153), (0x2C6, 0x2C6), (0x2DA, 0x2DA),
+        (0x2DC, 0x2DC), (0x2013, 0x2014), (0x2018, 0x201E), (0x2022, 0x2022), (0x2026, 0x2026),
+        (0x2039, 0x203A), (0x20AC, 0x20AC), (0x2122, 0x2122),
+    ),
+    'arabic': (
+        (0x60C, 0x60C), (0x61B, 0x61B), (0x61F, 0x61F), (0x621, 0x63A), (0x640, 0x652),
+        (0x660, 0x66D), (0x200C, 0x200F),
+    ),
+}
+# Blocks a script's subset may take extra characters from
+SCRIPT_BLOCKS = {
+    'latin': ((0x20, 0x24F), (0x2000, 0x206F), (0x20A0, 0x20CF), (0x2100, 0x214F)),
+    'arabic': ((0x600, 0x6FF), (0x750, 0x77F), (0x200C, 0x200F), (0xFB50, 0xFDFF), (0xFE70, 0xFEFF)),
+}
+
+ALPINE_VERSION = '3.14.9'
+ALPINE_URL = f'https://unpkg.com/alpinejs@{ALPINE_VERSION}/dist/cdn.min.js'
+GOOGLE_FONTS_CSS_URL = (
+    'https://fonts.googleapis.com/css2?family=Space+Grotesk:wght@400;600;700'
+    '&family=DM+Sans:wght@400;500;600&display=swap'
+)
+
+
+def source_root():
+    return Path(getattr(settings, 'VENDOR_SOURCE_ROOT', Path(settings.BASE_DIR) / 'var' / 'vendor'))
+
+
+def static_root():
+    return Path(settings.STATICFILES_DIRS[0])
+
+
+@lru_cache(maxsize=None)
+def manifest():
+    """Contents of static/vendor.json, or {} before the first build"""
+    try:
+        return json.loads((static_root() / MANIFEST_NAME).read_text(encoding='utf-8'))
+    except FileNotFoundError:
+        return {}
+
+
+def content_characters():
+    """Every character in the templates and the *_arabic fields of the site's models"""
+    characters = set()
+    for path in tailwind.template_files():
+        characters.update(path.read_text(encoding='utf-8'))
+    for model in apps.get_app_config('millwork_site').get_models():
+        names = [
+            field.name for field in model._meta.get_fields()
+            if field.name.endswith('_arabic') and isinstance(field, (models.CharField, models.TextField))
+        ]
+        if names:
+            for row in model.objects.values_list(*names):
+                characters.update(''.join(value for value in row if value))
+    return characters
+
+
+def codepoints(script, characters):
+    """The script's base ranges plus the content characters falling in its blocks"""
+    points = {point for start, end in SCRIPT_RANGES[script] for point in range(start, end + 1)}
+    blocks = SCRIPT_BLOCKS[script]
+    points.update(
+        ord(char) for char in characters
+        if any(start <= ord(char) <= end for start, end in blocks)
+    )
+    return points
+
+
+def unicode_range(points):
+    """CSS unicode-range for a set of codepoints, with consecutive runs merged"""
+    ranges = []
+    for point in sorted(points):
+        if ranges and point == ranges[-1][1] + 1:
+            ranges[-1][1] = point
+        else:
+            ranges.append([point, point])
+    return ','.join(f'U+{start:X}' if start == end else f'U+{start:X}-{end:X}' for start, end in ranges)
+
+
+def fetch(url, name):
+    """Path of the downloaded copy of `url`, downloading it the first time"""
+    path = source_root() / name
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with urllib.request.urlopen(url, timeout=60) as response:
+            data = response.read()
+        partial = path.with_name(path.name + '.part')
+        partial.write_bytes(data)
+        partial.replace(path)
+    return path
+
+
+def subset_font(source, points, weights):
+    """
+    Return (woff2 bytes, CSS font-weight, covered codepoints) for `source`
+    reduced to `points`. Variable fonts keep only the `weights` part of their
+    wght axis; other axes are pinned to their defaults.
+    """
+    font = TTFont(source)
+    if 'fvar' in font:
+        limits = {}
+        for axis in font['fvar'].axes:
+            if axis.axisTag == 'wght':
+                limits['wght'] = (max(axis.minValue, weights[0]), min(axis.maxValue, weights[1]))
+            else:
+                limits[axis.axisTag] = axis.defaultValue
+        font = instancer.instantiateVariableFont(font, limits)
+    covered = points & set(font.getBestCmap())
+
+    options = subset.Options()
+    options.layout_features = ['*']
+    subsetter = subset.Subsetter(options)
+    subsetter.populate(unicodes=covered)
+    subsetter.subset(font)
+
+    if 'fvar' in font:
+        axis = next(axis for axis in font['fvar'].axes if axis.axisTag == 'wght')
+        weight = f'{axis.minValue:g} {axis.maxValue:g}'
+    else:
+        weight = str(font['OS/2'].usWeightClass)
+    font.flavor = 'woff2'
+    output = io.BytesIO()
+    font.save(output)
+    return output.getvalue(), weight, covered
+
+
+def _write_hashed(directory, stem, suffix, data):
+    """Write static/<directory>/<stem>.<hash><suffix>, dropping older builds; returns the static name"""
+    target_dir = static_root() / directory
+    target_dir.mkdir(parents=True, exist_ok=True)
+    name = f'{stem}.{hashlib.md5(data).hexdigest()[:10]}{suffix}'
+    for old in target_dir.glob(f'{stem}.*{suffix}'):
+        if old.name != name:
+            old.unlink()
+    (target_dir / name).write_bytes(data)
+    return f'{directory}/{name}'
+
+
+def build_fonts(characters=None):
+    """Subset every font in FACES; returns the manifest's face entries"""
+    if subset is None:
+        raise RuntimeError('Subsetting fonts needs fontTools and brotli: pip install -r requirements-build.txt')
+    characters = content_characters() if characters is None else characters
+    built = {}
+    faces = []
+    for family, font_name, script in FACES:
+        if (font_name, script) not in built:
+            url, weights = FONTS[font_name]
+            data, weight, covered = subset_font(fetch(url, f'{font_name}.ttf'), codepoints(script, characters), weights)
+            built[font_name, script] = {
+                'file': _write_hashed(FONT_DIR, f'{font_name}-{script}', '.woff2', data),
+                'weight': weight,
+                'unicode_range': unicode_range(covered),
+                'size': len(data),
+            }
+        faces.append({'family': family, 'script': script, **built[font_name, script]})
+    return faces
+
+
+def build_alpine():
+    data = fetch(ALPINE_URL, f'alpine-{ALPINE_VERSION}.min.js').read_bytes()
+    return _write_hashed(SCRIPT_DIR, 'alpine', '.js', data)
+
+
+def build(characters=None):
+    """Build the fonts and Alpine and write static/vendor.json; returns the manifest"""
+    result = {'faces': build_fonts(characters), 'scripts': {'alpine': build_alpine()}}
+    (static_root() / MANIFEST_NAME).write_text(json.dumps(result, indent=2) + '\n', encoding='utf-8')
+    manifest.cache_clear()
+    return result
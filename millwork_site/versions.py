@@ -0,0 +1,48 @@
+"""
+Per-table version counters.
+
+Every save or delete of a millwork_site model bumps the version of its
+database table (see signals.py). Cache entries that embed the versions of the
+tables they were built from become unreachable as soon as one of those tables
+changes, without anything having to track or delete them.
+"""
+import time
+
+from django.core.cache import cache
+
+from . import page_cache
+
+KEY_PREFIX = 'table_version:'
+
+
+def table_versions(tables):
+    """Return {table: version} for `tables`, seeding missing counters"""
+    keys = {table: KEY_PREFIX + table for table in tables}
+    found = cache.get_many(keys.values())
+    versions = {}
+    for table, key in keys.items():
+        version = found.get(key)
+        if version is None:
+            # Seed from the clock so an evicted counter never reuses old numbers
+            cache.add(key, time.time_ns(), None)
+            version = cache.get(key)
+        versions[table] = version
+    return versions
+
+
+def model_versions(models):
+    return table_versions([model._meta.db_table for model in models])
+
+
+def bump_table_version(table):
+    key = KEY_PREFIX + table
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, time.time_ns(), None)
+
+
+def content_changed(model):
+    """Retire the cached pages and every cache entry built from `model`'s table"""
+    page_cache.bump_content_generation()
+    bump_table_version(model._meta.db_table)
@@ -1,62 +1,76 @@
+from django.conf import settings
 from django.shortcuts import render, redirect
 from django.contrib import messages
+from django.core.exceptions import PermissionDenied
 from django.core.paginator import Paginator
-from django.http import HttpResponse
-from django.urls import reverse
-from django.utils import timezone
+from django.http import FileResponse, Http404, HttpResponse, JsonResponse
+from django.middleware.csrf import get_token
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.functional import SimpleLazyObject
+from django.views.decorators.cache import never_cache
 from .models import (
-    Service, Project, TeamMember, CompanyInfo, 
-    Testimonial, ContactMessage, PageContent,
-    CompanyStatistics, WhyChooseUsItem, Certification, FAQ
+    Service, Project, TeamMember,
+    Testimonial, ContactMessage,
+    WhyChooseUsItem, Certification, FAQ
 )
+from . import resizing, sitemap
+from .freshness import conditional_page
+from .middleware import accepts_encoding
+from .page_cache import cache_public_page
+from .pagination import KeysetPaginator
+from .queries import active_project_count, for_language, top_projects_per_category, with_gallery
+from .singletons import get_company_statistics, get_page_content
 
+PORTFOLIO_PER_PAGE = 9
+
+@conditional_page('home')
+@cache_public_page
 def home(request):
     """Home page view"""
-    # Get projects organized by category
-    categories_with_projects = []
-    for category_key, category_name in Project.CATEGORY_CHOICES:
-        projects = Project.objects.filter(category=category_key, is_active=True)[:3]
-        if projects.exists():
-            categories_with_projects.append({
-                'key': category_key,
-                'name': category_name,
-                'projects': projects
-            })
-    
     context = {
-        'services': Service.objects.filter(is_active=True)[:3],
-        'featured_projects': Project.objects.filter(is_featured=True, is_active=True)[:3],
-        'categories_with_projects': categories_with_projects,
-        'testimonials': Testimonial.objects.filter(is_active=True)[:3],
-        'page_content': PageContent.objects.filter(page='home').first(),
-        'statistics': CompanyStatistics.objects.first(),
-        'why_choose_items': WhyChooseUsItem.objects.filter(is_active=True),
-        'certifications': Certification.objects.filter(is_active=True),
-        'faqs': FAQ.objects.filter(is_active=True)[:6],  # Show 6 most common FAQs
+        'services': for_language(Service.objects.filter(is_active=True).cached())[:3],
+        'featured_projects': with_gallery(for_language(Project.objects.filter(is_featured=True, is_active=True).cached()))[:3],
+        # Top 3 projects of every category (with galleries), loaded in two queries
+        # and only when the cached 'categories' fragment has to be re-rendered
+        'categories_with_projects': SimpleLazyObject(lambda: top_projects_per_category(
+            limit=3, queryset=with_gallery(for_language(Project.objects.filter(is_active=True).cached()))
+        )),
+        'testimonials': for_language(Testimonial.objects.filter(is_active=True).cached())[:3],
+        'page_content': get_page_content('home'),
+        'statistics': get_company_statistics(),
+        'why_choose_items': for_language(WhyChooseUsItem.objects.filter(is_active=True).cached()),
+        'certifications': for_language(Certification.objects.filter(is_active=True).cached()),
+        'faqs': for_language(FAQ.objects.filter(is_active=True).cached())[:6],  # Show 6 most common FAQs
     }
     return render(request, 'index.html', context)
 
+@conditional_page('about')
+@cache_public_page
 def about(request):
     """About page view"""
     context = {
-        'team_members': TeamMember.objects.filter(is_active=True),
-        'testimonials': Testimonial.objects.filter(is_active=True),
-        'page_content': PageContent.objects.filter(page='about').first(),
+        'team_members': for_language(TeamMember.objects.filter(is_active=True).cached()),
+        'testimonials': for_language(Testimonial.objects.filter(is_active=True).cached()),
+        'page_content': get_page_content('about'),
     }
     return render(request, 'about.html', context)
 
+@conditional_page('services')
+@cache_public_page
 def services(request):
     """Services page view"""
-    services_list = Service.objects.filter(is_active=True)
+    services_list = for_language(Service.objects.filter(is_active=True).cached())
     context = {
         'services': services_list,
-        'page_content': PageContent.objects.filter(page='services').first(),
+        'page_content': get_page_content('services'),
     }
     return render(request, 'services.html', context)
 
+@conditional_page('portfolio')
+@cache_public_page
 def portfolio(request):
     """Portfolio page view"""
-    projects = Project.objects.filter(is_active=True)
+    projects = with_gallery(for_language(Project.objects.filter(is_active=True).cached()))
     
     # Filter by category if requested
     category = request.GET.get('category')
@@ -64,18 +78,30 @@ def portfolio(request):
         projects = projects.filter(category=category)
     
     # Pagination
-    paginator = Paginator(projects, 9)  # Show 9 projects per page
-    page_number = request.GET.get('page')
-    projects_page = paginator.get_page(page_number)
+    keyset = getattr(settings, 'PORTFOLIO_PAGINATION', 'keyset') == 'keyset'
+    if keyset:
+        # Seek on the ordering columns so deep pages cost the same as page 1
+        paginator = KeysetPaginator(projects, PORTFOLIO_PER_PAGE, Project._meta.ordering)
+        projects_page = paginator.get_page(
+            after=request.GET.get('after'), before=request.GET.get('before')
+        )
+    else:
+        paginator = Paginator(projects, PORTFOLIO_PER_PAGE)
+        page_number = request.GET.get('page')
+        projects_page = paginator.get_page(page_number)
     
     context = {
         'projects': projects_page,
+        'keyset_pagination': keyset,
+        'total_projects': active_project_count(category) if keyset else projects_page.paginator.count,
         'categories': Project.CATEGORY_CHOICES,
         'current_category': category,
-        'page_content': PageContent.objects.filter(page='portfolio').first(),
+        'page_content': get_page_content('portfolio'),
     }
     return render(request, 'portfolio.html', context)
 
+@conditional_page('contact')
+@cache_public_page
 def contact(request):
     """Contact page view"""
     if request.method == 'POST':
@@ -103,50 +129,48 @@ def contact(request):
         return redirect('contact')
     
     context = {
-        'page_content': PageContent.objects.filter(page='contact').first(),
+        'page_content': get_page_content('contact'),
     }
     return render(request, 'contact.html', context)
 
-def sitemap_xml(request):
-    """Generate XML sitemap"""
-    base_url = request.build_absolute_uri('/')
-    
-    # Static pages
-    static_pages = [
-        {'url': '', 'priority': '1.0', 'changefreq': 'daily'},
-        {'url': 'about/', 'priority': '0.8', 'changefreq': 'monthly'},
-        {'url': 'services/', 'priority': '0.9', 'changefreq': 'weekly'},
-        {'url': 'portfolio/', 'priority': '0.9', 'changefreq': 'weekly'},
-        {'url': 'contact/', 'priority': '0.7', 'changefreq': 'monthly'},
-    ]
-    
-    xml_content = '''<?xml version="1.0" encoding="UTF-8"?>
-<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'''
-    
-    for page in static_pages:
-        xml_content += f'''
-    <url>
-        <loc>{base_url}{page['url']}</loc>
-        <lastmod>{timezone.now().strftime('%Y-%m-%d')}</lastmod>
-        <changefreq>{page['changefreq']}</changefreq>
-        <priority>{page['priority']}</priority>
-    </url>'''
-    
-    # Add dynamic project pages
-    projects = Project.objects.filter(is_active=True)
-    for project in projects:
-        xml_content += f'''
-    <url>
-        <loc>{base_url}portfolio/?project={project.id}</loc>
-        <lastmod>{project.updated_at.strftime('%Y-%m-%d')}</lastmod>
-        <changefreq>monthly</changefreq>
-        <priority>0.6</priority>
-    </url>'''
-    
-    xml_content += '''
-</urlset>'''
-    
-    response = HttpResponse(xml_content, content_type='application/xml')
+@never_cache
+def csrf_token(request):
+    """
+    CSRF token for the contact form, fetched when it is submitted so the
+    contact page itself sets no cookie and can be cached. The form therefore
+    needs JavaScript: without it the token stays empty and the POST gets a
+    403, so contact.html shows a <noscript> note with the email and phone.
+    """
+    return JsonResponse({'token': get_token(request)})
+
+def sitemap_xml(request, section=None):
+    """Serve the stored XML sitemap (or one of its shards), gzipped when accepted"""
+    # Not the request's host: with any Host accepted, each one would get a copy on disk
+    directory = sitemap.get_directory(sitemap.site_url())
+    path = directory / ('sitemap.xml' if section is None else f'sitemap-{section}.xml')
+    gzipped = accepts_encoding(request, 'gzip')
+    try:
+        # Missing when the section doesn't exist, or when a newer build has
+        # just removed this generation's copy
+        response = FileResponse(open(f'{path}.gz' if gzipped else path, 'rb'), content_type='application/xml')
+    except FileNotFoundError:
+        raise Http404('No such sitemap section')
+    if gzipped:
+        response['Content-Encoding'] = 'gzip'
+    patch_vary_headers(response, ['Accept-Encoding'])
+    return response
+
+def resized_media(request, width, height, path):
+    """Serve a signed, resized copy of a media file"""
+    if not resizing.check_signature(width, height, path, request.GET.get('s')):
+        raise PermissionDenied('Bad signature')
+    try:
+        variant = resizing.get_variant(path, width, height)
+    except (resizing.InvalidVariant, OSError):
+        raise Http404('No such image')
+    response = FileResponse(open(variant, 'rb'))
+    # The URL changes whenever the size does and uploads are never overwritten
+    patch_cache_control(response, public=True, max_age=31536000, immutable=True)
     return response
 
 def robots_txt(request):
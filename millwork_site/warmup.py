@@ -0,0 +1,167 @@
+"""
+Cache warm-up.
+
+Renders every public URL - each page in every language, each portfolio
+category and every page of its pagination, plus the sitemap - so the page,
+fragment, queryset and singleton caches and the stored sitemap are filled
+before visitors arrive. Each URL is built with RequestFactory and its view
+called directly, set up the way the middleware would set up an anonymous
+visit: language from the path, an AnonymousUser, cookie messages and reads
+from the replica. Requests carry the public host and scheme, so they land
+on the same cache keys as real traffic.
+
+`manage.py warm_caches` runs it on demand (e.g. after a deploy). With
+WARM_CACHES_ON_STARTUP = True, core/wsgi.py and core/asgi.py also start it
+in a background thread when a server process loads the site, and never
+management commands or tests; a cache lock per content generation keeps
+several workers from warming the same content at once.
+"""
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode, urlsplit
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.core.cache import cache
+from django.db import connections
+from django.test import RequestFactory
+from django.urls import Resolver404, resolve, reverse
+from django.utils import translation
+
+from . import routers
+from .models import Project
+from .page_cache import content_generation
+from .pagination import KeysetPaginator
+
+logger = logging.getLogger(__name__)
+
+PAGES = ('home', 'about', 'services', 'portfolio', 'contact')
+LOCK_PREFIX = 'warmup:'
+
+
+def base_url():
+    return getattr(settings, 'WARM_CACHES_BASE_URL', None) or settings.SITE_URL
+
+
+def portfolio_queries():
+    """Query strings of every portfolio listing page, as the templates link them"""
+    from .views import PORTFOLIO_PER_PAGE
+
+    keyset = getattr(settings, 'PORTFOLIO_PAGINATION', 'keyset') == 'keyset'
+    queries = []
+    for category in [None] + [key for key, _ in Project.CATEGORY_CHOICES]:
+        projects = Project.objects.filter(is_active=True)
+        if category:
+            projects = projects.filter(category=category)
+        suffix = {'category': category} if category else {}
+        queries.append(suffix)
+        if keyset:
+            # Follow the "next" links; their cursors are deterministic
+            paginator = KeysetPaginator(projects, PORTFOLIO_PER_PAGE, Project._meta.ordering)
+            page = paginator.get_page()
+            while page.has_next:
+                queries.append({'after': page.next_cursor, **suffix})
+                page = paginator.get_page(after=page.next_cursor)
+        else:
+            pages = -(-projects.count() // PORTFOLIO_PER_PAGE)
+            queries.extend({'page': number, **suffix} for number in range(2, pages + 1))
+    return queries
+
+
+def public_urls():
+    """Paths of every public page in every language, and the sitemap"""
+    paths = []
+    for language, _ in settings.LANGUAGES:
+        with translation.override(language):
+            for page in PAGES:
+                paths.append(reverse(page))
+            portfolio = reverse('portfolio')
+            paths.extend(
+                # Cursors keep their ':' unescaped, like the links in portfolio.html
+                f'{portfolio}?{urlencode(query, safe=":")}' for query in portfolio_queries() if query
+            )
+    paths.append(reverse('sitemap'))
+    return paths
+
+
+def render(path, host, secure):
+    """Call the view of `path` as an anonymous GET and return its status code"""
+    request = RequestFactory().get(path, HTTP_HOST=host, secure=secure)
+    request.user = AnonymousUser()
+    request._messages = CookieStorage(request)
+    language = translation.get_language_from_path(request.path_info) or settings.LANGUAGE_CODE
+    with translation.override(language), routers.request_scope():
+        request.LANGUAGE_CODE = language
+        try:
+            match = resolve(request.path_info)
+        except Resolver404:
+            return 404
+        request.resolver_match = match
+        if match.func.__module__ == routers.PUBLIC_VIEWS_MODULE:
+            routers.use_replica()
+        try:
+            response = match.func(request, *match.args, **match.kwargs)
+            if hasattr(response, 'render'):
+                response.render()
+            response.close()
+        except Exception:
+            # A failing page is reported with its status instead of stopping the run
+            logger.warning('Warming %s failed', path, exc_info=True)
+            return 500
+        return response.status_code
+
+
+def warm(paths=None, workers=4, url=None):
+    """
+    Render `paths` (all public URLs by default) in `workers` threads and
+    return [(path, status code, seconds)] in the order given
+    """
+    paths = public_urls() if paths is None else paths
+    parts = urlsplit(url or base_url())
+
+    def fetch(path):
+        start = time.perf_counter()
+        status = render(path, parts.netloc, parts.scheme == 'https')
+        return path, status, time.perf_counter() - start
+
+    def fetch_in_pool(path):
+        try:
+            return fetch(path)
+        finally:
+            # Pool threads outlive the requests; don't leave their connections open
+            connections.close_all()
+
+    if workers <= 1:
+        return [fetch(path) for path in paths]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(fetch_in_pool, paths))
+
+
+def warm_in_background(delay=0):
+    """
+    Warm the caches in a daemon thread, unless another process is already
+    warming the current content generation
+    """
+    def run():
+        time.sleep(delay)
+        try:
+            if not cache.add(f'{LOCK_PREFIX}{content_generation()}', True, getattr(settings, 'PAGE_CACHE_TIMEOUT', 600)):
+                return
+            results = warm()
+            logger.info('Warmed %d URLs in %.1fs', len(results), sum(seconds for _, _, seconds in results))
+        except Exception:
+            logger.warning('Cache warm-up failed', exc_info=True)
+
+    thread = threading.Thread(target=run, name='warm-caches', daemon=True)
+    thread.start()
+    return thread
+
+
+def warm_on_startup():
+    """Called by the WSGI/ASGI entry points: warm in the background if WARM_CACHES_ON_STARTUP"""
+    if getattr(settings, 'WARM_CACHES_ON_STARTUP', False):
+        return warm_in_background(delay=getattr(settings, 'WARM_CACHES_DELAY', 5))
+    return None